@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_pipeline import ToneTTSBackend
+from benchmarks.synthetic import make_story
+from scripts.align_subtitles import ALIGN_BACKENDS, align_words
+from scripts.create_audio import generate_speech
+from utils import whisper_models
+from utils.audio import decode_pcm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare open Whisper transcription with forced alignment")
+    parser.add_argument('--audio', help="Narration MP3 with a .chunks.json manifest (default: synthetic tone)")
+    parser.add_argument('--text', help="File with the narrated text (required with --audio)")
+    parser.add_argument('--chars', type=int, default=3000, help="Synthetic story length")
+    parser.add_argument('--whisper-model', default=whisper_models.DEFAULT_MODEL)
+    parser.add_argument('--skip-transcribe', action='store_true', help="Only time the aligners")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.audio:
+            audio_path = args.audio
+            with open(args.text, 'r', encoding='utf-8') as f:
+                text = f.read()
+        else:
+            text = make_story(args.chars)
+            audio_path = os.path.join(tmp_dir, 'story.mp3')
+            asyncio.run(generate_speech(text, audio_path, backend=ToneTTSBackend()))
+
+        minutes = len(decode_pcm(audio_path)) / 16000 / 60
+        whisper_models.warm(args.whisper_model)
+        print(f"\n{minutes:.1f} minutes of audio, model '{args.whisper_model}' loaded")
+
+        runs = [(backend, lambda b=backend: align_words(text, audio_path, b, args.whisper_model))
+                for backend in ALIGN_BACKENDS]
+        if not args.skip_transcribe:
+            runs.append(('transcribe', lambda: whisper_models.transcribe(
+                audio_path, name=args.whisper_model, word_timestamps=True, language='en')))
+
+        for name, run in runs:
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            print(f"{name:>12}: {elapsed:7.2f}s ({elapsed / minutes:6.2f}s per minute of audio)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import make_tone_audio
+from utils.audio import (decode_pcm, load_pcm, narration_audio_clip, native_pcm_path, pcm_path, save_pcm,
+                         source_sample_rate)
+
+
+def read_clip(clip, fps, chunksize=50000):
+    """Pull every audio sample through a moviepy clip, as write_videofile does"""
+    for _ in clip.iter_chunks(fps=fps, chunksize=chunksize, quantize=True, nbytes=2):
+        pass
+    clip.close()
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare decoding the narration per stage with one shared PCM decode")
+    parser.add_argument('--audio', help="Narration MP3 (default: synthetic tone)")
+    parser.add_argument('--minutes', type=float, default=10.0, help="Synthetic narration length")
+    args = parser.parse_args()
+
+    from moviepy.audio.io.AudioFileClip import AudioFileClip
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audio_path = args.audio or make_tone_audio(os.path.join(tmp_dir, 'story.mp3'), args.minutes * 60)
+        for path in (pcm_path(audio_path), native_pcm_path(audio_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        # Before: Whisper decodes the MP3 itself, then the renderer decodes it again (at 44.1 kHz)
+        whisper_decode = timed(decode_pcm, audio_path)
+        render_decode = timed(lambda: read_clip(AudioFileClip(audio_path), 44100))
+
+        # After: the audio stage decodes once at the native rate and derives the 16 kHz
+        # copy; Whisper and the renderer read their .npy files
+        shared_decode = timed(save_pcm, audio_path)
+        whisper_load = timed(load_pcm, audio_path)
+        render_read = timed(lambda: read_clip(narration_audio_clip(audio_path), source_sample_rate(audio_path)))
+
+        size = sum(os.path.getsize(path) for path in (pcm_path(audio_path), native_pcm_path(audio_path))) / 1024 ** 2
+        print(f"per stage : whisper decode {whisper_decode:6.2f}s + render decode {render_decode:6.2f}s "
+              f"= {whisper_decode + render_decode:6.2f}s")
+        print(f"shared    : decode once    {shared_decode:6.2f}s, whisper load {whisper_load:6.3f}s, "
+              f"render read {render_read:6.2f}s ({size:.1f} MB .npy)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import (make_background_video, make_story, make_tone_audio, make_words,
+                                  write_subtitle_fixture)
+from scripts.parallel_render import SEGMENT_SECONDS, create_final_video_incremental
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render after a one-word subtitle fix with the segment cache")
+    parser.add_argument('--duration', type=float, default=60.0, help="Synthetic input length in seconds")
+    parser.add_argument('--size', default='540x960', help="Synthetic background size WxH")
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--segment-seconds', type=float, default=SEGMENT_SECONDS)
+    parser.add_argument('--preset', default='veryfast')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video_path = make_background_video(os.path.join(tmp_dir, 'background.mp4'), args.duration,
+                                           width, height, args.fps)
+        audio_path = make_tone_audio(os.path.join(tmp_dir, 'audio.mp3'), args.duration)
+        srt_path = os.path.join(tmp_dir, 'subtitles.srt')
+        words = make_words(make_story(int(args.duration * 15)), args.duration)
+        write_subtitle_fixture(srt_path, words)
+        options = dict(preset=args.preset, workers=args.workers, background_start=None,
+                       segment_seconds=args.segment_seconds, cache_dir=os.path.join(tmp_dir, 'cache'))
+
+        def render(name):
+            started = time.perf_counter()
+            create_final_video_incremental(video_path, audio_path, srt_path, os.path.join(tmp_dir, name), **options)
+            return time.perf_counter() - started
+
+        cold = render('cold.mp4')
+        unchanged = render('unchanged.mp4')
+        # A typo fix in the middle of the story
+        middle = len(words) // 2
+        word, start, end = words[middle]
+        words[middle] = (word.upper(), start, end)
+        write_subtitle_fixture(srt_path, words)
+        edited = render('edited.mp4')
+
+        print(f"\n{args.duration:.0f}s story at {width}x{height}, {args.segment_seconds:g}s segments:")
+        print(f"  full render     : {cold:7.2f}s")
+        print(f"  unchanged       : {unchanged:7.2f}s ({cold / unchanged:.1f}x)")
+        print(f"  one word edited : {edited:7.2f}s ({cold / edited:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.worker import STAGES, Worker
+from utils.job_queue import JobQueue
+
+
+def fake_stage(stage):
+    """A stage that sleeps for the job's stage time and writes a small output file"""
+    def run(worker, job, outputs, config):
+        payload = job['payload']
+        time.sleep(payload['stage_seconds'].get(stage, 0.0))
+        path = os.path.join(payload['work_dir'], f"{job['id']}.{stage}")
+        with open(path, 'a') as f:
+            # One line per run, so re-executed stages are visible afterwards
+            f.write(f"{worker.name}\n")
+        return path
+    return run
+
+
+FAKE_STAGES = {stage: fake_stage(stage) for stage in STAGES}
+
+
+def run_fake_worker(queue_path, name, lease, heartbeat, ready=None, max_jobs=None):
+    with JobQueue(queue_path, lease_seconds=lease) as queue:
+        worker = Worker(queue, stages=FAKE_STAGES, name=name, heartbeat=heartbeat)
+        worker.warm()
+        if ready is not None:
+            # Start the clock once every process has imported and opened the queue
+            ready.wait()
+        worker.run(max_jobs=max_jobs, exit_when_idle=max_jobs is None, poll=0.05)
+
+
+def runs_per_stage(work_dir, job_id):
+    counts = {}
+    for stage in STAGES:
+        path = os.path.join(work_dir, f"{job_id}.{stage}")
+        if os.path.exists(path):
+            with open(path) as f:
+                counts[stage] = sum(1 for _ in f)
+    return counts
+
+
+def bench_throughput(tmp_dir, jobs, workers, stage_seconds):
+    queue_path = os.path.join(tmp_dir, 'throughput.db')
+    work_dir = os.path.join(tmp_dir, 'throughput')
+    os.makedirs(work_dir)
+    with JobQueue(queue_path) as queue:
+        for i in range(jobs):
+            queue.submit(f"job {i}", {'work_dir': work_dir,
+                                      'stage_seconds': {stage: stage_seconds for stage in STAGES}})
+
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(workers + 1)
+    processes = [context.Process(target=run_fake_worker, args=(queue_path, f"worker-{n}", 60, 10, ready))
+                 for n in range(workers)]
+    for process in processes:
+        process.start()
+    ready.wait()
+    started = time.perf_counter()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    with JobQueue(queue_path) as queue:
+        counts = queue.counts()
+        duplicated = sum(1 for job in queue.list(limit=jobs)
+                         if max(runs_per_stage(work_dir, job['id']).values(), default=0) > 1)
+    print(f"throughput: {jobs} jobs, {workers} workers, {stage_seconds * 1000:.0f} ms per stage: "
+          f"{elapsed:.2f}s ({jobs / elapsed:.1f} jobs/s, ideal {workers / (3 * stage_seconds or 1e-9):.1f}), "
+          f"{counts.get('done', 0)} done, {duplicated} ran a stage twice")
+
+
+def bench_resume(tmp_dir, lease):
+    """Kill a worker during the render stage and check that a new worker only re-runs that stage"""
+    queue_path = os.path.join(tmp_dir, 'resume.db')
+    work_dir = os.path.join(tmp_dir, 'resume')
+    os.makedirs(work_dir)
+    with JobQueue(queue_path, lease_seconds=lease) as queue:
+        job_id = queue.submit("resumed job", {'work_dir': work_dir,
+                                              'stage_seconds': {'audio': 0.2, 'subtitles': 0.2, 'render': 5.0}})
+
+        context = multiprocessing.get_context('spawn')
+        first = context.Process(target=run_fake_worker, args=(queue_path, 'killed', lease, lease / 4))
+        first.start()
+        while 'subtitles' not in queue.get(job_id)['checkpoints']:
+            time.sleep(0.05)
+        time.sleep(0.2)
+        first.kill()
+        first.join()
+        killed_at = time.perf_counter()
+        print(f"resume: killed worker after {', '.join(queue.get(job_id)['checkpoints'])}")
+
+        # The replacement waits out the dead worker's lease, then picks the job up
+        second = context.Process(target=run_fake_worker,
+                                 args=(queue_path, 'replacement', lease, lease / 4, None, 1))
+        second.start()
+        while queue.get(job_id)['status'] == 'running' and queue.get(job_id)['worker'] == 'killed':
+            time.sleep(0.05)
+        takeover = time.perf_counter() - killed_at
+        second.join()
+
+        job = queue.get(job_id)
+        print(f"resume: job {job['status']} after {job['attempts']} attempts, taken over "
+              f"{takeover:.1f}s after the kill (lease {lease:.1f}s), stage runs {runs_per_stage(work_dir, job_id)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure job queue throughput and stage resume after a killed worker")
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--stage-ms', type=float, default=5.0, help="Fake work per stage")
+    parser.add_argument('--lease', type=float, default=2.0, help="Lease for the resume test")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bench_throughput(tmp_dir, args.jobs, args.workers, args.stage_ms / 1000)
+        bench_resume(tmp_dir, args.lease)
+
+
+if __name__ == '__main__':
+    main()
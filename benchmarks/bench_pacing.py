@@ -0,0 +1,61 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.pacing import pace_audio
+
+
+# Edge TTS narration rate; pacing runs at the source rate
+SAMPLE_RATE = 24000
+
+
+def make_paused_speech(minutes, sample_rate=SAMPLE_RATE, seed=0):
+    """Tone bursts of sentence length separated by TTS-like pauses, plus per-burst word onsets"""
+    rng = np.random.default_rng(seed)
+    pieces, onsets, position = [], [], 0
+    while position < minutes * 60 * sample_rate:
+        length = int(rng.uniform(1.5, 4.0) * sample_rate)
+        t = np.arange(length) / sample_rate
+        pieces.append((0.4 * np.sin(2 * np.pi * rng.uniform(150, 300) * t)).astype(np.float32))
+        onsets.append(position / sample_rate)
+        pause = int(rng.uniform(0.2, 1.2) * sample_rate)
+        pieces.append(np.zeros(pause, dtype=np.float32))
+        position += length + pause
+    return np.concatenate(pieces), np.array(onsets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure pause compaction and time-stretch on synthetic narration")
+    parser.add_argument('--minutes', type=float, default=5.0)
+    parser.add_argument('--max-pause', type=float, default=0.25)
+    parser.add_argument('--speed', type=float, default=1.15)
+    parser.add_argument('--fps', type=int, default=30, help="Used to report the frames saved")
+    parser.add_argument('--sample-rate', type=int, default=SAMPLE_RATE)
+    args = parser.parse_args()
+
+    rate = args.sample_rate
+    samples, onsets = make_paused_speech(args.minutes, rate)
+    started = time.perf_counter()
+    paced, source_times, target_times = pace_audio(samples, rate, args.max_pause, args.speed)
+    elapsed = time.perf_counter() - started
+
+    before, after = len(samples) / rate, len(paced) / rate
+    # Remapped onsets must still be where the audio starts: quiet just before, loud just after
+    in_sync = sum(
+        np.abs(paced[max(0, int((t - 0.03) * rate)):max(0, int((t - 0.01) * rate))]).max(initial=0) < 0.05
+        and np.abs(paced[int((t + 0.01) * rate):int((t + 0.03) * rate)]).max(initial=0) > 0.2
+        for t in np.interp(onsets, source_times, target_times)
+    )
+    print(f"{before:.1f}s -> {after:.1f}s ({after / before:.0%}), {int((before - after) * args.fps)} fewer frames "
+          f"at {args.fps} fps")
+    print(f"pacing took {elapsed:.2f}s ({before / elapsed:.0f}x real time), "
+          f"{(len(source_times) - 2) // 2} pauses shortened, {in_sync}/{len(onsets)} onsets in sync")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+STAGES = ("audio", "subtitles", "parse", "render")
+
+
+class ToneTTSBackend:
+    """Offline stand-in for Edge TTS that returns a sine tone sized like real speech"""
+
+    chars_per_second = 15
+
+    def _encode(self, duration):
+        import imageio_ffmpeg
+        result = subprocess.run([
+            imageio_ffmpeg.get_ffmpeg_exe(), '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f"sine=frequency=220:duration={duration:.3f}:sample_rate=24000",
+            '-ac', '1', '-c:a', 'libmp3lame', '-b:a', '48k', '-f', 'mp3', '-',
+        ], check=True, capture_output=True)
+        return result.stdout
+
+    async def synthesize(self, text, voice):
+        return await asyncio.to_thread(self._encode, max(0.5, len(text) / self.chars_per_second))
+
+
+def _stage_audio(ctx):
+    from scripts.create_audio import create_audio_from_text
+    create_audio_from_text(ctx['text'], ctx['audio_path'], backend=ToneTTSBackend())
+    return {}
+
+
+def _stage_subtitles(ctx):
+    if ctx['whisper']:
+        from scripts.create_subtitles import create_subtitles_from_audio
+        create_subtitles_from_audio(ctx['audio_path'], ctx['srt_path'], model_name=ctx['whisper_model'])
+        return {}
+    # Without Whisper, write evenly spaced word timings so later stages have input
+    from benchmarks.synthetic import make_words, write_subtitle_fixture
+    from utils.audio import audio_duration
+    words = make_words(ctx['text'], audio_duration(ctx['audio_path']))
+    write_subtitle_fixture(ctx['srt_path'], words)
+    return {'skipped': True, 'words': len(words)}
+
+
+def _stage_parse(ctx):
+    from scripts.create_video import load_words, words_from_srt
+    heuristic = words_from_srt(ctx['srt_path'])
+    sidecar = load_words(ctx['srt_path'])
+    return {'heuristic_words': len(heuristic), 'sidecar_words': len(sidecar)}
+
+
+def _stage_render(ctx):
+    from utils.audio import audio_duration
+    from scripts.render_engines import get_renderer
+    from utils.video_library import probe_video
+    render = get_renderer(ctx['engine'])
+    render(video_path=ctx['video_path'], audio_path=ctx['audio_path'],
+           srt_path=ctx['srt_path'], output_path=ctx['output_path'],
+           test_duration=ctx['render_seconds'])
+    _, _, fps, _ = probe_video(ctx['video_path'])
+    # The background loops, so the output always follows the audio
+    duration = min(audio_duration(ctx['audio_path']), ctx['render_seconds'] or float('inf'))
+    return {'frames': int(round(duration * fps))}
+
+
+STAGE_FUNCTIONS = {
+    'audio': _stage_audio,
+    'subtitles': _stage_subtitles,
+    'parse': _stage_parse,
+    'render': _stage_render,
+}
+
+
+def _run_stage(stage, ctx):
+    """Run one stage in this (fresh) process and measure it"""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    extra = STAGE_FUNCTIONS[stage](ctx)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    # ru_maxrss is in KiB on Linux
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result = {
+        'wall_seconds': round(wall, 4),
+        'cpu_seconds': round(cpu, 4),
+        'peak_rss_mb': round(self_rss / 1024, 1),
+        'peak_child_rss_mb': round(child_rss / 1024, 1),
+        **extra,
+    }
+    if 'frames' in result:
+        result['render_fps'] = round(result['frames'] / wall, 2)
+    return result
+
+
+def run_stage_isolated(stage, ctx):
+    """Run a stage in a spawned process so its peak RSS is not mixed with other stages"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(_run_stage, (stage, ctx))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(baseline_path, results):
+    """Print per-stage wall time changes against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}):")
+    for stage, current in results['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if not before:
+            continue
+        delta = (current['wall_seconds'] - before['wall_seconds']) / max(before['wall_seconds'], 1e-9)
+        print(f"  {stage:<10} {before['wall_seconds']:>8.2f}s -> {current['wall_seconds']:>8.2f}s ({delta:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline per-stage benchmark of the factory pipeline")
+    parser.add_argument('--chars', type=int, default=3000, help="Synthetic story length")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--whisper', action='store_true', help="Run real Whisper (needs the model cached locally)")
+    parser.add_argument('--whisper-model', default='base')
+    parser.add_argument('--engine', default='moviepy', help="Render engine to benchmark")
+    parser.add_argument('--size', default='1080x1920')
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--render-seconds', type=float, default=20.0,
+                        help="Only render this much of the timeline (0 for all)")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<commit>_<time>.json)")
+    parser.add_argument('--compare', help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import make_background_video, make_story
+
+    width, height = (int(v) for v in args.size.split('x'))
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'params': vars(args),
+        'stages': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text = make_story(args.chars)
+        ctx = {
+            'text': text,
+            'audio_path': os.path.join(tmp_dir, 'audio', 'story.mp3'),
+            'srt_path': os.path.join(tmp_dir, 'subtitles.srt'),
+            'video_path': os.path.join(tmp_dir, 'background.mp4'),
+            'output_path': os.path.join(tmp_dir, 'final.mp4'),
+            'whisper': args.whisper,
+            'whisper_model': args.whisper_model,
+            'engine': args.engine,
+            'render_seconds': args.render_seconds or None,
+        }
+        # Stages depend on earlier outputs, so always produce them (timed only when selected)
+        for stage in STAGES:
+            if stage == 'render':
+                if stage not in args.stages:
+                    break
+                background_seconds = args.render_seconds or args.chars / ToneTTSBackend.chars_per_second
+                print(f"Generating {background_seconds:.0f}s synthetic background...")
+                make_background_video(ctx['video_path'], background_seconds + 1, width, height, args.fps)
+            print(f"\n=== {stage} ===")
+            metrics = run_stage_isolated(stage, ctx)
+            if stage in args.stages:
+                results['stages'][stage] = metrics
+
+    print("\nstage        wall(s)   cpu(s)  peak RSS(MB)  extra")
+    for stage, m in results['stages'].items():
+        extra = f"{m['render_fps']} frames/s" if 'render_fps' in m else ''
+        print(f"{stage:<10} {m['wall_seconds']:>9.2f} {m['cpu_seconds']:>8.2f} {m['peak_rss_mb']:>13.1f}  {extra}")
+
+    output = args.output or RESULTS_DIR / f"{results['commit']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_reddit_server import start_server
+from scripts.fetch_reddit import RedditFetcher, TokenBucket, fetch_subreddits
+from utils.story_store import StoryStore
+
+
+def run_once(url, subreddits, time_filters, limit, workers, rate, db_path):
+    fetcher = RedditFetcher("bench", "bench", api_base=url, token_url=f"{url}/api/v1/access_token",
+                            bucket=TokenBucket(rate=rate))
+    with StoryStore(db_path) as store:
+        stats = fetch_subreddits(fetcher, store, subreddits, time_filters, limit, workers=workers)
+        stats["stored"] = store.count()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch from a local fake Reddit API, serially and concurrently")
+    parser.add_argument("--subreddits", type=int, default=6)
+    parser.add_argument("--time-filters", nargs="+", default=["week", "month"])
+    parser.add_argument("--limit", type=int, default=200, help="Posts per subreddit and time filter")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per listing request")
+    parser.add_argument("--requests-per-window", type=int, default=20)
+    parser.add_argument("--window", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Client-side requests per second (default: the server's budget)")
+    args = parser.parse_args()
+
+    subreddits = [f"sub{i}" for i in range(args.subreddits)]
+    rate = args.rate or args.requests_per_window / args.window
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, workers in (("serial", 1), ("concurrent", args.workers)):
+            server, url = start_server(requests_per_window=args.requests_per_window, window=args.window,
+                                       latency=args.latency, posts_per_subreddit=args.limit)
+            try:
+                stats = run_once(url, subreddits, args.time_filters, args.limit, workers, rate,
+                                 os.path.join(tmp, f"{name}.db"))
+            finally:
+                server.shutdown()
+            print(f"{name:>10}: {stats['posts']} posts in {stats['seconds']:.2f}s "
+                  f"({stats['posts'] / max(stats['seconds'], 1e-9):.0f} posts/s), "
+                  f"{stats['requests']} requests, {stats['throttled']} throttled, "
+                  f"{stats['rate_limit_wait']:.2f}s waiting, {stats['stored']} stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import (make_background_video, make_story, make_tone_audio,
+                                  make_words, write_subtitle_fixture)
+from scripts.render_engines import RENDER_ENGINES, get_renderer
+from utils.audio import audio_duration
+from utils.video_library import probe_video
+
+
+def prepare_inputs(tmp_dir, duration, width, height, fps):
+    """Create a synthetic background video, narration and word timings"""
+    video_path = make_background_video(os.path.join(tmp_dir, 'background.mp4'), duration, width, height, fps)
+    audio_path = make_tone_audio(os.path.join(tmp_dir, 'audio.mp3'), duration)
+    words = make_words(make_story(int(duration * 15)), duration)
+    srt_path = write_subtitle_fixture(os.path.join(tmp_dir, 'subtitles.srt'), words)
+    return video_path, audio_path, srt_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the moviepy and ffmpeg render engines")
+    parser.add_argument('--video', help="Background video (default: synthetic)")
+    parser.add_argument('--audio', help="Narration MP3 (default: synthetic tone)")
+    parser.add_argument('--srt', help="Subtitle file (default: synthetic)")
+    parser.add_argument('--duration', type=float, default=30.0, help="Synthetic input length in seconds")
+    parser.add_argument('--size', default='1080x1920', help="Synthetic video size WxH")
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--engines', nargs='+', choices=RENDER_ENGINES, default=list(RENDER_ENGINES))
+    parser.add_argument('--json', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.video and args.audio and args.srt:
+            video_path, audio_path, srt_path = args.video, args.audio, args.srt
+        else:
+            width, height = (int(v) for v in args.size.split('x'))
+            print("Generating synthetic inputs...")
+            video_path, audio_path, srt_path = prepare_inputs(tmp_dir, args.duration, width, height, args.fps)
+
+        # Every engine renders the whole narration at the background's frame rate
+        frames = int(round(audio_duration(audio_path) * probe_video(video_path)[2]))
+        for engine in args.engines:
+            output_path = os.path.join(tmp_dir, f"out_{engine}.mp4")
+            render = get_renderer(engine)
+            started = time.perf_counter()
+            render(video_path=video_path, audio_path=audio_path, srt_path=srt_path, output_path=output_path)
+            seconds = time.perf_counter() - started
+            results.append({
+                'engine': engine,
+                'seconds': round(seconds, 3),
+                'render_fps': round(frames / seconds, 2),
+                'output_bytes': os.path.getsize(output_path),
+            })
+
+    print("\nengine     seconds   frames/s")
+    for r in results:
+        print(f"{r['engine']:<10} {r['seconds']:>7.2f} {r['render_fps']:>10.1f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
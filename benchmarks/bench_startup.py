@@ -0,0 +1,87 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that belong to a pipeline stage and must not load just to start main.py
+HEAVY_MODULES = ('numpy', 'torch', 'whisper', 'moviepy', 'edge_tts', 'gtts', 'aiohttp', 'PIL')
+
+COMMANDS = {
+    'import': ['-c', 'import main'],
+    'help': [str(ROOT / 'main.py'), '--help'],
+    'list-stories': [str(ROOT / 'main.py'), 'list-stories', '--limit', '5'],
+    'list-videos': [str(ROOT / 'main.py'), 'list-videos'],
+}
+
+
+def run_python(args, cwd, env):
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=cwd, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def heavy_imports(env):
+    """Heavy modules present in sys.modules after importing main"""
+    code = f"import sys, main; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def slowest_imports(env, count):
+    """Largest cumulative times from python -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track main.py startup time and check that no stage modules load")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help="Fail if the median time of any command exceeds this many seconds")
+    parser.add_argument('--top', type=int, default=10, help="Show the slowest imports")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    failures = []
+
+    loaded = heavy_imports(env)
+    print(f"heavy modules after 'import main': {', '.join(loaded) or 'none'}")
+    if loaded:
+        failures.append(f"main imports {', '.join(loaded)}")
+
+    # Listing commands run in an empty directory, so they measure startup, not the data
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.makedirs(os.path.join(tmp_dir, 'videos'))
+        for name, command in COMMANDS.items():
+            cwd = ROOT if name == 'import' else tmp_dir
+            times = [run_python(command, cwd, env) for _ in range(args.runs)]
+            median = statistics.median(times)
+            print(f"{name:>13}: median {median * 1000:7.1f} ms, min {min(times) * 1000:7.1f} ms")
+            if median > args.budget:
+                failures.append(f"{name} took {median:.2f}s (budget {args.budget:.2f}s)")
+
+    print("\nslowest imports (cumulative):")
+    for micros, module in slowest_imports(env, args.top):
+        print(f"  {micros / 1000:7.1f} ms {module}")
+
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
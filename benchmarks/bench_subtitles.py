@@ -0,0 +1,111 @@
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import VOCABULARY
+from utils.subtitles import CueTrack, estimate_word_track, format_timestamp
+
+
+def write_large_srt(path, cues, seed=0):
+    """Write an SRT with the given number of cues, some of them two lines long"""
+    rng = random.Random(seed)
+    t = 0.0
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(1, cues + 1):
+            duration = rng.uniform(1.0, 4.0)
+            lines = [" ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 8)))
+                     for _ in range(rng.choice((1, 1, 2)))]
+            f.write(f"{n}\n{format_timestamp(t)} --> {format_timestamp(t + duration)}\n")
+            f.write("\n".join(lines) + "\n\n")
+            t += duration + 0.1
+    return path
+
+
+def legacy_words_from_srt(srt_path):
+    """The previous readlines()/dict parser and per-word timing loop, kept as a baseline"""
+    with open(srt_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    subtitles, current = [], None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.isdigit():
+            if current:
+                subtitles.append(current)
+            current = {'number': int(line)}
+        elif '-->' in line:
+            start, end = line.split(' --> ')
+            for key, stamp in (('start', start), ('end', end)):
+                h, m, s = stamp.replace(',', '.').split(':')
+                current[key] = float(h) * 3600 + float(m) * 60 + float(s)
+        elif current and 'text' not in current:
+            current['text'] = line
+    if current:
+        subtitles.append(current)
+
+    words = []
+    for sub in subtitles:
+        tokens = [re.sub(r'[^\w\'-]', '', w) for w in sub['text'].split() if re.sub(r'[^\w\'-]', '', w)]
+        if not tokens:
+            continue
+        word_duration = min(0.4, (sub['end'] - sub['start']) / len(tokens))
+        gap = min(0.1, word_duration * 0.2)
+        t = sub['start']
+        for token in tokens:
+            duration = min(word_duration * (len(token) / 5), word_duration)
+            words.append((token, t, t + duration))
+            t += duration + gap
+    return words
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse and retime a large SRT with the legacy and columnar models")
+    parser.add_argument('--cues', type=int, default=100000)
+    parser.add_argument('--srt', help="Existing SRT/VTT file to use instead of a synthetic one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        srt_path = args.srt or write_large_srt(os.path.join(tmp_dir, 'large.srt'), args.cues)
+        print(f"{os.path.getsize(srt_path) / 1024 ** 2:.1f} MB subtitle file")
+
+        legacy, legacy_time, legacy_mem = measure(legacy_words_from_srt, srt_path)
+        cues, parse_time, parse_mem = measure(CueTrack.read, srt_path)
+        track, estimate_time, estimate_mem = measure(estimate_word_track, cues)
+
+        print(f"legacy  : {len(legacy):>8} words in {legacy_time:6.2f}s, peak {legacy_mem:7.1f} MB "
+              "(first line of each cue only)")
+        print(f"columnar: {len(cues):>8} cues  in {parse_time:6.2f}s, peak {parse_mem:7.1f} MB")
+        print(f"          {len(track):>8} words in {estimate_time:6.2f}s, peak {estimate_mem:7.1f} MB, "
+              f"{len(track.vocab)} distinct")
+
+        started = time.perf_counter()
+        shifted = [(w, s * 1.1 + 0.5, e * 1.1 + 0.5) for w, s, e in legacy]
+        loop_time = time.perf_counter() - started
+        started = time.perf_counter()
+        track.retime(1.1, 0.5)
+        vector_time = time.perf_counter() - started
+        print(f"retime  : list {loop_time * 1000:8.1f} ms ({len(shifted)} words), "
+              f"arrays {vector_time * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_tts_server import start_server
+from scripts.create_audio import HttpTTSBackend, chunk_manifest_path, generate_speech, split_text_into_chunks
+from utils.mp3 import mp3_duration
+
+SENTENCE = "The hallway light flickered again, and I knew something was standing behind the door. "
+
+
+async def run_once(text, url, max_chars, concurrency, output_path):
+    first_chunk = []
+    started = time.perf_counter()
+
+    def on_chunk(info, audio):
+        if not first_chunk:
+            first_chunk.append(time.perf_counter() - started)
+
+    manifest = await generate_speech(
+        text, output_path,
+        backend=HttpTTSBackend(url),
+        max_chars=max_chars,
+        concurrency=concurrency,
+        on_chunk=on_chunk,
+    )
+    return {
+        "manifest": manifest,
+        "chunks": len(manifest),
+        "first_audio": first_chunk[0],
+        "total": time.perf_counter() - started,
+        "audio_seconds": manifest[-1]["end"],
+    }
+
+
+def check_manifest(text, max_chars, output_path, manifest):
+    """Return the ways the chunk manifest disagrees with the text and the written MP3"""
+    problems = []
+    with open(output_path, 'rb') as f:
+        audio = f.read()
+    with open(chunk_manifest_path(output_path), encoding='utf-8') as f:
+        saved = json.load(f)
+    if saved["chunks"] != manifest:
+        problems.append("saved manifest differs from the returned one")
+    if [c["text"] for c in manifest] != split_text_into_chunks(text, max_chars):
+        problems.append("chunk texts do not match the split story")
+    if [c["index"] for c in manifest] != list(range(len(manifest))):
+        problems.append("chunks are out of order")
+    offset = 0.0
+    for chunk in manifest:
+        if abs(chunk["start"] - offset) > 1e-5:
+            problems.append(f"chunk {chunk['index']} starts at {chunk['start']}, expected {offset:.6f}")
+        offset = chunk["end"]
+    if sum(c["bytes"] for c in manifest) != len(audio):
+        problems.append("chunk sizes do not add up to the MP3 size")
+    if abs(saved["duration"] - mp3_duration(audio)) > 1e-5 or abs(offset - saved["duration"]) > 1e-5:
+        problems.append(f"manifest ends at {offset}, MP3 lasts {mp3_duration(audio):.6f}s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-request and chunked TTS against a fake server")
+    parser.add_argument("--chars", type=int, default=10000, help="Story length in characters")
+    parser.add_argument("--max-chars", type=int, default=1200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-per-char", type=float, default=0.0005)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    text = (SENTENCE * (args.chars // len(SENTENCE) + 1))[:args.chars]
+    server, url = start_server(latency_per_char=args.latency_per_char, fail_rate=args.fail_rate, seed=1)
+    # Chunks that each start with a LAME Info frame, as files written by lame do
+    tagged_server, tagged_url = start_server(latency_per_char=args.latency_per_char, fail_rate=args.fail_rate,
+                                             seed=1, lame_tag=True)
+    problems = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = {
+                "single": (url, len(text) + 1, 1),
+                "chunked": (url, args.max_chars, args.concurrency),
+                "tagged": (tagged_url, args.max_chars, args.concurrency),
+            }
+            for name, (server_url, max_chars, concurrency) in runs.items():
+                output_path = os.path.join(tmp, f"{name}.mp3")
+                result = asyncio.run(run_once(text, server_url, max_chars, concurrency, output_path))
+                print(f"{name:>8}: {result['chunks']:3d} chunks, first audio {result['first_audio']:.2f}s, "
+                      f"total {result['total']:.2f}s, {result['audio_seconds']:.1f}s of audio")
+                problems += [f"{name}: {p}" for p in check_manifest(text, max_chars, output_path, result["manifest"])]
+    finally:
+        server.shutdown()
+        tagged_server.shutdown()
+
+    if problems:
+        print("\nFAILED: " + "; ".join(problems))
+        sys.exit(1)
+    print("\nChunk manifests match the text and the MP3")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_render_engines import prepare_inputs
+from scripts.ffmpeg_render import create_final_video_variants
+from scripts.render_engines import OUTPUT_PROFILES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one render per output profile with a single fan-out render")
+    parser.add_argument('--duration', type=float, default=30.0, help="Synthetic input length in seconds")
+    parser.add_argument('--size', default='1080x1920', help="Synthetic background size WxH")
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--profiles', nargs='+', choices=list(OUTPUT_PROFILES), default=list(OUTPUT_PROFILES))
+    parser.add_argument('--preset', default='veryfast')
+    parser.add_argument('--threads', type=int, default=0, help="Encoder threads per output (0 = ffmpeg default)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video_path, audio_path, srt_path = prepare_inputs(tmp_dir, args.duration, width, height, args.fps)
+        options = dict(threads=args.threads, preset=args.preset, background_start=None)
+
+        started = time.perf_counter()
+        for name in args.profiles:
+            create_final_video_variants(video_path, audio_path, srt_path, os.path.join(tmp_dir, 'separate.mp4'),
+                                        profiles=[name], **options)
+        separate = time.perf_counter() - started
+
+        started = time.perf_counter()
+        create_final_video_variants(video_path, audio_path, srt_path, os.path.join(tmp_dir, 'fanout.mp4'),
+                                    profiles=args.profiles, **options)
+        fanout = time.perf_counter() - started
+
+        print(f"\n{len(args.profiles)} profiles from {args.duration:.0f}s of {width}x{height} background:")
+        print(f"  separate renders: {separate:7.2f}s")
+        print(f"  single fan-out  : {fanout:7.2f}s ({separate / fanout:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import make_story
+
+
+def make_handler(requests_per_window=100, window=60.0, latency=0.0, posts_per_subreddit=250, seed=None):
+    """Build a handler serving /api/v1/access_token and /r/<name>/top
+
+    Every response carries X-Ratelimit-Used/Remaining/Reset headers for a
+    fixed window shared by all clients. Requests beyond the budget get a 429
+    with Retry-After, like the real API.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    state = {"window_start": time.monotonic(), "used": 0}
+    stats = {"requests": 0, "throttled": 0, "tokens": 0, "posts": 0}
+
+    def make_post(subreddit, index):
+        post_rng = random.Random(f"{subreddit}:{index}")
+        return {
+            "id": f"{subreddit}_{index:05d}",
+            "subreddit": subreddit,
+            "title": f"Story {index} from r/{subreddit}",
+            "author": f"user{post_rng.randrange(1000)}",
+            "score": 10000 - index,
+            "created_utc": 1700000000 + index * 60,
+            "url": f"https://www.reddit.com/r/{subreddit}/comments/{index}",
+            "is_self": post_rng.random() > 0.1,
+            "selftext": make_story(post_rng.randrange(500, 12000), seed=index),
+        }
+
+    class FakeRedditHandler(BaseHTTPRequestHandler):
+        def _rate_limit(self):
+            """Count this request against the window; return (allowed, headers)"""
+            with lock:
+                stats["requests"] += 1
+                now = time.monotonic()
+                if now - state["window_start"] >= window:
+                    state["window_start"], state["used"] = now, 0
+                state["used"] += 1
+                used = state["used"]
+                reset = max(0.0, window - (now - state["window_start"]))
+                remaining = max(0, requests_per_window - used)
+                allowed = used <= requests_per_window
+                if not allowed:
+                    stats["throttled"] += 1
+            headers = {
+                "X-Ratelimit-Used": str(used),
+                "X-Ratelimit-Remaining": f"{remaining:.1f}",
+                "X-Ratelimit-Reset": str(int(reset) + 1),
+            }
+            if not allowed:
+                headers["Retry-After"] = headers["X-Ratelimit-Reset"]
+            return allowed, headers
+
+        def _send_json(self, status, payload, headers=()):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in dict(headers).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/api/v1/access_token":
+                self._send_json(404, {"error": 404})
+                return
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                stats["tokens"] += 1
+            self._send_json(200, {"access_token": f"fake-{rng.randrange(1 << 30)}",
+                                  "token_type": "bearer", "expires_in": 3600})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if url.path == "/stats":
+                with lock:
+                    snapshot = dict(stats)
+                self._send_json(200, snapshot)
+                return
+            if len(parts) != 3 or parts[0] != "r" or parts[2] != "top":
+                self._send_json(404, {"error": 404})
+                return
+            if not self.headers.get("Authorization", "").startswith("bearer "):
+                self._send_json(401, {"error": 401})
+                return
+
+            allowed, headers = self._rate_limit()
+            if not allowed:
+                self._send_json(429, {"error": 429, "message": "Too Many Requests"}, headers)
+                return
+
+            time.sleep(latency)
+            query = parse_qs(url.query)
+            subreddit = parts[1]
+            limit = min(100, int(query.get("limit", ["25"])[0]))
+            after = query.get("after", [None])[0]
+            start = int(after.rsplit("_", 1)[1]) + 1 if after else 0
+            end = min(posts_per_subreddit, start + limit)
+            children = [{"kind": "t3", "data": make_post(subreddit, i)} for i in range(start, end)]
+            with lock:
+                stats["posts"] += len(children)
+            next_after = f"t3_{end - 1}" if end < posts_per_subreddit else None
+            self._send_json(200, {"kind": "Listing",
+                                  "data": {"after": next_after, "children": children}}, headers)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeRedditHandler
+
+
+def start_server(port=0, requests_per_window=100, window=60.0, latency=0.0, posts_per_subreddit=250, seed=None):
+    """Start the fake Reddit API in a background thread and return (server, url)"""
+    handler = make_handler(requests_per_window, window, latency, posts_per_subreddit, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Reddit listing API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--requests-per-window", type=int, default=100)
+    parser.add_argument("--window", type=float, default=60.0, help="Rate-limit window in seconds")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of simulated latency per listing")
+    parser.add_argument("--posts", type=int, default=250, help="Posts available per subreddit")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.requests_per_window, args.window, args.latency, args.posts)
+    print(f"Fake Reddit API listening on {url} (token URL {url}/api/v1/access_token, GET /stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
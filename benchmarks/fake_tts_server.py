@@ -0,0 +1,109 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.mp3 import silent_frames
+
+# Roughly the speaking rate of the Edge TTS voices
+CHARS_PER_SECOND = 15
+# Encoder delay and end padding in samples, as lame writes them into its tag
+LAME_DELAY = 576
+LAME_PADDING = 1000
+
+
+def lame_tagged(audio, delay=LAME_DELAY, padding=LAME_PADDING):
+    """Prefix silent_frames() audio with an ID3 tag and a LAME Info frame, like a file written by lame"""
+    frame = bytearray(audio[:4]) + bytearray(len(silent_frames(0)) - 4)
+    frames = len(audio) // len(frame)
+    # Info tag after the MPEG-2 mono side info, with the frame and byte count fields
+    info = b"Info" + (3).to_bytes(4, "big") + frames.to_bytes(4, "big") \
+        + (len(audio) + len(frame)).to_bytes(4, "big")
+    lame = b"LAME3.100" + bytes(12) + bytes([delay >> 4, ((delay & 0x0F) << 4) | (padding >> 8), padding & 0xFF])
+    frame[13:13 + len(info) + len(lame)] = info + lame
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + bytes(10)
+    return id3 + bytes(frame) + audio
+
+
+def make_handler(latency_per_char=0.0, fail_rate=0.0, seed=None, lame_tag=False):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    stats = {"requests": 0, "failures": 0, "chars": 0}
+
+    class FakeTTSHandler(BaseHTTPRequestHandler):
+        """Answers POST {text, voice} with silent MP3 audio of a plausible length"""
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            text = payload.get("text", "")
+            with lock:
+                stats["requests"] += 1
+                fail = rng.random() < fail_rate
+                if fail:
+                    stats["failures"] += 1
+                else:
+                    stats["chars"] += len(text)
+
+            time.sleep(latency_per_char * len(text))
+            if fail:
+                self.send_error(503, "Injected failure")
+                return
+
+            audio = silent_frames(len(text) / CHARS_PER_SECOND)
+            if lame_tag:
+                audio = lame_tagged(audio)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(audio)))
+            self.end_headers()
+            self.wfile.write(audio)
+
+        def do_GET(self):
+            body = json.dumps(stats).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeTTSHandler
+
+
+def start_server(port=0, latency_per_char=0.0, fail_rate=0.0, seed=None, lame_tag=False):
+    """Start the fake TTS server in a background thread and return (server, url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_per_char, fail_rate, seed, lame_tag))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the TTS service")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-per-char", type=float, default=0.0005,
+                        help="Seconds of simulated synthesis time per character")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 503")
+    parser.add_argument("--lame-tag", action="store_true",
+                        help="Start every response with an ID3 tag and a LAME Info frame")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency_per_char, args.fail_rate, lame_tag=args.lame_tag)
+    print(f"Fake TTS server listening on {url} (GET for stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import random
+import subprocess
+
+import imageio_ffmpeg
+import numpy as np
+
+from utils.subtitles import format_timestamp
+from utils.word_timings import save_word_timings, word_sidecar_path
+
+VOCABULARY = (
+    "the I was it and a to of my in that door house night room dark something "
+    "behind me when then heard saw light window stairs mother never again "
+    "whisper cold quiet slowly knocking basement shadow face smile"
+).split()
+
+
+def make_story(chars, seed=0):
+    """Return pseudo-random story text of roughly the given length"""
+    rng = random.Random(seed)
+    sentences = []
+    length = 0
+    while length < chars:
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(5, 16))]
+        sentence = " ".join(words).capitalize() + rng.choice([".", ".", ".", "!", "?"])
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)[:chars]
+
+
+def make_background_video(path, duration, width=1080, height=1920, fps=30):
+    """Encode a moving NumPy-generated pattern as a background video"""
+    writer = imageio_ffmpeg.write_frames(
+        path, (width, height), fps=fps, codec='libx264',
+        output_params=['-preset', 'ultrafast', '-g', str(fps)], macro_block_size=1)
+    writer.send(None)
+    ys, xs = np.mgrid[0:height, 0:width]
+    base = ((xs + ys) % 256).astype(np.uint8)
+    try:
+        for i in range(int(duration * fps)):
+            shift = (i * 4) % 256
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[..., 0] = base + shift
+            frame[..., 1] = np.roll(base, i * 3, axis=0)
+            frame[..., 2] = 255 - base
+            writer.send(frame)
+    finally:
+        writer.close()
+    return path
+
+
+def make_tone_audio(path, duration, frequency=220):
+    """Write a sine tone MP3 that stands in for TTS narration"""
+    subprocess.run([
+        imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f"sine=frequency={frequency}:duration={duration}:sample_rate=24000",
+        '-ac', '1', '-c:a', 'libmp3lame', '-b:a', '48k', path,
+    ], check=True)
+    return path
+
+
+def make_words(text, duration, gap=0.05):
+    """Spread the words of text evenly over duration as (word, start, end)"""
+    tokens = [w.strip(".,!?") for w in text.split()]
+    tokens = [w for w in tokens if w]
+    if not tokens:
+        return []
+    step = duration / len(tokens)
+    return [(w, i * step, (i + 1) * step - min(gap, step / 2)) for i, w in enumerate(tokens)]
+
+
+def write_subtitle_fixture(srt_path, words, words_per_cue=8):
+    """Write an SRT plus word sidecar for synthetic word timings"""
+    with open(srt_path, 'w', encoding='utf-8') as f:
+        for n, i in enumerate(range(0, len(words), words_per_cue), 1):
+            cue = words[i:i + words_per_cue]
+            f.write(f"{n}\n{format_timestamp(cue[0][1])} --> {format_timestamp(cue[-1][2])}\n")
+            f.write(" ".join(w for w, _, _ in cue) + "\n\n")
+    save_word_timings(words, word_sidecar_path(srt_path))
+    return srt_path
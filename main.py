@@ -1,23 +1,37 @@
+import argparse
 import os
 from datetime import datetime
 import json
 import re
-from scripts.create_audio import create_audio_from_text
-from scripts.create_subtitles import create_subtitles_from_audio
-from scripts.create_video import create_final_video
-
-def get_available_stories():
-    """Temporarily read stories from json file"""
-    json_files = [f for f in os.listdir('.') if f.startswith('creepypasta_stories_') and f.endswith('.json')]
-    if not json_files:
-        return []
-    
-    # Use the most recent json file
-    latest_file = sorted(json_files)[-1]
-    print(f"Loading stories from: {latest_file}")
-    with open(latest_file, 'r') as f:
-        stories = json.load(f)
-    return stories
+import signal
+import threading
+# Only settings and lightweight stores are imported here; each stage's
+# modules (TTS, Whisper, moviepy, numpy) are imported when that stage runs,
+# so listing commands and --help start quickly (see benchmarks/bench_startup.py)
+from scripts.align_subtitles import ALIGN_BACKENDS
+from scripts.batch_pipeline import BATCH_SUBTITLE_MODES, DEFAULT_CONFIG, SUBTITLE_MODES, VIDEO_POLICIES
+from scripts.render_engines import DEFAULT_ENGINE, OUTPUT_PROFILES, RENDER_ENGINES
+from scripts.worker import (DEFAULT_CONFIG as WORKER_CONFIG, JOB_OPTIONS, POLL_SECONDS, STAGES as JOB_STAGES,
+                            SUBTITLE_MODES as JOB_SUBTITLE_MODES)
+from utils import tracing
+from utils.tracing import span
+from utils.job_queue import DEFAULT_DB as DEFAULT_JOB_DB, JOB_STATUSES, JobQueue
+from utils.story_store import STATUSES as STORY_STATUSES, StoryStore
+from utils.video_library import VideoLibrary
+
+def import_legacy_story_files(store):
+    """One-time import of creepypasta_stories_*.json files into the story store"""
+    json_files = sorted(f for f in os.listdir('.') if f.startswith('creepypasta_stories_') and f.endswith('.json'))
+    for json_file in json_files:
+        inserted, _ = store.import_json(json_file)
+        print(f"Imported {inserted} stories from: {json_file}")
+
+def get_available_stories(store, limit=20, offset=0, max_length=None, include_content=False):
+    """Return the top unprocessed stories from the story store"""
+    if store.count() == 0:
+        import_legacy_story_files(store)
+    return store.query(status='new', max_length=max_length, limit=limit, offset=offset,
+                       include_content=include_content)
 
 def clean_filename(filename):
     """Clean string to make it safe for filenames"""
@@ -53,7 +67,396 @@ def select_from_list(items, prompt):
         except ValueError:
             print("Please enter a valid number.")
 
-def main():
+def get_story_content(story):
+    """Return the story text (different story files use different keys)"""
+    return story.get('content') or story.get('selftext') or story.get('text')
+
+def load_config(path, allowed):
+    """Load batch settings from a JSON config file (keys match the CLI flags)"""
+    with open(path, 'r') as f:
+        config = json.load(f)
+    config = {key.replace('-', '_'): value for key, value in config.items()}
+    unknown = sorted(set(config) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown settings in {path}: {', '.join(unknown)}")
+    return config
+
+def build_batch_jobs(stories, video_paths, policy):
+    """Create one pipeline job per story with its output path"""
+    from scripts.batch_pipeline import select_videos
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    videos = select_videos(video_paths, len(stories), policy)
+    
+    jobs = []
+    for story, video_path in zip(stories, videos):
+        safe_title = clean_filename(story['title'])
+        # The story id keeps duplicate (or equal after cleaning) titles apart
+        jobs.append({
+            'title': story['title'],
+            'text': get_story_content(story),
+            'video_path': video_path,
+            'output_path': f"final_videos/final_{safe_title}_{story['id']}_{timestamp}.mp4",
+        })
+    return jobs
+
+def run_batch_mode(args):
+    """Non-interactive mode: process several stories through the pipeline"""
+    from scripts.batch_pipeline import run_batch
+    
+    setup_directories()
+    
+    story_store = StoryStore()
+    stories = get_available_stories(story_store, limit=args.count, offset=args.offset,
+                                    max_length=args.max_chars, include_content=True)
+    if not stories:
+        print("No unprocessed stories with content available.")
+        return
+    
+    library = VideoLibrary('videos').refresh()
+    video_paths = [background_path(library, name, args) for name in library.names()]
+    if not video_paths:
+        print("No background videos in videos/.")
+        return
+    jobs = build_batch_jobs(stories, video_paths, args.video_policy)
+    
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG}
+    
+    def record(index, result):
+        # Stories are only marked once their job ends, so a crash leaves them 'new'
+        story_store.set_status(stories[index]['id'], 'done' if result['status'] == 'done' else 'failed')
+    
+    results = run_batch(jobs, config, on_result=record)
+    for result in results:
+        status = result.get('output_path') or result.get('error')
+        if isinstance(status, dict):
+            status = ", ".join(status.values())
+        print(f"- [{result['status']}] {result['title']}: {status}")
+
+def submit_jobs(args, queue):
+    """Queue the next unprocessed stories for the render worker"""
+    setup_directories()
+    
+    story_store = StoryStore()
+    stories = get_available_stories(story_store, limit=args.count, offset=args.offset,
+                                    max_length=args.max_chars, include_content=True)
+    if not stories:
+        print("No unprocessed stories with content available.")
+        return
+    
+    library = VideoLibrary('videos').refresh()
+    video_paths = [background_path(library, name, args) for name in library.names()]
+    if not video_paths:
+        print("No background videos in videos/.")
+        return
+    options = {key: getattr(args, key) for key in JOB_OPTIONS if hasattr(args, key)}
+    for story, job in zip(stories, build_batch_jobs(stories, video_paths, args.video_policy)):
+        job_id = queue.submit(job['title'], {
+            'text': job['text'],
+            'video_path': job['video_path'],
+            'output_path': job['output_path'],
+            'options': options,
+        }, story_id=story['id'])
+        story_store.set_status(story['id'], 'processing')
+        print(f"Queued job {job_id}: {job['title']}")
+
+def list_jobs(args, queue):
+    """Print recent jobs with their finished stages"""
+    jobs = queue.list(status=args.status, limit=args.limit)
+    if not jobs:
+        print("No jobs.")
+        return
+    for job in jobs:
+        stages = ",".join(stage for stage in JOB_STAGES if stage in job['checkpoints']) or "-"
+        line = f"{job['id']:>5}  {job['status']:<9}  {stages:<21}  {job['title'][:60]}"
+        if job['cancel_requested'] and job['status'] == 'running':
+            line += "  (cancelling)"
+        if job['error']:
+            line += f"  error: {job['error']}"
+        print(line)
+    counts = queue.counts()
+    print("\n" + ", ".join(f"{status}: {counts[status]}" for status in JOB_STATUSES if status in counts))
+
+def run_jobs_command(args):
+    with JobQueue(args.queue) as queue:
+        if args.jobs_command == 'submit':
+            submit_jobs(args, queue)
+        elif args.jobs_command == 'list':
+            list_jobs(args, queue)
+        elif args.jobs_command == 'cancel':
+            for job_id in args.ids:
+                result = queue.cancel(job_id)
+                if result == 'cancelled':
+                    # Running jobs are reset by their worker once it stops
+                    set_job_story_status(queue, job_id, 'new')
+                print(f"Job {job_id}: {result or 'not queued or running'}")
+        elif args.jobs_command == 'retry':
+            for job_id in args.ids:
+                queued = queue.retry(job_id)
+                if queued:
+                    set_job_story_status(queue, job_id, 'processing')
+                print(f"Job {job_id}: {'queued' if queued else 'not failed or cancelled'}")
+
+def set_job_story_status(queue, job_id, status):
+    """Update the story a job was submitted for, if it has one"""
+    story_id = queue.get(job_id)['story_id']
+    if story_id:
+        with StoryStore() as story_store:
+            story_store.set_status(story_id, status)
+
+def run_worker_mode(args):
+    """Run a render worker until interrupted (SIGTERM finishes the current stage first)"""
+    from scripts.worker import Worker
+    
+    setup_directories()
+    config = {key: getattr(args, key) for key in WORKER_CONFIG if hasattr(args, key)}
+    with JobQueue(args.queue) as queue:
+        worker = Worker(queue, config, story_store=StoryStore())
+        signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+        worker.run(max_jobs=args.max_jobs, exit_when_idle=args.exit_when_idle, poll=args.poll)
+
+def reset_stories(args):
+    """Put stories left in 'processing' by a crashed run back to 'new'"""
+    with JobQueue(args.queue) as queue:
+        active = queue.active_story_ids()
+    with StoryStore() as store:
+        count = store.reset_processing(keep=active)
+    print(f"Reset {count} stories to 'new' ({len(active)} still have a queued or running job)")
+
+def list_stories(args):
+    """Print stories from the story store without loading any pipeline modules"""
+    with StoryStore() as store:
+        stories = store.query(status=args.status, max_length=args.max_chars, limit=args.limit,
+                              offset=args.offset)
+        if not stories:
+            print(f"No {args.status} stories.")
+            return
+        for story in stories:
+            print(f"{story['id']:<12} {story['score']:>6} {story['length']:>7}  {story['title']}")
+        print(f"\n{store.count(status=args.status)} {args.status} stories")
+
+def list_videos(args):
+    """Print the background library (probes only files not yet in the manifest)"""
+    library = VideoLibrary('videos').refresh()
+    names = library.names()
+    if not names:
+        print("No background videos in videos/.")
+        return
+    for name in names:
+        print(library.describe(name))
+
+def parse_size(text):
+    """Parse a WIDTHxHEIGHT string"""
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WIDTHxHEIGHT, got '{text}'")
+    return width, height
+
+def parse_start(text):
+    """Parse a background start offset: seconds, or 'random'"""
+    if text == 'random':
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected seconds or 'random', got '{text}'")
+
+def parse_workers(text):
+    """Parse a worker or concurrency count (at least 1)"""
+    try:
+        count = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a whole number, got '{text}'")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"Must be at least 1, got '{text}'")
+    return count
+
+def parse_speed(text):
+    """Parse a positive speech speed factor"""
+    try:
+        speed = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a speed factor, got '{text}'")
+    if speed <= 0:
+        raise argparse.ArgumentTypeError(f"Speed must be positive, got '{text}'")
+    return speed
+
+def parse_max_pause(text):
+    """Parse a non-negative pause length in seconds"""
+    try:
+        max_pause = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a pause length in seconds, got '{text}'")
+    if max_pause < 0:
+        raise argparse.ArgumentTypeError(f"Pause length must not be negative, got '{text}'")
+    return max_pause
+
+def background_path(library, name, args):
+    """Return the proxy for the requested size if one was prepared, else the original"""
+    if args.proxy_size:
+        return library.render_path(name, *args.proxy_size, fps=args.proxy_fps)
+    return library.path(name)
+
+def prepare_videos(args):
+    """Index the background library and pre-transcode render proxies"""
+    library = VideoLibrary('videos').refresh()
+    for name in library.names():
+        print(library.describe(name))
+        if args.size:
+            library.make_proxy(name, *args.size, fps=args.fps)
+
+def add_pipeline_overrides(parser):
+    """Let a subcommand repeat the top-level pipeline flags after its name"""
+    parser.add_argument('--engine', choices=RENDER_ENGINES, default=argparse.SUPPRESS,
+                        help="Render engine (same as the top-level --engine)")
+    parser.add_argument('--background-start', type=parse_start, default=argparse.SUPPRESS,
+                        help="Background offset (same as the top-level --background-start)")
+    parser.add_argument('--subtitle-mode', choices=SUBTITLE_MODES, default=argparse.SUPPRESS,
+                        help="Subtitle mode (same as the top-level --subtitle-mode)")
+    parser.add_argument('--aligner', choices=ALIGN_BACKENDS, default=argparse.SUPPRESS,
+                        help="Alignment backend (same as the top-level --aligner)")
+    parser.add_argument('--max-pause', type=parse_max_pause, default=argparse.SUPPRESS,
+                        help="Pause limit (same as the top-level --max-pause)")
+    parser.add_argument('--speed', type=parse_speed, default=argparse.SUPPRESS,
+                        help="Speech speed (same as the top-level --speed)")
+    parser.add_argument('--formats', nargs='+', choices=list(OUTPUT_PROFILES), default=argparse.SUPPRESS,
+                        help="Output profiles (same as the top-level --formats)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BrainRot Factory")
+    parser.add_argument('--engine', choices=RENDER_ENGINES, default=DEFAULT_ENGINE,
+                        help="Render engine: moviepy frame loop, a single ffmpeg pass, "
+                             "keyframe-aligned segments rendered in parallel, or incremental "
+                             "(parallel segments cached so re-renders only encode what changed)")
+    parser.add_argument('--proxy-size', type=parse_size,
+                        help="Render from background proxies of this size (see prepare-videos)")
+    parser.add_argument('--proxy-fps', type=float, default=30)
+    parser.add_argument('--background-start', type=parse_start, default=DEFAULT_CONFIG['background_start'],
+                        help="Background offset in seconds (snapped to a keyframe) or 'random'; "
+                             "the background loops when the story is longer")
+    parser.add_argument('--formats', nargs='+', choices=list(OUTPUT_PROFILES), default=DEFAULT_CONFIG['formats'],
+                        help="Render these output profiles from one pass over the background "
+                             "(ffmpeg, replaces --engine); outputs are named final_<title>_<profile>.mp4")
+    parser.add_argument('--subtitle-mode', choices=SUBTITLE_MODES, default=DEFAULT_CONFIG['subtitle_mode'],
+                        help="transcribe with Whisper, stream (transcribe while TTS chunks arrive), "
+                             "or align the known story text to the audio")
+    parser.add_argument('--aligner', choices=ALIGN_BACKENDS, default=DEFAULT_CONFIG['aligner'],
+                        help="Alignment backend for --subtitle-mode align")
+    parser.add_argument('--max-pause', type=parse_max_pause, default=DEFAULT_CONFIG['max_pause'],
+                        help="Shorten silences longer than this many seconds to this length "
+                             "(subtitles are retimed to match)")
+    parser.add_argument('--speed', type=parse_speed, default=DEFAULT_CONFIG['speed'],
+                        help="Speed up the narration by this factor without changing its pitch")
+    parser.add_argument('--preview', action='store_true',
+                        help="Render a small ultrafast review clip instead of the final video")
+    parser.add_argument('--preview-windows', type=int, default=3,
+                        help="Sample this many 5 s windows (start, middle, end) for --preview; 0 = whole story")
+    parser.add_argument('--contact-sheet', action='store_true',
+                        help="Save a grid of subtitle frames as a PNG instead of rendering a video")
+    parser.add_argument('--trace', help="Write stage timing spans to this file")
+    parser.add_argument('--trace-format', choices=tracing.TRACE_FORMATS, default='jsonl',
+                        help="jsonl, or chrome for chrome://tracing / Perfetto")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    batch = subparsers.add_parser('batch', help="Process several stories without prompts")
+    batch.add_argument('--config', help="JSON file with batch settings (CLI flags take precedence)")
+    batch.add_argument('--count', type=int, default=5, help="Number of stories to process")
+    batch.add_argument('--offset', type=int, default=0, help="Skip this many stories first")
+    batch.add_argument('--max-chars', type=int, help="Only pick stories up to this many characters")
+    batch.add_argument('--video-policy', choices=VIDEO_POLICIES, default='round-robin',
+                       help="How to pick a background video for each story")
+    batch.add_argument('--tts-concurrency', type=parse_workers, default=DEFAULT_CONFIG['tts_concurrency'],
+                       help="Concurrent Edge TTS requests")
+    batch.add_argument('--whisper-workers', type=parse_workers, default=DEFAULT_CONFIG['whisper_workers'],
+                       help="Transcription worker processes")
+    batch.add_argument('--whisper-threads', type=int, default=DEFAULT_CONFIG['whisper_threads'],
+                       help="Torch threads per transcription worker (default: cores / workers)")
+    batch.add_argument('--whisper-model', default=DEFAULT_CONFIG['whisper_model'])
+    batch.add_argument('--render-workers', type=parse_workers, default=DEFAULT_CONFIG['render_workers'],
+                       help="Render worker processes")
+    batch.add_argument('--render-threads', type=int, default=DEFAULT_CONFIG['render_threads'],
+                       help="Encoder threads per render worker")
+    add_pipeline_overrides(batch)
+    
+    jobs = subparsers.add_parser('jobs', help="Submit, list and cancel jobs for the render worker")
+    jobs.add_argument('--queue', default=DEFAULT_JOB_DB, help="Job queue database")
+    job_commands = jobs.add_subparsers(dest='jobs_command', required=True)
+    submit = job_commands.add_parser('submit', help="Queue the next unprocessed stories")
+    submit.add_argument('--count', type=int, default=1, help="Number of stories to queue")
+    submit.add_argument('--offset', type=int, default=0, help="Skip this many stories first")
+    submit.add_argument('--max-chars', type=int, help="Only pick stories up to this many characters")
+    submit.add_argument('--video-policy', choices=VIDEO_POLICIES, default='round-robin',
+                        help="How to pick a background video for each story")
+    add_pipeline_overrides(submit)
+    submit.add_argument('--whisper-model', default=argparse.SUPPRESS,
+                        help="Whisper model for this job (default: the worker's)")
+    listing = job_commands.add_parser('list', help="Show recent jobs")
+    listing.add_argument('--status', choices=JOB_STATUSES)
+    listing.add_argument('--limit', type=int, default=20)
+    cancel = job_commands.add_parser('cancel', help="Cancel jobs (running jobs stop after their current stage)")
+    cancel.add_argument('ids', type=int, nargs='+')
+    retry = job_commands.add_parser('retry', help="Queue failed or cancelled jobs again from their last stage")
+    retry.add_argument('ids', type=int, nargs='+')
+    
+    worker = subparsers.add_parser('worker', help="Run a render worker that keeps models loaded between jobs")
+    worker.add_argument('--queue', default=DEFAULT_JOB_DB, help="Job queue database")
+    worker.add_argument('--poll', type=float, default=POLL_SECONDS, help="Seconds between queue checks when idle")
+    worker.add_argument('--max-jobs', type=int, help="Exit after this many jobs")
+    worker.add_argument('--exit-when-idle', action='store_true', help="Exit once the queue is empty")
+    worker.add_argument('--whisper-model', default=DEFAULT_CONFIG['whisper_model'])
+    worker.add_argument('--whisper-threads', type=int, default=DEFAULT_CONFIG['whisper_threads'],
+                        help="Torch threads for transcription")
+    worker.add_argument('--render-threads', type=int, default=DEFAULT_CONFIG['render_threads'],
+                        help="Encoder threads")
+    add_pipeline_overrides(worker)
+    
+    stories = subparsers.add_parser('list-stories', help="List stories in the story store")
+    stories.add_argument('--status', choices=STORY_STATUSES, default='new')
+    stories.add_argument('--limit', type=int, default=20)
+    stories.add_argument('--offset', type=int, default=0)
+    stories.add_argument('--max-chars', type=int, help="Only list stories up to this many characters")
+    
+    reset = subparsers.add_parser('reset-stories',
+                                  help="Put 'processing' stories without a queued or running job back to 'new'")
+    reset.add_argument('--queue', default=DEFAULT_JOB_DB, help="Job queue database")
+    
+    subparsers.add_parser('list-videos', help="List background videos with their metadata")
+    
+    prepare = subparsers.add_parser('prepare-videos', help="Index background videos and build proxies")
+    prepare.add_argument('--size', type=parse_size, help="Proxy size as WIDTHxHEIGHT, e.g. 1080x1920")
+    prepare.add_argument('--fps', type=float, default=30)
+    
+    legacy = subparsers.add_parser('clean-legacy',
+                                   help="List the old audio_<timestamp> and subtitles/subtitles_<timestamp> "
+                                        "directories (outputs now live in the artifact store)")
+    legacy.add_argument('--delete', action='store_true', help="Remove them")
+    
+    args = parser.parse_args(argv)
+    if getattr(args, 'config', None):
+        # Config values become the defaults, explicit flags still win
+        allowed = (set(DEFAULT_CONFIG) | set(vars(batch.parse_args([])))) - {'config'}
+        try:
+            batch.set_defaults(**load_config(args.config, allowed))
+        except ValueError as e:
+            parser.error(str(e))
+        args = parser.parse_args(argv)
+    if args.command == 'batch' and args.subtitle_mode not in BATCH_SUBTITLE_MODES:
+        parser.error(f"batch does not support --subtitle-mode {args.subtitle_mode} "
+                     f"(choose from {', '.join(BATCH_SUBTITLE_MODES)})")
+    if ((args.command == 'worker' or getattr(args, 'jobs_command', None) == 'submit')
+            and args.subtitle_mode not in JOB_SUBTITLE_MODES):
+        parser.error(f"jobs do not support --subtitle-mode {args.subtitle_mode} "
+                     f"(choose from {', '.join(JOB_SUBTITLE_MODES)})")
+    return args
+
+def run_interactive(args):
+    """Interactive mode: pick one story and one background video"""
+    from scripts.cached_stages import (cached_aligned_subtitles, cached_audio, cached_audio_and_subtitles,
+                                      cached_paced_narration, cached_subtitles, needs_whisper, open_store)
+    from scripts.render_engines import get_renderer, get_variant_renderer
+    from utils import whisper_models
+    
     print("BrainRot Factory")
     print("=" * 50)
     
@@ -61,10 +464,12 @@ def main():
     setup_directories()
     
     # 1. Get available stories
-    stories = get_available_stories()
+    story_store = StoryStore()
+    stories = get_available_stories(story_store)
     selected_story = select_from_list(stories, "Available stories")
     if not selected_story:
         return
+    selected_story = story_store.get(selected_story['id'])
     
     # Debug: Print story structure
     print("\nStory structure:")
@@ -72,7 +477,7 @@ def main():
         print(f"- {key}")
     
     # Get story content (try different possible keys)
-    story_content = selected_story.get('content') or selected_story.get('selftext') or selected_story.get('text')
+    story_content = get_story_content(selected_story)
     if not story_content:
         print("\nError: Could not find story content. Available keys:", list(selected_story.keys()))
         return
@@ -80,50 +485,125 @@ def main():
     # Clean the story title for use in filenames
     safe_title = clean_filename(selected_story['title'])
     
-    # 2. Create audio if it doesn't exist
-    audio_dir = f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    os.makedirs(audio_dir, exist_ok=True)
-    audio_path = f"{audio_dir}/story_{safe_title}.mp3"
-    
-    if not os.path.exists(audio_path):
-        print("\nGenerating audio...")
-        create_audio_from_text(story_content, audio_path)
+    # 2. Create audio (reused from the artifact cache when the text is unchanged)
+    store = open_store()
+    # Warm the Whisper model during TTS, unless the subtitles are already cached
+    if needs_whisper(store, story_content, args.subtitle_mode, args.aligner):
+        threading.Thread(target=whisper_models.warm, daemon=True).start()
+    if args.subtitle_mode == 'stream':
+        # 2+3. Transcribe each TTS chunk while the rest of the audio is generated
+        with span("stage.audio_subtitles", chars=len(story_content)):
+            audio_path, subtitle_path = cached_audio_and_subtitles(store, story_content,
+                                                                   label=selected_story['title'])
     else:
-        print("\nAudio file already exists.")
+        with span("stage.audio", chars=len(story_content)):
+            audio_path = cached_audio(store, story_content, label=selected_story['title'])
+        
+        # 3. Create subtitles (cached by audio content and Whisper settings)
+        with span("stage.subtitles", mode=args.subtitle_mode):
+            if args.subtitle_mode == 'align':
+                subtitle_path = cached_aligned_subtitles(store, story_content, audio_path, args.aligner,
+                                                         label=selected_story['title'])
+            else:
+                subtitle_path = cached_subtitles(store, audio_path, label=selected_story['title'])
     
-    # 3. Create subtitles
-    subtitle_dir = f"subtitles/subtitles_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    os.makedirs(subtitle_dir, exist_ok=True)
-    subtitle_path = f"{subtitle_dir}/{safe_title}_subs.srt"
+    # Shorten long pauses / speed up speech, retiming the subtitles with the audio
+    if args.max_pause is not None or args.speed != 1.0:
+        with span("stage.pacing", max_pause=args.max_pause, speed=args.speed):
+            audio_path, subtitle_path = cached_paced_narration(store, audio_path, subtitle_path, args.max_pause,
+                                                               args.speed, label=selected_story['title'])
     
-    if not os.path.exists(subtitle_path):
-        print("\nGenerating subtitles...")
-        create_subtitles_from_audio(audio_path, subtitle_path)
-    else:
-        print("\nSubtitles already exist.")
-    
-    # 4. Select background video
-    video_files = [f for f in os.listdir('videos') if f.endswith('.mp4')]
-    selected_video = select_from_list([{'title': f} for f in video_files], "Available background videos")
+    # 4. Select background video (metadata comes from the library manifest)
+    library = VideoLibrary('videos').refresh()
+    video_items = [{'title': library.describe(name), 'name': name} for name in library.names()]
+    selected_video = select_from_list(video_items, "Available background videos")
     if not selected_video:
         return
     
-    video_path = os.path.join('videos', selected_video['title'])
+    video_path = background_path(library, selected_video['name'], args)
     
     # 5. Create final video
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = f"final_videos/final_{safe_title}_{timestamp}.mp4"
     
+    if args.preview or args.contact_sheet:
+        # Quick checks of sync and styling; the story stays unprocessed
+        from scripts.preview import contact_sheet, render_preview
+        # With --formats, preview the first variant's framing and subtitle size
+        profile = args.formats[0] if args.formats else None
+        with span("stage.preview", contact_sheet=args.contact_sheet):
+            if args.contact_sheet:
+                contact_sheet(video_path, audio_path, subtitle_path,
+                              f"final_videos/sheet_{safe_title}_{timestamp}.png",
+                              background_start=args.background_start, profile=profile)
+            if args.preview:
+                render_preview(video_path, audio_path, subtitle_path,
+                               f"final_videos/preview_{safe_title}_{timestamp}.mp4",
+                               windows=args.preview_windows, background_start=args.background_start,
+                               profile=profile)
+        return
+    
     print("\nCreating final video...")
-    create_final_video(
-        video_path=video_path,
-        audio_path=audio_path,
-        srt_path=subtitle_path,
-        output_path=output_path
-    )
+    if args.formats:
+        with span("stage.render", engine="ffmpeg-variants", formats=",".join(args.formats)):
+            outputs = get_variant_renderer()(
+                video_path=video_path,
+                audio_path=audio_path,
+                srt_path=subtitle_path,
+                output_path=output_path,
+                profiles=args.formats,
+                background_start=args.background_start
+            )
+        output_path = ", ".join(outputs.values())
+    else:
+        create_final_video = get_renderer(args.engine)
+        with span("stage.render", engine=args.engine):
+            create_final_video(
+                video_path=video_path,
+                audio_path=audio_path,
+                srt_path=subtitle_path,
+                output_path=output_path,
+                background_start=args.background_start
+            )
+    
+    story_store.set_status(selected_story['id'], 'done')
     
     print("\nProcess completed!")
     print(f"Final video saved to: {output_path}")
 
+def main():
+    args = parse_args()
+    if args.trace:
+        tracing.enable(args.trace, args.trace_format)
+    if args.command == 'batch':
+        run_batch_mode(args)
+        return
+    if args.command == 'list-stories':
+        list_stories(args)
+        return
+    if args.command == 'reset-stories':
+        reset_stories(args)
+        return
+    if args.command == 'list-videos':
+        list_videos(args)
+        return
+    if args.command == 'jobs':
+        run_jobs_command(args)
+        return
+    if args.command == 'worker':
+        run_worker_mode(args)
+        return
+    if args.command == 'prepare-videos':
+        prepare_videos(args)
+        return
+    if args.command == 'clean-legacy':
+        from scripts.cached_stages import remove_legacy_outputs
+        remove_legacy_outputs(delete=args.delete)
+        return
+    from scripts.cached_stages import open_store
+    # Pins the story's cached artifacts until it is rendered, so evictions by workers leave them alone
+    with open_store().lease():
+        run_interactive(args)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
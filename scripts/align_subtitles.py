@@ -0,0 +1,210 @@
+import itertools
+import json
+import os
+
+from scripts.create_audio import chunk_manifest_path
+from utils import whisper_models
+from utils.tracing import span
+from utils.word_timings import clean_word
+
+# numpy, the audio decoder and the SRT writer are imported where they are
+# used, so reading ALIGN_BACKENDS (e.g. for main.py's parser) stays cheap
+ALIGN_BACKENDS = ('whisper', 'proportional')
+DEFAULT_BACKEND = 'whisper'
+
+# Whisper's encoder sees at most 30 seconds at a time
+WINDOW_SECONDS = 30.0
+# Words ending this close to a window's end are aligned again in the next window
+OVERLAP_SECONDS = 3.0
+# Extra text (relative to the speaking-rate estimate) given to a window, so it is never short of words
+TEXT_MARGIN = 1.25
+# Relative weight of the pause after sentence and clause punctuation
+PAUSE_WEIGHTS = {'.': 6, '!': 6, '?': 6, '…': 6, ',': 3, ';': 3, ':': 3}
+
+
+def load_chunks(text, audio_path):
+    """Return [(chunk_text, start, end)] from the TTS manifest, or one span for the whole file"""
+    manifest_path = chunk_manifest_path(audio_path)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return [(c['text'], c['start'], c['end']) for c in manifest['chunks']]
+    from utils.audio import audio_duration
+    return [(" ".join(text.split()), 0.0, audio_duration(audio_path))]
+
+
+def _word_weight(raw):
+    stripped = raw.rstrip('"\')]')
+    return len(raw) + PAUSE_WEIGHTS.get(stripped[-1:], 0)
+
+
+class ProportionalAligner:
+    """Spread each chunk's words over its span in proportion to their length
+
+    Needs no model and is exact at chunk boundaries, so it is a reasonable
+    fallback when the TTS manifest has many short chunks.
+    """
+
+    def align_span(self, raw_words, start, end, samples=None):
+        import numpy as np
+
+        weights = np.array([_word_weight(w) for w in raw_words], dtype=np.float64)
+        edges = start + (end - start) * np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum()
+        return [(raw, float(a), float(b)) for raw, a, b in zip(raw_words, edges[:-1], edges[1:])]
+
+    def align(self, chunks, samples=None):
+        words = []
+        for text, start, end in chunks:
+            raw_words = text.split()
+            if raw_words:
+                words.extend(self.align_span(raw_words, start, end))
+        return words
+
+
+class WhisperAligner:
+    """Force-align known text with Whisper's cross-attention DTW
+
+    Runs the encoder once per window plus a single decoder pass over the
+    known tokens, instead of decoding token by token. Long chunks are walked
+    in 30 second windows: each window gets somewhat more text than it should
+    contain, words ending near the window edge are discarded, and the next
+    window starts at the last confidently placed word.
+    """
+
+    needs_audio = True
+
+    def __init__(self, model_name=whisper_models.DEFAULT_MODEL):
+        self.model_name = model_name
+        self.fallback = ProportionalAligner()
+
+    def _setup(self):
+        from whisper.tokenizer import get_tokenizer
+        key = whisper_models.model_key(self.model_name)
+        self.model = whisper_models.get_model(*key)
+        self.fp16 = whisper_models.default_dtype(key[1]) == 'float16'
+        self.tokenizer = get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages,
+                                       language='en', task='transcribe')
+
+    def _align_window(self, raw_words, audio):
+        """Return [(raw_word, start, end)] relative to the window, or None if alignment failed"""
+        import torch
+        from whisper.audio import N_FRAMES, N_SAMPLES, log_mel_spectrogram, pad_or_trim
+        from whisper.timing import find_alignment
+
+        text = " " + " ".join(raw_words)
+        text_tokens = self.tokenizer.encode(text)
+        mel = log_mel_spectrogram(audio, self.model.dims.n_mels, padding=N_SAMPLES)
+        num_frames = min(N_FRAMES, len(audio) * N_FRAMES // N_SAMPLES)
+        mel = pad_or_trim(mel[:, :N_FRAMES], N_FRAMES).to(self.model.device)
+        mel = mel.half() if self.fp16 else mel.float()
+        with torch.no_grad():
+            timings = find_alignment(self.model, self.tokenizer, text_tokens, mel, num_frames)
+        if "".join(t.word for t in timings) != text:
+            return None
+
+        # Map token-level words back to the source words by character offset,
+        # so hyphens and apostrophes split by the tokenizer stay one word
+        units, offset = [], 0
+        for unit in timings:
+            units.append((offset, offset + len(unit.word), unit))
+            offset += len(unit.word)
+        result, j, offset = [], 0, 0
+        for raw in raw_words:
+            first, last = offset + 1, offset + 1 + len(raw)
+            offset = last
+            while j < len(units) and units[j][1] <= first:
+                j += 1
+            overlapping = []
+            k = j
+            while k < len(units) and units[k][0] < last:
+                overlapping.append(units[k][2])
+                k += 1
+            if overlapping:
+                start, end = overlapping[0].start, overlapping[-1].end
+            else:
+                start = end = result[-1][2] if result else 0.0
+            result.append((raw, float(start), float(end)))
+        return result
+
+    def align_span(self, raw_words, start, end, samples):
+        from utils.audio import WHISPER_SAMPLE_RATE
+
+        words = []
+        position, i = start, 0
+        while i < len(raw_words):
+            remaining = end - position
+            final = remaining <= WINDOW_SECONDS
+            window_end = end if final else position + WINDOW_SECONDS
+            if final:
+                count = len(raw_words) - i
+            else:
+                # Estimate how many words fit, from the characters left and the time left
+                budget = sum(len(w) + 1 for w in raw_words[i:]) * WINDOW_SECONDS / remaining * TEXT_MARGIN
+                count, used = 0, 0
+                while i + count < len(raw_words) and used < budget:
+                    used += len(raw_words[i + count]) + 1
+                    count += 1
+            window_words = raw_words[i:i + count]
+            audio = samples[int(position * WHISPER_SAMPLE_RATE):int(window_end * WHISPER_SAMPLE_RATE)]
+            with span("align.window", start=round(position, 3), words=len(window_words)):
+                aligned = self._align_window(window_words, audio)
+            if aligned is None:
+                print(f"Alignment failed at {position:.1f}s, spreading words evenly instead")
+                words.extend(self.fallback.align_span(raw_words[i:], position, end))
+                break
+            aligned = [(w, a + position, b + position) for w, a, b in aligned]
+            if final:
+                words.extend(aligned)
+                break
+            cut = window_end - OVERLAP_SECONDS
+            committed = list(itertools.takewhile(lambda w: w[2] <= cut, aligned[:-1])) or aligned[:1]
+            words.extend(committed)
+            i += len(committed)
+            position = max(position, committed[-1][2])
+        return words
+
+    def align(self, chunks, samples):
+        self._setup()
+        words = []
+        for text, start, end in chunks:
+            raw_words = text.split()
+            if raw_words:
+                words.extend(self.align_span(raw_words, start, end, samples))
+        return words
+
+
+def get_aligner(backend=DEFAULT_BACKEND, model_name=whisper_models.DEFAULT_MODEL):
+    if backend == 'whisper':
+        return WhisperAligner(model_name)
+    if backend == 'proportional':
+        return ProportionalAligner()
+    raise ValueError(f"Unknown alignment backend: {backend}")
+
+
+def align_words(text, audio_path, backend=DEFAULT_BACKEND, model_name=whisper_models.DEFAULT_MODEL):
+    """Return (word, start, end) for the known story text, with the words exactly as written"""
+    chunks = load_chunks(text, audio_path)
+    from utils.audio import load_pcm
+
+    aligner = get_aligner(backend, model_name)
+    samples = load_pcm(audio_path) if getattr(aligner, 'needs_audio', False) else None
+    with span("align.words", backend=backend, chunks=len(chunks)):
+        aligned = aligner.align(chunks, samples)
+    words = []
+    for raw, start, end in aligned:
+        word = clean_word(raw)
+        if word:
+            words.append((word, start, end))
+    return words
+
+
+def create_subtitles_from_text(text, audio_path, output_path, backend=DEFAULT_BACKEND,
+                               model_name=whisper_models.DEFAULT_MODEL):
+    """Create SRT subtitles by aligning the known story text to its narration"""
+    from scripts.create_subtitles import write_word_subtitles
+
+    print(f"Aligning story text to: {audio_path}")
+    words = align_words(text, audio_path, backend, model_name)
+    write_word_subtitles(words, output_path)
+    print(f"Aligned {len(words)} words ({backend})")
+    return output_path
@@ -0,0 +1,186 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.cached_stages import (cached_aligned_subtitles, cached_audio_async, cached_paced_narration,
+                                   cached_subtitles, needs_whisper, open_store)
+from scripts.render_engines import DEFAULT_ENGINE, get_renderer, get_variant_renderer
+from utils import whisper_models
+from utils.tracing import span
+
+VIDEO_POLICIES = ('round-robin', 'random', 'first')
+SUBTITLE_MODES = ('transcribe', 'stream', 'align')
+# 'stream' only applies to single stories; batches transcribe in their own worker pool
+BATCH_SUBTITLE_MODES = ('transcribe', 'align')
+
+DEFAULT_CONFIG = {
+    'tts_concurrency': 4,
+    'whisper_workers': 1,
+    'whisper_threads': None,
+    'whisper_model': whisper_models.DEFAULT_MODEL,
+    'render_workers': max(1, (os.cpu_count() or 4) // 4),
+    'render_threads': 4,
+    'engine': DEFAULT_ENGINE,
+    'subtitle_mode': 'transcribe',
+    'aligner': 'whisper',
+    'background_start': 'random',
+    'formats': None,
+    'max_pause': None,
+    'speed': 1.0,
+}
+
+
+def select_videos(video_paths, count, policy='round-robin', seed=None):
+    """Pick one background video per story according to the selection policy"""
+    if not video_paths:
+        raise ValueError("No background videos available")
+    video_paths = sorted(video_paths)
+    if policy == 'first':
+        return [video_paths[0]] * count
+    if policy == 'random':
+        rng = random.Random(seed)
+        return [rng.choice(video_paths) for _ in range(count)]
+    if policy == 'round-robin':
+        return [video_paths[i % len(video_paths)] for i in range(count)]
+    raise ValueError(f"Unknown video policy: {policy}")
+
+
+def _init_whisper_worker(model_name, threads):
+    """Pin torch threads and warm the model once per transcription worker"""
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    whisper_models.warm(model_name)
+
+
+def _transcribe_job(store_root, audio_path, model_name, label, text=None, aligner=None, lease=None):
+    # The artifact index is file-locked, so workers can share the store (and the job's lease)
+    store = open_store(store_root)
+    with store.lease(lease):
+        if aligner:
+            return cached_aligned_subtitles(store, text, audio_path, aligner, model_name, label=label)
+        return cached_subtitles(store, audio_path, model_name, label=label)
+
+
+def _render_job(engine, video_path, audio_path, subtitle_path, output_path, threads, background_start='random',
+                formats=None):
+    if formats:
+        # One decode of the background feeds every output profile
+        return get_variant_renderer()(
+            video_path=video_path,
+            audio_path=audio_path,
+            srt_path=subtitle_path,
+            output_path=output_path,
+            profiles=formats,
+            threads=threads,
+            background_start=background_start,
+        )
+    render = get_renderer(engine)
+    render(
+        video_path=video_path,
+        audio_path=audio_path,
+        srt_path=subtitle_path,
+        output_path=output_path,
+        threads=threads,
+        background_start=background_start,
+    )
+    return output_path
+
+
+async def _run_job(job, config, store, tts_semaphore, whisper_pool, render_pool):
+    loop = asyncio.get_running_loop()
+    title = job['title']
+    started = time.perf_counter()
+    try:
+        # Pins this story's artifacts so other jobs' evictions leave them alone until it is rendered
+        with store.lease() as lease:
+            print(f"[tts] {title}")
+            with span("stage.audio", story=title):
+                audio_path = await cached_audio_async(store, job['text'], label=title, semaphore=tts_semaphore)
+
+            print(f"[whisper] {title}")
+            aligner = config['aligner'] if config['subtitle_mode'] == 'align' else None
+            with span("stage.subtitles", story=title, mode=config['subtitle_mode']):
+                subtitle_path = await loop.run_in_executor(
+                    whisper_pool, _transcribe_job,
+                    store.root, audio_path, config['whisper_model'], title, job['text'], aligner, lease)
+
+            if config['max_pause'] is not None or config['speed'] != 1.0:
+                print(f"[pacing] {title}")
+                with span("stage.pacing", story=title):
+                    # run_in_executor does not carry context variables (the lease) into the thread
+                    audio_path, subtitle_path = await loop.run_in_executor(
+                        None, contextvars.copy_context().run, cached_paced_narration, store, audio_path,
+                        subtitle_path, config['max_pause'], config['speed'], title)
+
+            print(f"[render] {title}")
+            with span("stage.render", story=title, engine=config['engine']):
+                output_path = await loop.run_in_executor(
+                    render_pool, _render_job, config['engine'],
+                    job['video_path'], audio_path, subtitle_path,
+                    job['output_path'], config['render_threads'], config['background_start'], config['formats'])
+    except Exception as e:
+        print(f"Error processing '{title}': {e}")
+        return {'title': title, 'status': 'failed', 'error': str(e),
+                'seconds': time.perf_counter() - started}
+
+    print(f"[done] {title} -> {output_path}")
+    return {'title': title, 'status': 'done', 'output_path': output_path,
+            'seconds': time.perf_counter() - started}
+
+
+async def _run_batch(jobs, config, on_result=None):
+    # Spawned workers avoid forking a process that may already hold torch/ffmpeg state
+    context = multiprocessing.get_context('spawn')
+    store = open_store(config.get('store_root'))
+    tts_semaphore = asyncio.Semaphore(config['tts_concurrency'])
+    warm = any(needs_whisper(store, job['text'], config['subtitle_mode'], config['aligner'],
+                             model_name=config['whisper_model']) for job in jobs)
+    with ProcessPoolExecutor(
+            max_workers=config['whisper_workers'],
+            mp_context=context,
+            # Only load Whisper up front when some story's subtitles are not cached yet
+            initializer=_init_whisper_worker if warm else None,
+            initargs=(config['whisper_model'], config['whisper_threads']) if warm else ()) as whisper_pool, \
+         ProcessPoolExecutor(max_workers=config['render_workers'], mp_context=context) as render_pool:
+        async def run(index, job):
+            result = await _run_job(job, config, store, tts_semaphore, whisper_pool, render_pool)
+            if on_result:
+                on_result(index, result)
+            return result
+
+        return await asyncio.gather(*[run(index, job) for index, job in enumerate(jobs)])
+
+
+def run_batch(jobs, config=None, on_result=None):
+    """Run TTS, transcription and rendering for many stories as an overlapping pipeline
+
+    Each job is a dict with title, text, video_path and output_path. Audio
+    and subtitles come from the artifact store and are only generated on a
+    miss. TTS requests run concurrently on asyncio (bounded by
+    tts_concurrency), transcription and rendering each run in their own
+    bounded process pool, so different stories occupy different stages at
+    the same time. on_result(index, result) is called as each job finishes.
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    for key in ('tts_concurrency', 'whisper_workers', 'render_workers'):
+        if config[key] < 1:
+            raise ValueError(f"{key} must be at least 1, got {config[key]}")
+    if config['subtitle_mode'] not in BATCH_SUBTITLE_MODES:
+        raise ValueError(f"Batch subtitle_mode must be one of {', '.join(BATCH_SUBTITLE_MODES)}, "
+                         f"got {config['subtitle_mode']!r}")
+    if not config['whisper_threads']:
+        config['whisper_threads'] = max(1, (os.cpu_count() or 1) // config['whisper_workers'])
+
+    print(f"Running batch of {len(jobs)} stories "
+          f"(tts={config['tts_concurrency']}, whisper={config['whisper_workers']}, "
+          f"render={config['render_workers']})")
+    started = time.perf_counter()
+    results = asyncio.run(_run_batch(jobs, config, on_result))
+    done = sum(1 for r in results if r['status'] == 'done')
+    print(f"\nBatch finished: {done}/{len(results)} stories in {time.perf_counter() - started:.1f}s")
+    return results
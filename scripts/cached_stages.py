@@ -0,0 +1,233 @@
+import os
+import re
+import shutil
+import tempfile
+
+from scripts.create_audio import DEFAULT_VOICE, create_audio_from_text, generate_speech
+from utils import whisper_models
+from utils.artifact_store import ArtifactStore, artifact_key, file_hash
+
+AUDIO_NAME = "audio.mp3"
+SUBTITLE_NAME = "subtitles.srt"
+PACED_AUDIO_NAME = "audio.wav"
+
+# Options passed to Whisper; part of the subtitle cache key
+SUBTITLE_OPTIONS = {"word_timestamps": True, "language": "en"}
+
+
+def legacy_output_dirs(root="."):
+    """Per-run audio_<timestamp> and subtitles/subtitles_<timestamp> directories from before the store"""
+    pattern = re.compile(r"\d{8}_\d{6}$")
+    dirs = []
+    for parent, prefix in ((root, "audio_"), (os.path.join(root, "subtitles"), "subtitles_")):
+        if os.path.isdir(parent):
+            dirs += sorted(os.path.join(parent, name) for name in os.listdir(parent)
+                           if name.startswith(prefix) and pattern.match(name[len(prefix):])
+                           and os.path.isdir(os.path.join(parent, name)))
+    return dirs
+
+
+def remove_legacy_outputs(root=".", delete=False):
+    """List (and with delete=True remove) the old per-run output directories
+
+    Their files cannot be moved into the store: audio is keyed by the story
+    text and voice, which the old directories do not record, so the next
+    run of a story regenerates it once under its key.
+    """
+    dirs = legacy_output_dirs(root)
+    total = 0
+    for path in dirs:
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+        total += size
+        print(f"{'Removing' if delete else 'Would remove'} {path} ({size / 1024 ** 2:.1f} MB)")
+        if delete:
+            shutil.rmtree(path)
+    print(f"{len(dirs)} legacy directories, {total / 1024 ** 2:.1f} MB"
+          + ("" if delete or not dirs else " (pass --delete to remove them)"))
+    return dirs
+
+
+def audio_key(text, voice=DEFAULT_VOICE):
+    return artifact_key("audio", text=text, voice=voice)
+
+
+def subtitles_key(audio_path, model_name=whisper_models.DEFAULT_MODEL, streaming=False):
+    options = dict(SUBTITLE_OPTIONS, streaming=True) if streaming else SUBTITLE_OPTIONS
+    return artifact_key("subtitles", audio=file_hash(audio_path), model=model_name, options=options)
+
+
+def cached_audio(store, text, voice=DEFAULT_VOICE, label=None):
+    """Return the path of the narration for text, generating it only on a cache miss"""
+    key = audio_key(text, voice)
+    path = store.lookup(key)
+    if path:
+        print("\nAudio already cached.")
+    else:
+        print("\nGenerating audio...")
+        with store.create(key, "audio", label=label) as tmp_dir:
+            create_audio_from_text(text, os.path.join(tmp_dir, AUDIO_NAME), voice=voice)
+        path = store.path(key)
+    return os.path.join(path, AUDIO_NAME)
+
+
+async def cached_audio_async(store, text, voice=DEFAULT_VOICE, label=None, semaphore=None):
+    """Async variant of cached_audio for callers already running an event loop"""
+    key = audio_key(text, voice)
+    path = store.lookup(key)
+    if not path:
+        with store.create(key, "audio", label=label) as tmp_dir:
+            if semaphore:
+                async with semaphore:
+                    await generate_speech(text, os.path.join(tmp_dir, AUDIO_NAME), voice=voice)
+            else:
+                await generate_speech(text, os.path.join(tmp_dir, AUDIO_NAME), voice=voice)
+        path = store.path(key)
+    return os.path.join(path, AUDIO_NAME)
+
+
+def cached_subtitles(store, audio_path, model_name=whisper_models.DEFAULT_MODEL, label=None):
+    """Return the SRT path for audio_path, transcribing only on a cache miss"""
+    from scripts.create_subtitles import create_subtitles_from_audio
+
+    key = subtitles_key(audio_path, model_name)
+    path = store.lookup(key)
+    if path:
+        print("\nSubtitles already cached.")
+    else:
+        print("\nGenerating subtitles...")
+        with store.create(key, "subtitles", label=label) as tmp_dir:
+            create_subtitles_from_audio(audio_path, os.path.join(tmp_dir, SUBTITLE_NAME), model_name=model_name)
+        path = store.path(key)
+    return os.path.join(path, SUBTITLE_NAME)
+
+
+def aligned_subtitles_key(audio_path, backend, model_name=whisper_models.DEFAULT_MODEL):
+    # The audio key already covers the story text, so the audio hash is enough here
+    return artifact_key("subtitles", audio=file_hash(audio_path), aligner=backend,
+                        model=model_name if backend == "whisper" else None)
+
+
+def cached_aligned_subtitles(store, text, audio_path, backend="whisper",
+                             model_name=whisper_models.DEFAULT_MODEL, label=None):
+    """Return the SRT path for audio_path, aligning the known text only on a cache miss"""
+    from scripts.align_subtitles import create_subtitles_from_text
+
+    key = aligned_subtitles_key(audio_path, backend, model_name)
+    path = store.lookup(key)
+    if path:
+        print("\nSubtitles already cached.")
+    else:
+        print("\nAligning subtitles...")
+        with store.create(key, "subtitles", label=label) as tmp_dir:
+            create_subtitles_from_text(text, audio_path, os.path.join(tmp_dir, SUBTITLE_NAME),
+                                       backend=backend, model_name=model_name)
+        path = store.path(key)
+    return os.path.join(path, SUBTITLE_NAME)
+
+
+def paced_key(audio_path, subtitle_path, max_pause=None, speed=1.0):
+    from scripts.pace_audio import PACED_VERSION
+    from utils.pacing import SILENCE_DB
+    from utils.word_timings import word_sidecar_path
+
+    sidecar_path = word_sidecar_path(subtitle_path)
+    return artifact_key("paced", audio=file_hash(audio_path), subtitles=file_hash(subtitle_path),
+                        words=file_hash(sidecar_path) if os.path.exists(sidecar_path) else None,
+                        max_pause=max_pause, speed=speed, silence_db=SILENCE_DB, version=PACED_VERSION)
+
+
+def cached_paced_narration(store, audio_path, subtitle_path, max_pause=None, speed=1.0, label=None):
+    """Return (audio_path, srt_path) with long pauses shortened and speech sped up
+
+    Returns the inputs unchanged when neither option is set, and paces
+    only on a cache miss.
+    """
+    from scripts.pace_audio import pace_narration
+
+    if max_pause is None and speed == 1.0:
+        return audio_path, subtitle_path
+    key = paced_key(audio_path, subtitle_path, max_pause, speed)
+    path = store.lookup(key)
+    if path:
+        print("\nPaced narration already cached.")
+    else:
+        print("\nPacing narration...")
+        with store.create(key, "paced", label=label) as tmp_dir:
+            pace_narration(audio_path, subtitle_path, os.path.join(tmp_dir, PACED_AUDIO_NAME),
+                           os.path.join(tmp_dir, SUBTITLE_NAME), max_pause=max_pause, speed=speed)
+        path = store.path(key)
+    return os.path.join(path, PACED_AUDIO_NAME), os.path.join(path, SUBTITLE_NAME)
+
+
+def needs_whisper(store, text, subtitle_mode="transcribe", aligner="whisper", voice=DEFAULT_VOICE,
+                  model_name=whisper_models.DEFAULT_MODEL):
+    """Whether making subtitles for text will load Whisper, i.e. they are not cached yet"""
+    if subtitle_mode == "align" and aligner != "whisper":
+        return False
+    path = store.lookup(audio_key(text, voice))
+    if not path:
+        return True
+    audio_path = os.path.join(path, AUDIO_NAME)
+    if subtitle_mode == "align":
+        keys = [aligned_subtitles_key(audio_path, aligner, model_name)]
+    elif subtitle_mode == "stream":
+        keys = [subtitles_key(audio_path, model_name, streaming=True), subtitles_key(audio_path, model_name)]
+    else:
+        keys = [subtitles_key(audio_path, model_name)]
+    return not any(store.lookup(key) for key in keys)
+
+
+def cached_audio_and_subtitles(store, text, voice=DEFAULT_VOICE, model_name=whisper_models.DEFAULT_MODEL,
+                               label=None):
+    """Return (audio_path, srt_path), transcribing while the audio is generated
+
+    On an audio cache miss every TTS chunk is handed to a StreamingTranscriber
+    as soon as it is written, so Whisper finishes shortly after the last chunk
+    instead of starting only when the whole MP3 exists.
+    """
+    from scripts.create_subtitles import segments_from_words, write_srt
+    from scripts.streaming_subtitles import StreamingTranscriber
+    from utils.word_timings import word_sidecar_path
+
+    key = audio_key(text, voice)
+    path = store.lookup(key)
+    if path:
+        # Nothing to overlap with; use whichever subtitles are already cached
+        audio_path = os.path.join(path, AUDIO_NAME)
+        streamed = store.lookup(subtitles_key(audio_path, model_name, streaming=True))
+        if streamed:
+            print("\nAudio and subtitles already cached.")
+            return audio_path, os.path.join(streamed, SUBTITLE_NAME)
+        return audio_path, cached_subtitles(store, audio_path, model_name, label)
+
+    print("\nGenerating audio and streaming subtitles...")
+    # The subtitle key needs the finished MP3, so the sidecar fills up in a
+    # staging directory and moves into the artifact once it is published
+    staging_dir = tempfile.mkdtemp(prefix="streaming.", dir=os.path.join(store.root, "tmp"))
+    sidecar_path = word_sidecar_path(os.path.join(staging_dir, SUBTITLE_NAME))
+    try:
+        transcriber = StreamingTranscriber(model_name, words_path=sidecar_path)
+        try:
+            with store.create(key, "audio", label=label) as tmp_dir:
+                create_audio_from_text(text, os.path.join(tmp_dir, AUDIO_NAME), voice=voice,
+                                       on_chunk=transcriber.on_chunk)
+        except Exception:
+            transcriber.close()
+            raise
+        audio_path = os.path.join(store.path(key), AUDIO_NAME)
+        words = transcriber.finish()
+
+        subtitle_key = subtitles_key(audio_path, model_name, streaming=True)
+        with store.create(subtitle_key, "subtitles", label=label) as tmp_dir:
+            srt_path = os.path.join(tmp_dir, SUBTITLE_NAME)
+            write_srt(segments_from_words(words), srt_path)
+            os.replace(sidecar_path, word_sidecar_path(srt_path))
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return audio_path, os.path.join(store.path(subtitle_key), SUBTITLE_NAME)
+
+
+def open_store(root=None):
+    """Open the artifact store (root defaults to ARTIFACT_CACHE_DIR or cache/artifacts)"""
+    root = root or os.environ.get("ARTIFACT_CACHE_DIR")
+    return ArtifactStore(root) if root else ArtifactStore()
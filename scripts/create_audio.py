@@ -1,19 +1,20 @@
 import json
-from gtts import gTTS
 import os
 from datetime import datetime
 import glob
 import time
+import asyncio
+import random
+import re
+import urllib.request
 from pathlib import Path
-try:
-    import edge_tts
-except ImportError:
-    print("Error: edge-tts package not found. Installing...")
-    os.system('pip install edge-tts')
-    import edge_tts
+from utils.mp3 import mp3_duration, strip_info_frame
+from utils.tracing import span
 
 def text_to_speech(text, filename):
     """Convert text to speech and save as MP3"""
+    from gtts import gTTS
+
     try:
         tts = gTTS(text=text, lang='en')
         tts.save(filename)
@@ -91,17 +92,172 @@ def process_stories_to_audio(json_file):
             audio_filename = "".join(c for c in audio_filename if c.isalnum() or c in (' ', '-', '_', '.', '/'))
             text_to_speech(audio_text, audio_filename)
 
-async def generate_speech(text, output_path):
-    """Generate speech from text using Edge TTS"""
+DEFAULT_VOICE = "en-US-ChristopherNeural"
+MAX_CHUNK_CHARS = 1200
+TTS_CONCURRENCY = 4
+TTS_RETRIES = 3
+TTS_BACKOFF = 1.0
+
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_RE = re.compile(r'(?:(?<=[.!?\u2026])|(?<=[.!?\u2026]["\')\]]))\s+')
+
+class EdgeTTSBackend:
+    """Synthesize speech with the Edge TTS service"""
+
+    async def synthesize(self, text, voice):
+        try:
+            import edge_tts
+        except ImportError:
+            raise ImportError("edge-tts is required for Edge TTS narration: pip install edge-tts")
+        communicate = edge_tts.Communicate(text=text, voice=voice)
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        return bytes(audio)
+
+class HttpTTSBackend:
+    """Synthesize speech with a plain HTTP endpoint (POST {text, voice} -> MP3 bytes)
+
+    Used to run the chunked pipeline against a local fake TTS server.
+    """
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, text, voice):
+        body = json.dumps({"text": text, "voice": voice}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    async def synthesize(self, text, voice):
+        return await asyncio.to_thread(self._post, text, voice)
+
+def _split_long_sentence(sentence, max_chars):
+    pieces, current = [], ""
+    for word in sentence.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_text_into_chunks(text, max_chars=MAX_CHUNK_CHARS):
+    """Split text at paragraph/sentence boundaries into chunks of at most max_chars"""
+    chunks, current = [], ""
+    for paragraph in _PARAGRAPH_RE.split(text):
+        for sentence in _SENTENCE_RE.split(paragraph):
+            sentence = " ".join(sentence.split())
+            if not sentence:
+                continue
+            for piece in _split_long_sentence(sentence, max_chars) if len(sentence) > max_chars else [sentence]:
+                if current and len(current) + 1 + len(piece) > max_chars:
+                    chunks.append(current)
+                    current = piece
+                else:
+                    current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def synthesize_chunk(backend, text, voice, retries=TTS_RETRIES, backoff=TTS_BACKOFF):
+    """Synthesize one chunk, retrying with exponential backoff on failure"""
+    for attempt in range(retries + 1):
+        try:
+            # Per-chunk gapless tags would shift every later chunk, so offsets count whole frames
+            audio = strip_info_frame(await backend.synthesize(text, voice))
+            if not audio:
+                raise Exception("TTS returned no audio")
+            return audio
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            print(f"TTS chunk failed ({e}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+def chunk_manifest_path(output_path):
+    """Return the path of the chunk offset manifest written next to an MP3"""
+    return f"{os.path.splitext(output_path)[0]}.chunks.json"
+
+async def generate_speech(text, output_path, voice=DEFAULT_VOICE, backend=None,
+                          max_chars=MAX_CHUNK_CHARS, concurrency=TTS_CONCURRENCY,
+                          retries=TTS_RETRIES, on_chunk=None):
+    """Generate speech from text using Edge TTS
+
+    The text is split into chunks that are synthesized concurrently. Chunks are
+    appended to the MP3 in order as soon as they (and all earlier ones) are
+    ready, and their exact start/end offsets are written to a .chunks.json
+    manifest. on_chunk(info, audio_bytes) is called for each chunk in order.
+    The finished MP3 is decoded once; its native-rate samples and a 16 kHz
+    copy for Whisper are stored as .npy next to it.
+    """
+    backend = backend or EdgeTTSBackend()
+    chunks = split_text_into_chunks(text, max_chars)
+    if not chunks:
+        raise ValueError("No text to synthesize")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index, chunk_text):
+        async with semaphore:
+            with span("tts.chunk", index=index, chars=len(chunk_text)):
+                return index, await synthesize_chunk(backend, chunk_text, voice, retries)
+
+    tmp_path = f"{output_path}.part"
+    manifest = []
+    pending = {}
+    offset = 0.0
+    tasks = [asyncio.create_task(run(i, chunk)) for i, chunk in enumerate(chunks)]
     try:
-        voice = "en-US-ChristopherNeural"
-        tts = edge_tts.Communicate(text=text, voice=voice)
-        await tts.save(output_path)
+        with open(tmp_path, 'wb') as f:
+            for finished in asyncio.as_completed(tasks):
+                index, audio = await finished
+                pending[index] = audio
+                # Flush every chunk that is now contiguous with what was written
+                while len(manifest) in pending:
+                    i = len(manifest)
+                    audio = pending.pop(i)
+                    duration = mp3_duration(audio)
+                    info = {
+                        "index": i,
+                        "text": chunks[i],
+                        "start": round(offset, 6),
+                        "end": round(offset + duration, 6),
+                        "bytes": len(audio),
+                    }
+                    f.write(audio)
+                    f.flush()
+                    manifest.append(info)
+                    offset += duration
+                    if on_chunk:
+                        on_chunk(info, audio)
+        os.replace(tmp_path, output_path)
     except Exception as e:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled requests unwind before the error propagates
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         print(f"Error generating speech: {str(e)}")
         raise
 
-def create_audio_from_text(text, output_path):
+    with open(chunk_manifest_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump({"voice": voice, "duration": round(offset, 6), "chunks": manifest}, f, indent=2, ensure_ascii=False)
+    
+    # Decode once for every later stage: the renderer reads the native-rate .npy, Whisper its 16 kHz copy
+    from utils.audio import save_pcm
+    with span("tts.decode_pcm", seconds=round(offset, 3)):
+        save_pcm(output_path)
+    print(f"Synthesized {len(chunks)} chunks ({offset:.1f}s of audio)")
+    return manifest
+
+def create_audio_from_text(text, output_path, **tts_options):
     """Create audio file from text using Edge TTS"""
     print(f"Generating audio to: {output_path}")
     
@@ -110,8 +266,7 @@ def create_audio_from_text(text, output_path):
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         # Run the async function
-        import asyncio
-        asyncio.run(generate_speech(text, output_path))
+        asyncio.run(generate_speech(text, output_path, **tts_options))
         
         # Verify the file was created
         if os.path.exists(output_path):
@@ -2,7 +2,10 @@ import json
 import os
 import glob
 from datetime import datetime
-import whisper
+from utils import whisper_models
+from utils.subtitles import CueTrack
+from utils.tracing import span
+from utils.word_timings import save_word_timings, word_sidecar_path, words_from_segments
 
 # Directories
 VIDEO_DIR = "videos"
@@ -57,46 +60,54 @@ def select_json_file():
         except ValueError:
             print("Please enter a number.")
 
-def format_timestamp(seconds):
-    """Convert seconds to SRT timestamp format"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+def write_srt(segments, output_path):
+    """Write segments (dicts with start, end and text) as an SRT file"""
+    return CueTrack.from_segments(segments).write_srt(output_path)
 
-def create_subtitles_from_audio(audio_path, output_path):
+def segments_from_words(words, max_words=10, max_gap=0.8):
+    """Group (word, start, end) tuples into subtitle lines, breaking at pauses"""
+    segments, current = [], []
+    for word in words:
+        if current and (len(current) >= max_words or word[1] - current[-1][2] > max_gap):
+            segments.append(current)
+            current = []
+        current.append(word)
+    if current:
+        segments.append(current)
+    return [{"start": seg[0][1], "end": seg[-1][2], "text": " ".join(w for w, _, _ in seg)}
+            for seg in segments]
+
+def write_word_subtitles(words, output_path):
+    """Write the SRT and word-timing sidecar for (word, start, end) tuples"""
+    write_srt(segments_from_words(words), output_path)
+    save_word_timings(words, word_sidecar_path(output_path))
+    return output_path
+
+def create_subtitles_from_audio(audio_path, output_path, model_name=whisper_models.DEFAULT_MODEL):
     """Create SRT subtitles from audio file using Whisper"""
+    from utils.audio import load_pcm
+    
     print(f"Transcribing audio from: {audio_path}")
     print(f"Saving subtitles to: {output_path}")
     
     try:
-        # Load Whisper model
-        print("Loading Whisper model...")
-        model = whisper.load_model("base")
-        
-        # Transcribe audio
+        # Transcribe audio (the model is loaded once per process)
         print("Transcribing audio...")
-        result = model.transcribe(
-            audio_path,
-            word_timestamps=True,
-            language="en"
-        )
+        with span("whisper.transcribe", model=model_name):
+            result = whisper_models.transcribe(
+                load_pcm(audio_path),
+                name=model_name,
+                word_timestamps=True,
+                language="en"
+            )
         
         # Create subtitle segments
         print("Creating subtitle file...")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(result["segments"], 1):
-                # Write subtitle number
-                f.write(f"{i}\n")
-                
-                # Write timestamps
-                start_time = format_timestamp(segment["start"])
-                end_time = format_timestamp(segment["end"])
-                f.write(f"{start_time} --> {end_time}\n")
-                
-                # Write text
-                f.write(f"{segment['text'].strip()}\n\n")
+        write_srt(result["segments"], output_path)
+        
+        # Keep Whisper's word timestamps so the renderer can use them directly
+        words_path = save_word_timings(words_from_segments(result["segments"]), word_sidecar_path(output_path))
+        print(f"Saved word timings to: {words_path}")
         
         print("Subtitle generation completed!")
         return output_path
@@ -1,19 +1,18 @@
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.audio.io.AudioFileClip import AudioFileClip
-from moviepy.video.VideoClip import TextClip
-from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
-from moviepy.video.compositing.concatenate import concatenate_videoclips
-from moviepy.video.tools.subtitles import SubtitlesClip
 import os
 import glob
 from datetime import datetime
-import re
-import whisper
-import torch
+from utils import whisper_models
+from utils.audio import load_pcm, narration_audio_clip
+from utils.background import BackgroundSource
+from utils.tracing import span
+from utils.glyph_cache import get_glyph_cache
+from utils.subtitle_overlay import SubtitleOverlay
+from utils.video_library import VideoLibrary
+from utils.subtitles import CueTrack, WordTrack, estimate_word_track
+from utils.word_timings import clean_word, load_word_columns, word_sidecar_path
 
 # Directories
 VIDEO_DIR = "videos"
-SUBTITLE_DIR = "subtitles"
 OUTPUT_DIR = "final_videos"
 
 def setup_directories():
@@ -22,9 +21,9 @@ def setup_directories():
         os.makedirs(directory, exist_ok=True)
         print(f"Created/verified directory: {directory}")
 
-def select_file(file_pattern, prompt):
-    """Generic file selector"""
-    files = glob.glob(file_pattern)
+def select_file(file_pattern, prompt, labels=None):
+    """Generic file selector (takes a glob pattern or a list of paths, optionally with display labels)"""
+    files = glob.glob(file_pattern) if isinstance(file_pattern, str) else list(file_pattern)
     
     if not files:
         print(f"\nNo files found matching pattern: {file_pattern}")
@@ -32,7 +31,7 @@ def select_file(file_pattern, prompt):
     
     print(f"\n{prompt}:")
     for i, file in enumerate(files, 1):
-        print(f"{i}. {os.path.basename(file)}")
+        print(f"{i}. {labels[i - 1] if labels else os.path.basename(file)}")
     
     while True:
         try:
@@ -45,177 +44,104 @@ def select_file(file_pattern, prompt):
 
 def split_into_words(text):
     """Split text into words and clean up"""
-    # Remove extra spaces and split
-    words = text.strip().split()
-    # Clean each word
-    return [re.sub(r'[^\w\'-]', '', word) for word in words if re.sub(r'[^\w\'-]', '', word)]
-
-def create_word_timing(start_time, end_time, words):
-    """Create snappy word timings"""
-    if not words:
-        return []
-    
-    # Make it snappier by reducing gaps between words
-    total_duration = end_time - start_time
-    word_duration = min(0.4, total_duration / len(words))  # Max 0.4s per word
-    gap_duration = min(0.1, word_duration * 0.2)  # Small gap between words
-    
-    timings = []
-    current_time = start_time
-    
-    for word in words:
-        # Adjust duration based on word length
-        duration = min(word_duration * (len(word) / 5), word_duration)
-        timings.append((current_time, current_time + duration))
-        current_time += duration + gap_duration
-    
-    return timings
+    return [word for word in (clean_word(w) for w in text.split()) if word]
 
 def parse_srt(srt_path):
-    """Parse SRT file and return list of subtitle entries"""
-    subtitles = []
-    current_sub = None
-    
-    with open(srt_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        if not line:
-            i += 1
-            continue
-            
-        if line.isdigit():
-            if current_sub:
-                subtitles.append(current_sub)
-            current_sub = {'number': int(line)}
-            i += 1
-            continue
-            
-        if '-->' in line:
-            start, end = line.split(' --> ')
-            current_sub['start'] = convert_timestamp_to_seconds(start)
-            current_sub['end'] = convert_timestamp_to_seconds(end)
-            i += 1
-            continue
-            
-        if current_sub and 'text' not in current_sub:
-            current_sub['text'] = line
-        i += 1
-    
-    if current_sub:
-        subtitles.append(current_sub)
-    
-    return subtitles
-
-def convert_timestamp_to_seconds(timestamp):
-    """Convert SRT timestamp to seconds"""
-    hours, minutes, seconds = timestamp.replace(',', '.').split(':')
-    return float(hours) * 3600 + float(minutes) * 60 + float(seconds)
+    """Parse an SRT (or VTT) file into a CueTrack, keeping multi-line cue text"""
+    return CueTrack.read(srt_path)
 
 def transcribe_audio(audio_path):
     """Transcribe audio file using Whisper and get word-level timings"""
     print("\nTranscribing audio for precise word timings...")
-    model = whisper.load_model("base")
-    result = model.transcribe(
-        audio_path,
+    result = whisper_models.transcribe(
+        load_pcm(audio_path),
         word_timestamps=True,
         language="en"
     )
     return result["segments"]
 
-def create_final_video(video_path, audio_path, srt_path, output_path, test_duration=None):
-    """Combine video, audio, and subtitles into final video"""
+def words_from_srt(srt_path):
+    """Estimate word timings from SRT cues (used when no word sidecar exists)"""
+    return estimate_word_track(parse_srt(srt_path))
+
+def load_words(srt_path):
+    """Load word timings from the sidecar next to the SRT, or estimate them"""
+    sidecar_path = word_sidecar_path(srt_path)
+    if os.path.exists(sidecar_path):
+        print(f"Using word timings from: {sidecar_path}")
+        return WordTrack.from_words(*load_word_columns(sidecar_path))
+    print("No word timing sidecar found, estimating word timings from SRT cues")
+    return words_from_srt(srt_path)
+
+def create_final_video(video_path, audio_path, srt_path, output_path, test_duration=None,
+                       glyph_cache_dir=None, threads=4, background_start='random'):
+    """Combine video, audio, and subtitles into final video
+
+    The output always runs for the whole narration: the background starts
+    at background_start (seconds, 'random' or None) and loops if it is
+    shorter than the audio.
+    """
     try:
-        print("\nLoading video file...")
-        video = VideoFileClip(video_path)
-        if test_duration:
-            video = video.subclip(0, test_duration)
-            print(f"Video duration (test): {test_duration} seconds")
-        else:
-            print(f"Video duration: {video.duration} seconds")
-
-        print("\nLoading audio file...")
-        audio = AudioFileClip(audio_path)
-        if test_duration:
-            audio = audio.subclip(0, test_duration)
-        print(f"Audio duration: {audio.duration} seconds")
-
-        print("\nLoading subtitles...")
-        subtitles = parse_srt(srt_path)
-        if test_duration:
-            subtitles = [sub for sub in subtitles if sub['start'] < test_duration]
-        print(f"Loaded {len(subtitles)} subtitle entries")
-
-        # Create word-by-word subtitle clips
-        print("\nCreating word-by-word subtitle clips...")
-        subtitle_clips = []
-        
-        for sub in subtitles:
-            words = split_into_words(sub['text'])
-            timings = create_word_timing(sub['start'], sub['end'], words)
-            
-            for word, (start, end) in zip(words, timings):
-                if test_duration and start >= test_duration:
-                    break
-                    
-                try:
-                    clip = TextClip(
-                        word,
-                        fontsize=40,  # Bigger font for impact
-                        color='white',
-                        bg_color='rgba(0,0,0,0.6)',  # More opaque background
-                        stroke_color='black',
-                        stroke_width=2,
-                        method='label',
-                        size=(video.w, None)
-                    )
-                    
-                    clip = (clip
-                        .set_position(('center', 'center'))
-                        .set_start(start)
-                        .set_end(end))
-                    
-                    subtitle_clips.append(clip)
-                except Exception as e:
-                    print(f"Error creating subtitle clip for word '{word}': {e}")
-                    continue
-
-        # Create final composite
+        with span("render.load_inputs"):
+            print("\nLoading audio file...")
+            # Native-rate samples decoded by the audio stage; no ffmpeg reader process
+            audio = narration_audio_clip(audio_path)
+            if test_duration:
+                audio = audio.subclip(0, min(test_duration, audio.duration))
+            print(f"Audio duration: {audio.duration} seconds")
+
+            print("\nLoading video file...")
+            # Seeded by the narration so re-rendering a story picks the same offset
+            background = BackgroundSource(video_path, audio.duration, start=background_start, seed=audio_path)
+            print(background.describe())
+            video = background.clip()
+
+            print("\nLoading subtitles...")
+            word_timings = load_words(srt_path)
+            if test_duration:
+                word_timings = word_timings.select(word_timings.starts < test_duration)
+            print(f"Loaded {len(word_timings)} words")
+
+        # Overlay only the active word(s) on each frame instead of compositing
+        # one clip per word
         print("\nCombining video and subtitles...")
-        final = CompositeVideoClip(
-            [video] + subtitle_clips,
-            size=video.size
-        )
-        
-        # Add audio
-        print("Adding audio...")
-        final = final.set_audio(audio)
+        with span("render.clip_creation", words=len(word_timings)) as clip_span:
+            glyph_cache = get_glyph_cache(cache_dir=glyph_cache_dir)
+            rasterized, from_disk = glyph_cache.misses, glyph_cache.disk_hits
+            overlay = SubtitleOverlay(word_timings, video.w, glyph_cache=glyph_cache)
+            rasterized, from_disk = glyph_cache.misses - rasterized, glyph_cache.disk_hits - from_disk
+            clip_span.set(glyphs=len(overlay.glyphs), rasterized=rasterized)
+        print(f"Indexed {len(overlay)} words using {len(overlay.glyphs)} unique glyphs "
+              f"({rasterized} rendered, {from_disk} loaded from the glyph cache directory)")
+
+        with span("render.composite"):
+            final = overlay.apply_to(video)
+            
+            # Add audio
+            print("Adding audio...")
+            final = final.set_audio(audio)
 
-        # Set duration to match audio
-        final_duration = min(video.duration, audio.duration)
-        if test_duration:
-            final_duration = min(final_duration, test_duration)
-        final = final.set_duration(final_duration)
+            # The background is already as long as the audio
+            final_duration = audio.duration
+            final = final.set_duration(final_duration)
 
         print(f"\nRendering video to: {output_path}")
         print("This may take a while...")
-        final.write_videofile(
-            output_path, 
-            fps=video.fps, 
-            codec='libx264',
-            audio_codec='aac',
-            threads=4,
-            preset='medium'
-        )
+        with span("render.encode", seconds=final_duration, fps=video.fps):
+            final.write_videofile(
+                output_path, 
+                fps=video.fps, 
+                codec='libx264',
+                audio_codec='aac',
+                # Keep the narration's sample rate instead of upsampling it
+                audio_fps=audio.fps,
+                threads=threads,
+                preset='medium'
+            )
 
         # Clean up
         video.close()
         audio.close()
-        for clip in subtitle_clips:
-            clip.close()
         final.close()
         
         print("\nVideo creation completed!")
@@ -232,15 +158,24 @@ def main():
     setup_directories()
     
     # Select files
-    video_path = select_file(f"{VIDEO_DIR}/*.mp4", "Available video files")
+    library = VideoLibrary(VIDEO_DIR).refresh()
+    video_path = select_file([library.path(name) for name in library.names()], "Available video files")
     if not video_path:
         return
     
-    audio_path = select_file("audio_*/*.mp3", "Available audio files")
+    # Narrations and subtitles come from the artifact store, most recent first
+    from scripts.cached_stages import AUDIO_NAME, SUBTITLE_NAME, open_store
+    store = open_store()
+    audio = [(os.path.join(store.path(key), AUDIO_NAME), entry.get('label') or key[:12])
+             for key, entry in store.entries('audio')]
+    audio_path = select_file([path for path, _ in audio], "Available audio files", [label for _, label in audio])
     if not audio_path:
         return
     
-    srt_path = select_file(f"{SUBTITLE_DIR}/*/*.srt", "Available subtitle files")
+    subtitles = [(os.path.join(store.path(key), SUBTITLE_NAME), entry.get('label') or key[:12])
+                 for key, entry in store.entries('subtitles')]
+    srt_path = select_file([path for path, _ in subtitles], "Available subtitle files",
+                           [label for _, label in subtitles])
     if not srt_path:
         return
     
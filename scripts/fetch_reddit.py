@@ -0,0 +1,259 @@
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from utils.story_store import StoryStore
+
+API_BASE = "https://oauth.reddit.com"
+TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+USER_AGENT = "script:brainrotfactory:v1.0 (by /u/boientheboi)"
+
+# Reddit allows 100 OAuth requests per minute per client
+DEFAULT_RATE = 100 / 60
+PAGE_SIZE = 100
+
+
+class TokenBucket:
+    """Shared request budget that follows Reddit's X-Ratelimit-* headers
+
+    Tokens refill at `rate` per second up to `capacity`. After every response
+    the bucket is re-synced with the server: it never holds more tokens than
+    X-Ratelimit-Remaining and spreads the remaining requests over the time
+    left until X-Ratelimit-Reset. When the budget is exhausted (or the server
+    answers 429) every thread waits until the window resets.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=10):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else 1.0)
+                self.waited += wait
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Re-sync the budget from a response's rate-limit headers"""
+        try:
+            remaining = float(headers["X-Ratelimit-Remaining"])
+            reset = float(headers["X-Ratelimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, remaining)
+            if remaining < 1:
+                self.blocked_until = max(self.blocked_until, now + reset)
+                self.rate = self.base_rate
+            else:
+                self.rate = min(self.base_rate * 2, remaining / max(reset, 1.0))
+
+    def pause(self, seconds):
+        """Stop all requests for a while (e.g. after a 429 with Retry-After)"""
+        with self._lock:
+            self.tokens = 0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RedditFetcher:
+    """Minimal application-only OAuth client for listing subreddit posts"""
+
+    def __init__(self, client_id, client_secret, api_base=API_BASE, token_url=TOKEN_URL,
+                 user_agent=USER_AGENT, bucket=None, max_retries=5, timeout=30):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_base = api_base.rstrip("/")
+        self.token_url = token_url
+        self.user_agent = user_agent
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.requests = 0
+        self.throttled = 0
+        # get() runs on several threads; += on an attribute is not atomic
+        self._stats_lock = threading.Lock()
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+        return session
+
+    def _access_token(self, refresh=False):
+        with self._token_lock:
+            if refresh or not self._token or time.time() >= self._token_expires - 60:
+                response = self._session().post(
+                    self.token_url,
+                    auth=(self.client_id, self.client_secret),
+                    data={"grant_type": "client_credentials"},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                payload = response.json()
+                self._token = payload["access_token"]
+                self._token_expires = time.time() + payload.get("expires_in", 3600)
+            return self._token
+
+    def get(self, path, params=None):
+        """GET an API path, respecting the shared rate limit and retrying transient errors"""
+        refreshed = False
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = self._session().get(
+                f"{self.api_base}{path}",
+                params=params,
+                headers={"Authorization": f"bearer {self._access_token()}"},
+                timeout=self.timeout,
+            )
+            with self._stats_lock:
+                self.requests += 1
+            self.bucket.update_from_headers(response.headers)
+
+            if response.status_code == 401 and not refreshed:
+                self._access_token(refresh=True)
+                refreshed = True
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                if response.status_code == 429:
+                    with self._stats_lock:
+                        self.throttled += 1
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after else min(60, 2 ** attempt + random.random())
+                if response.status_code == 429:
+                    self.bucket.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise RuntimeError(f"Giving up on {path} after {self.max_retries} retries")
+
+    def iter_top_pages(self, subreddit, time_filter="week", limit=100):
+        """Yield pages (lists of post dicts) of a subreddit's top listing"""
+        after = None
+        fetched = 0
+        while fetched < limit:
+            params = {"t": time_filter, "limit": min(PAGE_SIZE, limit - fetched), "raw_json": 1}
+            if after:
+                params["after"] = after
+            listing = self.get(f"/r/{subreddit}/top", params)["data"]
+            posts = [child["data"] for child in listing.get("children", [])]
+            if not posts:
+                return
+            fetched += len(posts)
+            yield posts
+            after = listing.get("after")
+            if not after:
+                return
+
+
+def post_to_story(post, subreddit):
+    """Convert a Reddit API post into a story store row"""
+    return {
+        "id": post["id"],
+        "subreddit": post.get("subreddit") or subreddit,
+        "title": post["title"],
+        "author": str(post.get("author")),
+        "score": post.get("score", 0),
+        "created_utc": post.get("created_utc"),
+        "url": post.get("url"),
+        "content": post.get("selftext", "") if post.get("is_self") else "",
+    }
+
+
+def fetch_subreddits(fetcher, store, subreddits, time_filters=("week",), limit=100,
+                     max_length=10000, workers=4):
+    """Fetch several subreddit listings concurrently and stream each page into the store"""
+    stats = {"pages": 0, "posts": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    stats_lock = threading.Lock()
+
+    def fetch_one(subreddit, time_filter):
+        for page in fetcher.iter_top_pages(subreddit, time_filter, limit):
+            stories = [post_to_story(p, subreddit) for p in page
+                       if p.get("is_self") and p.get("selftext") and len(p["selftext"]) <= max_length]
+            inserted, updated = store.upsert_many(stories)
+            with stats_lock:
+                stats["pages"] += 1
+                stats["posts"] += len(page)
+                stats["inserted"] += inserted
+                stats["updated"] += updated
+                stats["skipped"] += len(page) - len(stories)
+        print(f"Finished r/{subreddit} ({time_filter})")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_one, sub, tf): (sub, tf) for sub in subreddits for tf in time_filters}
+        for future in as_completed(futures):
+            subreddit, time_filter = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error fetching r/{subreddit} ({time_filter}): {e}")
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    stats["requests"] = fetcher.requests
+    stats["throttled"] = fetcher.throttled
+    stats["rate_limit_wait"] = round(fetcher.bucket.waited, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch top posts from several subreddits into the story store")
+    parser.add_argument("subreddits", nargs="*", default=["creepypasta", "nosleep"])
+    parser.add_argument("--time-filters", nargs="+", default=["week"],
+                        choices=["hour", "day", "week", "month", "year", "all"])
+    parser.add_argument("--limit", type=int, default=100, help="Posts per subreddit and time filter")
+    parser.add_argument("--max-length", type=int, default=10000, help="Skip stories longer than this")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--api-base", default=API_BASE)
+    parser.add_argument("--token-url", default=TOKEN_URL)
+    parser.add_argument("--db", help="Story database path")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    client_id = os.environ.get("REDDIT_CLIENT_ID")
+    client_secret = os.environ.get("REDDIT_CLIENT_SECRET")
+    if not client_id or not client_secret:
+        parser.error("Set REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET (environment or .env)")
+
+    fetcher = RedditFetcher(client_id, client_secret, api_base=args.api_base, token_url=args.token_url)
+    store = StoryStore(args.db) if args.db else StoryStore()
+    stats = fetch_subreddits(fetcher, store, args.subreddits, args.time_filters,
+                             args.limit, args.max_length, args.workers)
+    print(f"\nFetched {stats['posts']} posts in {stats['seconds']}s "
+          f"({stats['inserted']} new, {stats['updated']} already known, {stats['skipped']} skipped)")
+    print(f"{stats['requests']} requests, {stats['throttled']} throttled, "
+          f"{stats['rate_limit_wait']}s waiting on the rate limit")
+
+
+if __name__ == "__main__":
+    main()
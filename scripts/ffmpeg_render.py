@@ -0,0 +1,245 @@
+import os
+import re
+import subprocess
+import tempfile
+
+import imageio_ffmpeg
+
+from utils.audio import audio_duration
+from utils.background import BackgroundSource
+from utils.glyph_cache import DEFAULT_STYLE
+from scripts.render_engines import OUTPUT_PROFILES
+from utils.tracing import span
+
+ASS_FONT = "Arial"
+# TextClip's label background is a full-width band about this tall relative to the font size
+BAND_HEIGHT_RATIO = 1.3
+
+
+def format_ass_timestamp(seconds):
+    """Convert seconds to ASS timestamp format (H:MM:SS.cc)"""
+    centis = int(round(max(seconds, 0) * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def _ass_color(color, alpha=0.0):
+    """Convert a CSS-ish color name or rgba() string to ASS &HAABBGGRR"""
+    names = {'white': (255, 255, 255), 'black': (0, 0, 0), 'yellow': (255, 255, 0), 'red': (255, 0, 0)}
+    if color.startswith('rgba('):
+        r, g, b, a = [float(v) for v in color[5:-1].split(',')]
+        rgb, alpha = (int(r), int(g), int(b)), 1.0 - a
+    else:
+        rgb = names.get(color, (255, 255, 255))
+    r, g, b = rgb
+    return f"&H{int(round(alpha * 255)):02X}{b:02X}{g:02X}{r:02X}"
+
+
+def _escape_ass_text(text):
+    return text.replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
+
+
+def write_ass(words, path, width, height, style=None, position=0.5):
+    """Write word timings as an ASS script styled like the moviepy subtitles
+
+    position is the vertical centre of the subtitle band as a fraction of
+    the frame height (0.5 = centred, as in the moviepy renderer).
+    """
+    style = style or DEFAULT_STYLE
+    fontsize = style.get('fontsize', 40)
+    font = style.get('font') or ASS_FONT
+    band_height = int(fontsize * BAND_HEIGHT_RATIO)
+    center = int(height * position)
+    band_top = center - band_height // 2
+
+    header = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "ScaledBorderAndShadow: yes",
+        "WrapStyle: 2",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+        "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        # Background band drawn as a vector shape on layer 0
+        f"Style: Band,{font},{fontsize},{_ass_color(style.get('bg_color') or 'rgba(0,0,0,0)')},"
+        "&H00000000,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,0,0,7,0,0,0,1",
+        # Word with stroke on layer 1
+        f"Style: Word,{font},{fontsize},{_ass_color(style.get('color', 'white'))},"
+        f"&H00000000,{_ass_color(style.get('stroke_color') or 'black')},&H00000000,"
+        f"0,0,0,0,100,100,0,0,1,{style.get('stroke_width') or 0},0,5,0,0,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    band = (f"{{\\pos(0,{band_top})\\p1}}m 0 0 l {width} 0 {width} {band_height} "
+            f"0 {band_height}{{\\p0}}")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(header) + "\n")
+        for word, start, end in words:
+            if end <= start:
+                continue
+            t0, t1 = format_ass_timestamp(start), format_ass_timestamp(end)
+            f.write(f"Dialogue: 0,{t0},{t1},Band,,0,0,0,,{band}\n")
+            f.write(f"Dialogue: 1,{t0},{t1},Word,,0,0,0,,"
+                    f"{{\\pos({width // 2},{center})}}{_escape_ass_text(word)}\n")
+    return path
+
+
+def ffmpeg_filter_path(path):
+    """Quote a file path as a filter option value inside a filtergraph
+
+    The value is single-quoted for the option parser (a quote inside becomes
+    '\\''), then escaped once more for the filtergraph parser, which
+    unescapes before the option parser sees it.
+    """
+    value = "'" + path.replace('\\', '/').replace("'", "'\\''") + "'"
+    return re.sub(r"([\\'\[\],;])", r"\\\1", value)
+
+
+def create_final_video_ffmpeg(video_path, audio_path, srt_path, output_path, test_duration=None,
+                              threads=4, preset='medium', background_start='random'):
+    """Burn word subtitles into the background video with a single ffmpeg call
+
+    Frames never pass through Python: the word timings are written as an ASS
+    script and rendered by ffmpeg's ass filter while encoding. The background
+    is seeked to its start keyframe and looped by the demuxer when the
+    narration is longer than the clip.
+    """
+    from scripts.create_video import load_words
+
+    try:
+        duration = audio_duration(audio_path)
+        if test_duration:
+            duration = min(duration, test_duration)
+        background = BackgroundSource(video_path, duration, start=background_start, seed=audio_path)
+        width, height = background.width, background.height
+        print(f"Video: {width}x{height} @ {background.fps} fps, rendering {duration:.1f} seconds")
+        print(background.describe())
+
+        print("\nLoading subtitles...")
+        words = load_words(srt_path)
+        if test_duration:
+            words = [w for w in words if w[1] < test_duration]
+        print(f"Loaded {len(words)} words")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ass_path = write_ass(words, os.path.join(tmp_dir, 'subtitles.ass'), width, height)
+            cmd = [
+                imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-stats',
+                *background.ffmpeg_input_args(),
+                '-i', audio_path,
+                # Renumber frames so the looped input keeps counting up instead of
+                # repeating timestamps (which ffmpeg would drop as duplicates)
+                '-filter_complex', f"[0:v]setpts=N/FRAME_RATE/TB,ass=filename={ffmpeg_filter_path(ass_path)}[v]",
+                '-map', '[v]', '-map', '1:a',
+                # The renumbered frames carry no rate of their own; without -r ffmpeg assumes 25 fps
+                '-r', f"{background.fps}",
+                '-c:v', 'libx264', '-preset', preset, '-pix_fmt', 'yuv420p',
+                '-threads', str(threads),
+                '-c:a', 'aac',
+                '-t', f"{duration:.6f}",
+                output_path,
+            ]
+
+            print(f"\nRendering video with ffmpeg to: {output_path}")
+            with span("render.encode", engine="ffmpeg", words=len(words)):
+                subprocess.run(cmd, check=True)
+
+        print("\nVideo creation completed!")
+        return output_path
+
+    except Exception as e:
+        print(f"\nError creating video: {str(e)}")
+        raise
+
+
+def crop_box(src_width, src_height, width, height):
+    """Largest centred (w, h, x, y) region of the source with the output's aspect ratio"""
+    if src_width * height > src_height * width:
+        crop_w, crop_h = src_height * width / height, src_height
+    else:
+        crop_w, crop_h = src_width, src_width * height / width
+    # Even sizes keep yuv420p chroma planes aligned
+    crop_w, crop_h = int(crop_w) // 2 * 2, int(crop_h) // 2 * 2
+    return crop_w, crop_h, (src_width - crop_w) // 2, (src_height - crop_h) // 2
+
+
+def create_final_video_variants(video_path, audio_path, srt_path, output_path, profiles=None,
+                                test_duration=None, threads=4, preset='medium', background_start='random'):
+    """Render several output profiles (e.g. 9:16, 1:1, 16:9) from one decode of the background
+
+    One ffmpeg process decodes each background frame once and splits it;
+    every branch is cropped to its profile's aspect ratio, scaled, given
+    its own ASS subtitles and encoded to its own file, with all encoders
+    running side by side. Outputs are named <output>_<profile><ext>;
+    returns {profile: path}.
+    """
+    from scripts.create_video import load_words
+
+    profiles = list(profiles or OUTPUT_PROFILES)
+    root, ext = os.path.splitext(output_path)
+    outputs = {name: f"{root}_{name}{ext}" for name in profiles}
+    try:
+        duration = audio_duration(audio_path)
+        if test_duration:
+            duration = min(duration, test_duration)
+        background = BackgroundSource(video_path, duration, start=background_start, seed=audio_path)
+        print(f"Video: {background.width}x{background.height} @ {background.fps} fps, "
+              f"rendering {duration:.1f} seconds as {', '.join(profiles)}")
+        print(background.describe())
+
+        print("\nLoading subtitles...")
+        words = load_words(srt_path)
+        if test_duration:
+            words = [w for w in words if w[1] < test_duration]
+        print(f"Loaded {len(words)} words")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            branches = [f"[0:v]setpts=N/FRAME_RATE/TB,split={len(profiles)}"
+                        + "".join(f"[s{i}]" for i in range(len(profiles)))]
+            encodes = []
+            for i, name in enumerate(profiles):
+                profile = OUTPUT_PROFILES[name]
+                width, height = profile['width'], profile['height']
+                ass_path = write_ass(words, os.path.join(tmp_dir, f"{name}.ass"), width, height,
+                                     style=dict(DEFAULT_STYLE, fontsize=profile['fontsize']),
+                                     position=profile['position'])
+                crop_w, crop_h, x, y = crop_box(background.width, background.height, width, height)
+                branches.append(f"[s{i}]crop={crop_w}:{crop_h}:{x}:{y},scale={width}:{height},setsar=1,"
+                                f"ass=filename={ffmpeg_filter_path(ass_path)}[v{i}]")
+                encodes += [
+                    '-map', f"[v{i}]", '-map', '1:a',
+                    '-r', f"{background.fps}",
+                    '-c:v', 'libx264', '-preset', preset, '-pix_fmt', 'yuv420p',
+                    '-b:v', profile['bitrate'], '-maxrate', profile['bitrate'],
+                    '-bufsize', profile['bitrate'],
+                    '-threads', str(threads),
+                    '-c:a', 'aac',
+                    '-t', f"{duration:.6f}",
+                    outputs[name],
+                ]
+            cmd = [
+                imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-stats',
+                *background.ffmpeg_input_args(),
+                '-i', audio_path,
+                '-filter_complex', ";".join(branches),
+                *encodes,
+            ]
+
+            print(f"\nRendering {len(profiles)} variants with ffmpeg to: {root}_*{ext}")
+            with span("render.encode", engine="ffmpeg-variants", words=len(words), variants=len(profiles)):
+                subprocess.run(cmd, check=True)
+
+        print("\nVideo creation completed!")
+        return outputs
+
+    except Exception as e:
+        print(f"\nError creating video variants: {str(e)}")
+        raise
@@ -1,6 +1,7 @@
 import praw
 import json
 from datetime import datetime
+from utils.story_store import StoryStore
 
 # Initialize Reddit instance
 reddit = praw.Reddit(
@@ -13,13 +14,14 @@ reddit = praw.Reddit(
 
 # print(reddit.user.me())  # Should print "None" for script-only apps
 
-def get_top_posts(subreddit_name, limit=10, max_length=10000):
+def get_top_posts(subreddit_name, limit=10, max_length=10000, store=None):
     """
-    Get top posts from a specified subreddit and save to JSON
+    Get top posts from a specified subreddit and save them to the story store
     max_length: maximum number of characters allowed in a story (default 10000)
     """
     subreddit = reddit.subreddit(subreddit_name)
     top_posts = subreddit.top(limit=limit, time_filter="week")
+    store = store or StoryStore()
     
     stories = []
     skipped = 0
@@ -33,10 +35,12 @@ def get_top_posts(subreddit_name, limit=10, max_length=10000):
             continue
             
         story_data = {
+            "id": post.id,
+            "subreddit": subreddit_name,
             "title": post.title,
             "author": str(post.author),  # Convert author to string in case account is deleted
             "score": post.score,
-            "created_utc": datetime.fromtimestamp(post.created_utc).isoformat(),
+            "created_utc": post.created_utc,
             "url": post.url,
             "content": post.selftext if post.is_self else "",
         }
@@ -48,14 +52,10 @@ def get_top_posts(subreddit_name, limit=10, max_length=10000):
             print(f"Length: {len(post.selftext)} characters")
         print("-" * 50)
     
-    # Save to JSON file with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"creepypasta_stories_{timestamp}.json"
+    # Upsert into the story store (already-seen posts only get their score refreshed)
+    inserted, updated = store.upsert_many(stories)
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(stories, f, indent=4, ensure_ascii=False)
-    
-    print(f"\nSaved {len(stories)} stories to {filename}")
+    print(f"\nSaved {inserted} new stories to {store.path} ({updated} already known)")
     print(f"Skipped {skipped} stories that were too long")
 
 if __name__ == "__main__":
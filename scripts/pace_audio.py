@@ -0,0 +1,32 @@
+from utils.audio import load_native_pcm, save_pcm, write_wav
+from utils.pacing import pace_audio
+from utils.tracing import span
+
+# Bump when pace_narration's output changes so cached paced narration is not reused
+PACED_VERSION = 2
+
+
+def pace_narration(audio_path, srt_path, audio_output, srt_output, max_pause=None, speed=1.0):
+    """Write a faster narration and subtitles remapped to it
+
+    Pauses longer than max_pause seconds are shortened to max_pause and the
+    speech is sped up by speed. Word timings go through the same time table
+    as the audio, so subtitles stay in sync. Returns (audio_output,
+    srt_output); the audio is a WAV at the narration's own sample rate, with
+    its samples and a 16 kHz copy for Whisper stored next to it.
+    """
+    from scripts.create_subtitles import write_word_subtitles
+    from scripts.create_video import load_words
+
+    # Pace at the source rate; the 16 kHz Whisper samples would cut the published audio at 8 kHz
+    samples, rate = load_native_pcm(audio_path)
+    with span("pacing.audio", seconds=round(len(samples) / rate, 3), max_pause=max_pause, speed=speed):
+        paced, source_times, target_times = pace_audio(samples, rate, max_pause, speed)
+    write_wav(audio_output, paced, rate)
+    save_pcm(audio_output, paced, rate)
+
+    words = load_words(srt_path).remap(source_times, target_times)
+    write_word_subtitles(list(words), srt_output)
+    print(f"Paced narration: {len(samples) / rate:.1f}s -> "
+          f"{len(paced) / rate:.1f}s ({(len(source_times) - 2) // 2} pauses shortened)")
+    return audio_output, srt_output
@@ -0,0 +1,260 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import imageio_ffmpeg
+
+from utils.artifact_store import ArtifactStore, artifact_key
+from utils.audio import audio_duration
+from utils.background import BackgroundSource
+from utils.glyph_cache import DEFAULT_STYLE
+from utils.subtitles import WordTrack
+from utils.tracing import span
+from utils.video_library import nearest_keyframe
+
+# Encoder settings shared by every segment; they must match for a lossless concat
+SEGMENT_CODEC = 'libx264'
+SEGMENT_PIX_FMT = 'yuv420p'
+# Length of the fixed segment grid used by incremental renders
+SEGMENT_SECONDS = 5.0
+SEGMENT_NAME = 'segment.mp4'
+# Bump when _render_segment's output changes so cached segments are not reused
+SEGMENT_VERSION = 1
+# Segments get their own store and budget, so they never evict narration or subtitles
+DEFAULT_SEGMENT_ROOT = os.path.join("cache", "segments")
+DEFAULT_SEGMENT_MAX_BYTES = int(os.environ.get("SEGMENT_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+
+
+def plan_segments(total_frames, fps, count, keyframes=None):
+    """Split [0, total_frames) into up to count frame ranges starting on keyframes
+
+    Boundaries are whole frame indices, so every output frame belongs to
+    exactly one segment.
+    """
+    boundaries = {0, total_frames}
+    for i in range(1, count):
+        t = i * total_frames / count / fps
+        if keyframes:
+            t = nearest_keyframe(keyframes, t)
+        boundaries.add(int(round(t * fps)))
+    boundaries = sorted(b for b in boundaries if 0 <= b <= total_frames)
+    return [(a, b) for a, b in zip(boundaries, boundaries[1:]) if b > a]
+
+
+def plan_fixed_segments(total_frames, fps, seconds=SEGMENT_SECONDS, keyframes=None):
+    """Split [0, total_frames) on a fixed grid of about seconds each, snapped to keyframes
+
+    Unlike plan_segments the boundaries do not depend on the total length,
+    so a story that gets slightly longer or shorter keeps the same segments
+    up to its end.
+    """
+    boundaries = {0, total_frames}
+    t = seconds
+    while t * fps < total_frames:
+        boundaries.add(int(round((nearest_keyframe(keyframes, t) if keyframes else t) * fps)))
+        t += seconds
+    boundaries = sorted(b for b in boundaries if 0 <= b <= total_frames)
+    return [(a, b) for a, b in zip(boundaries, boundaries[1:]) if b > a]
+
+
+def segment_key(background, frames, words, preset):
+    """Content address of an encoded segment: everything that decides its pixels and encoding"""
+    stat = os.stat(background.path)
+    return artifact_key(
+        "segment",
+        version=SEGMENT_VERSION,
+        background=[os.path.abspath(background.path), stat.st_size, stat.st_mtime_ns],
+        start_frame=background.start_frame,
+        fps=background.fps,
+        frames=list(frames),
+        words=[list(word) for word in words],
+        style=DEFAULT_STYLE,
+        codec=[SEGMENT_CODEC, SEGMENT_PIX_FMT, preset],
+    )
+
+
+def words_in_range(words, start, end):
+    """Words whose display interval overlaps [start, end)"""
+    return WordTrack.from_tuples(words).overlapping(start, end)
+
+
+def _render_segment(job):
+    """Render frames [first_frame, last_frame) of the timeline to a video-only file
+
+    Jobs with a segment_key are encoded straight into the segment store and
+    return the published path. The eviction pass after publishing spares
+    the job's pinned keys (every segment of the current timeline).
+    """
+    if job.get('segment_key'):
+        store = ArtifactStore(job['store_root'], job['store_max_bytes'])
+        key = job['segment_key']
+        with store.create(key, 'segment', label=f"frames {job['frames'][0]}-{job['frames'][1]}",
+                          keep=job['pinned']) as tmp_dir:
+            _render_segment(dict(job, segment_key=None, output_path=os.path.join(tmp_dir, SEGMENT_NAME)))
+        return os.path.join(store.path(key), SEGMENT_NAME)
+
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+    from utils.glyph_cache import get_glyph_cache
+    from utils.subtitle_overlay import SubtitleOverlay
+
+    background = job['background']
+    fps = background.fps
+    first, last = job['frames']
+    video = VideoFileClip(background.path, audio=False)
+    try:
+        overlay = SubtitleOverlay(job['words'], video.w,
+                                  glyph_cache=get_glyph_cache(cache_dir=job['glyph_cache_dir']))
+        writer = imageio_ffmpeg.write_frames(
+            job['output_path'], tuple(video.size), fps=fps,
+            codec=SEGMENT_CODEC, pix_fmt_out=SEGMENT_PIX_FMT, macro_block_size=1,
+            output_params=['-preset', job['preset'], '-threads', str(job['threads'])],
+        )
+        writer.send(None)
+        try:
+            with span("render.segment", frames=job['frames']):
+                for n in range(first, last):
+                    t = n / fps
+                    writer.send(overlay.apply(video.get_frame(background.source_time(t)), t))
+        finally:
+            writer.close()
+    finally:
+        video.close()
+    return job['output_path']
+
+
+def concat_segments(segment_paths, audio_path, output_path, duration):
+    """Join segments with the concat demuxer (no re-encode) and mux the audio once"""
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_path = f.name
+    try:
+        subprocess.run([
+            imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', audio_path,
+            '-map', '0:v', '-map', '1:a',
+            '-c:v', 'copy', '-c:a', 'aac',
+            '-t', f"{duration:.6f}",
+            output_path,
+        ], check=True)
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def create_final_video_parallel(video_path, audio_path, srt_path, output_path, test_duration=None,
+                                threads=None, segments=None, workers=None, preset='medium',
+                                glyph_cache_dir=None, background_start='random', segment_seconds=None,
+                                segment_store=None):
+    """Render the timeline as keyframe-aligned segments in a process pool, then concat
+
+    Each worker decodes its own slice of the background, draws the words that
+    overlap that slice and encodes it with identical settings. The parts are
+    joined without re-encoding and the audio is muxed once over the whole
+    timeline, so there are no AAC priming gaps at segment boundaries. The
+    background starts at background_start and loops to the narration length.
+
+    segment_seconds cuts the timeline on a fixed grid instead of one segment
+    per worker. With a segment_store (an ArtifactStore), each segment is
+    looked up by segment_key and only the ones whose inputs changed are
+    encoded; the rest are spliced in from earlier renders.
+    """
+    from scripts.create_video import load_words
+
+    cpus = os.cpu_count() or 4
+    workers = workers or max(1, cpus // 2)
+    segments = segments or workers
+    threads = threads or max(1, cpus // workers)
+
+    try:
+        duration = audio_duration(audio_path)
+        if test_duration:
+            duration = min(duration, test_duration)
+        background = BackgroundSource(video_path, duration, start=background_start, seed=audio_path)
+        fps = background.fps
+        total_frames = int(round(duration * fps))
+        print(f"Video: {background.width}x{background.height} @ {fps} fps, rendering {duration:.1f} seconds")
+        print(background.describe())
+
+        print("\nLoading subtitles...")
+        words = load_words(srt_path)
+        if segment_seconds:
+            plan = plan_fixed_segments(total_frames, fps, segment_seconds, background.output_keyframes())
+        else:
+            plan = plan_segments(total_frames, fps, segments, background.output_keyframes())
+
+        tmp_dir = tempfile.mkdtemp(prefix='segments_', dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            segment_paths = [None] * len(plan)
+            jobs, keys = [], []
+            for i, (first, last) in enumerate(plan):
+                job = {
+                    'background': background,
+                    'frames': (first, last),
+                    'words': words_in_range(words, first / fps, last / fps),
+                    'output_path': os.path.join(tmp_dir, f"segment_{i:04d}.mp4"),
+                    'threads': threads,
+                    'preset': preset,
+                    'glyph_cache_dir': glyph_cache_dir,
+                }
+                if segment_store is not None:
+                    key = segment_key(background, (first, last), job['words'], preset)
+                    keys.append(key)
+                    cached = segment_store.lookup(key)
+                    if cached and os.path.exists(os.path.join(cached, SEGMENT_NAME)):
+                        segment_paths[i] = os.path.join(cached, SEGMENT_NAME)
+                        continue
+                    # keys holds the whole plan by the time the jobs are submitted
+                    job.update(segment_key=key, store_root=segment_store.root,
+                               store_max_bytes=segment_store.max_bytes, pinned=keys)
+                jobs.append((i, job))
+            if segment_store is not None:
+                print(f"Reusing {len(plan) - len(jobs)} of {len(plan)} cached segments")
+            print(f"Rendering {len(jobs)} segments with {workers} workers ({threads} encoder threads each)")
+
+            started = time.perf_counter()
+            if jobs:
+                context = multiprocessing.get_context('spawn')
+                with span("render.segments", segments=len(jobs), reused=len(plan) - len(jobs), workers=workers), \
+                        ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+                    for (i, _), path in zip(jobs, pool.map(_render_segment, [job for _, job in jobs])):
+                        segment_paths[i] = path
+            print(f"Rendered segments in {time.perf_counter() - started:.1f}s")
+
+            print(f"\nJoining segments into: {output_path}")
+            with span("render.concat"):
+                concat_segments(segment_paths, audio_path, output_path, total_frames / fps)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        print("\nVideo creation completed!")
+        return output_path
+
+    except Exception as e:
+        print(f"\nError creating video: {str(e)}")
+        raise
+
+
+def create_final_video_incremental(video_path, audio_path, srt_path, output_path, test_duration=None,
+                                   threads=None, workers=None, preset='medium', glyph_cache_dir=None,
+                                   background_start='random', segment_seconds=SEGMENT_SECONDS, cache_dir=None):
+    """Parallel render on a fixed segment grid that re-encodes only changed segments
+
+    Encoded segments are kept in a segment store (cache_dir, else
+    SEGMENT_CACHE_DIR, else cache/segments) bounded by
+    SEGMENT_CACHE_MAX_BYTES, so re-rendering after a subtitle fix only
+    encodes the segments around the edited words.
+    """
+    store = ArtifactStore(cache_dir or os.environ.get("SEGMENT_CACHE_DIR") or DEFAULT_SEGMENT_ROOT,
+                          max_bytes=DEFAULT_SEGMENT_MAX_BYTES)
+    return create_final_video_parallel(
+        video_path, audio_path, srt_path, output_path, test_duration=test_duration, threads=threads,
+        workers=workers, preset=preset, glyph_cache_dir=glyph_cache_dir, background_start=background_start,
+        segment_seconds=segment_seconds, segment_store=store,
+    )
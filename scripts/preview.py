@@ -0,0 +1,184 @@
+import os
+import tempfile
+
+import imageio_ffmpeg
+import numpy as np
+
+from utils.audio import WHISPER_SAMPLE_RATE, audio_duration, load_pcm, write_wav
+from utils.background import BackgroundSource
+from utils.glyph_cache import DEFAULT_STYLE
+from utils.tracing import span
+
+PREVIEW_HEIGHT = 640
+PREVIEW_FPS = 15
+PREVIEW_PRESET = 'ultrafast'
+# Length of each sampled window; windows=0 previews the whole story
+WINDOW_SECONDS = 5.0
+PREVIEW_WINDOWS = 3
+SHEET_FRAMES = 12
+SHEET_COLUMNS = 4
+SHEET_HEIGHT = 480
+
+
+def preview_windows(duration, count=PREVIEW_WINDOWS, window=WINDOW_SECONDS):
+    """[(start, end)] windows spread from the start to the end of the story, merged where they overlap"""
+    if count <= 0 or count * window >= duration:
+        return [(0.0, duration)]
+    windows = []
+    for start in np.linspace(0.0, duration - window, count).tolist():
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], start + window)
+        else:
+            windows.append((start, start + window))
+    return windows
+
+
+def scaled_style(style, scale):
+    """Shrink the subtitle style with the frame so the preview keeps the final proportions"""
+    style = dict(style)
+    style['fontsize'] = max(8, int(round(style.get('fontsize', 40) * scale)))
+    if style.get('stroke_width'):
+        style['stroke_width'] = max(1, int(round(style['stroke_width'] * scale)))
+    return style
+
+
+class PreviewFrames:
+    """Frames of the final composition at a reduced size
+
+    The background is scaled while it is decoded, starts at the same
+    (audio-seeded) offset as the full render and loops the same way, and
+    the subtitle overlay uses a proportionally smaller style. With an
+    output profile (see --formats) the frame is cropped to the profile's
+    aspect ratio and the subtitles use its font size and position. Words
+    are always drawn with the moviepy engine's glyphs; the ffmpeg engines
+    draw the same style with libass, so their font rendering can differ
+    slightly.
+    """
+
+    def __init__(self, video_path, audio_path, srt_path, height=PREVIEW_HEIGHT, background_start='random',
+                 profile=None):
+        from moviepy.video.io.VideoFileClip import VideoFileClip
+        from scripts.create_video import load_words
+        from scripts.ffmpeg_render import crop_box
+        from scripts.render_engines import OUTPUT_PROFILES
+
+        self.duration = audio_duration(audio_path)
+        self.background = BackgroundSource(video_path, self.duration, start=background_start, seed=audio_path)
+        source_w, source_h = self.background.width, self.background.height
+        if profile:
+            settings = OUTPUT_PROFILES[profile]
+            crop_w, crop_h, x, y = crop_box(source_w, source_h, settings['width'], settings['height'])
+        else:
+            crop_w, crop_h, x, y = source_w, source_h, 0, 0
+        scale = min(1.0, height / crop_h)
+        # Even dimensions for yuv420p
+        self.size = (int(crop_w * scale) // 2 * 2, int(crop_h * scale) // 2 * 2)
+        self._origin = (int(x * scale), int(y * scale))
+        self.video = VideoFileClip(video_path, audio=False,
+                                   target_resolution=(int(round(source_h * scale)), int(round(source_w * scale))))
+        self.words = load_words(srt_path)
+        if profile:
+            self.style = scaled_style(dict(DEFAULT_STYLE, fontsize=settings['fontsize']),
+                                      self.size[1] / settings['height'])
+            self.position = settings['position']
+        else:
+            self.style = scaled_style(DEFAULT_STYLE, scale)
+            self.position = 'center'
+        self.overlay = None
+
+    def use_spans(self, spans):
+        """Build the overlay from only the words shown in these [start, end) spans"""
+        from utils.subtitle_overlay import SubtitleOverlay
+
+        mask = np.zeros(len(self.words), dtype=bool)
+        for start, end in spans:
+            mask |= (self.words.starts < end) & (self.words.ends > start)
+        self.overlay = SubtitleOverlay(self.words.select(mask), self.size[0], style=self.style,
+                                       position=self.position)
+
+    def frame(self, t):
+        x, y = self._origin
+        frame = self.video.get_frame(self.background.source_time(t))[y:y + self.size[1], x:x + self.size[0]]
+        # The writer needs contiguous rows; a crop is only a view
+        return np.ascontiguousarray(self.overlay.apply(frame, t))
+
+    def close(self):
+        self.video.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def render_preview(video_path, audio_path, srt_path, output_path, windows=PREVIEW_WINDOWS,
+                   window_seconds=WINDOW_SECONDS, height=PREVIEW_HEIGHT, fps=PREVIEW_FPS,
+                   preset=PREVIEW_PRESET, background_start='random', profile=None):
+    """Render a small, low frame rate review clip of the start, middle and end of the story
+
+    The sampled windows are joined back to back with their narration cut
+    from the decoded PCM, so audio and subtitles stay in sync within each
+    window. profile previews one --formats variant. Returns output_path.
+    """
+    with PreviewFrames(video_path, audio_path, srt_path, height, background_start, profile) as frames:
+        spans = preview_windows(frames.duration, windows, window_seconds)
+        frames.use_spans(spans)
+        print(f"Preview {frames.size[0]}x{frames.size[1]} @ {fps} fps: "
+              + ", ".join(f"{a:.1f}-{b:.1f}s" for a, b in spans))
+        samples = load_pcm(audio_path, mmap=True)
+        times, pieces = [], []
+        for start, end in spans:
+            count = max(1, int((end - start) * fps))
+            times.extend(start + n / fps for n in range(count))
+            # Exactly as much audio as the window's frames last
+            first = int(round(start * WHISPER_SAMPLE_RATE))
+            pieces.append(samples[first:first + count * WHISPER_SAMPLE_RATE // fps])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wav_path = write_wav(os.path.join(tmp_dir, 'preview.wav'), np.concatenate(pieces))
+            writer = imageio_ffmpeg.write_frames(
+                output_path, frames.size, fps=fps, codec='libx264', macro_block_size=1,
+                audio_path=wav_path, audio_codec='aac',
+                output_params=['-preset', preset],
+            )
+            writer.send(None)
+            try:
+                with span("render.preview", frames=len(times), windows=len(spans)):
+                    for t in times:
+                        writer.send(frames.frame(t))
+            finally:
+                writer.close()
+    print(f"Preview saved to: {output_path}")
+    return output_path
+
+
+def contact_sheet(video_path, audio_path, srt_path, output_path, count=SHEET_FRAMES, columns=SHEET_COLUMNS,
+                  height=SHEET_HEIGHT, background_start='random', profile=None):
+    """Save a grid of subtitle frames, each captioned with its time and the word expected there
+
+    Frames are taken at the midpoints of words spread evenly through the
+    story. Returns output_path (an image; the format follows the extension).
+    """
+    from PIL import Image, ImageDraw
+
+    with PreviewFrames(video_path, audio_path, srt_path, height, background_start, profile) as frames:
+        words = frames.words
+        if len(words) == 0:
+            raise ValueError(f"No words in {srt_path}")
+        picks = np.unique(np.linspace(0, len(words) - 1, min(count, len(words))).round().astype(int))
+        times = ((words.starts[picks] + words.ends[picks]) / 2).tolist()
+        frames.use_spans([(t, t) for t in times])
+        tile_w, tile_h = frames.size
+        caption_h = 18
+        rows = -(-len(picks) // columns)
+        sheet = Image.new('RGB', (tile_w * min(columns, len(picks)), (tile_h + caption_h) * rows), 'black')
+        draw = ImageDraw.Draw(sheet)
+        with span("render.contact_sheet", frames=len(picks)):
+            for i, (index, t) in enumerate(zip(picks.tolist(), times)):
+                x, y = (i % columns) * tile_w, (i // columns) * (tile_h + caption_h)
+                sheet.paste(Image.fromarray(frames.frame(t)), (x, y))
+                draw.text((x + 4, y + tile_h + 3), f"{t:7.2f}s  {words.vocab[words.ids[index]]}", fill='white')
+        sheet.save(output_path)
+    print(f"Contact sheet saved to: {output_path}")
+    return output_path
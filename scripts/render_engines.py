@@ -0,0 +1,33 @@
+RENDER_ENGINES = ('moviepy', 'ffmpeg', 'parallel', 'incremental')
+DEFAULT_ENGINE = 'moviepy'
+
+# Output variants for multi-format renders: frame size, subtitle font size,
+# subtitle centre as a fraction of the height, and target video bitrate
+OUTPUT_PROFILES = {
+    'vertical': {'width': 1080, 'height': 1920, 'fontsize': 64, 'position': 0.5, 'bitrate': '6M'},
+    'square': {'width': 1080, 'height': 1080, 'fontsize': 56, 'position': 0.75, 'bitrate': '5M'},
+    'wide': {'width': 1920, 'height': 1080, 'fontsize': 60, 'position': 0.8, 'bitrate': '8M'},
+}
+
+
+def get_renderer(engine=DEFAULT_ENGINE):
+    """Return the create_final_video-compatible function for a render engine"""
+    if engine == 'moviepy':
+        from scripts.create_video import create_final_video
+        return create_final_video
+    if engine == 'ffmpeg':
+        from scripts.ffmpeg_render import create_final_video_ffmpeg
+        return create_final_video_ffmpeg
+    if engine == 'parallel':
+        from scripts.parallel_render import create_final_video_parallel
+        return create_final_video_parallel
+    if engine == 'incremental':
+        from scripts.parallel_render import create_final_video_incremental
+        return create_final_video_incremental
+    raise ValueError(f"Unknown render engine: {engine}")
+
+
+def get_variant_renderer():
+    """Return the function that renders several output profiles in one pass"""
+    from scripts.ffmpeg_render import create_final_video_variants
+    return create_final_video_variants
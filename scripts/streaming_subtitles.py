@@ -0,0 +1,140 @@
+import queue
+import threading
+
+import numpy as np
+
+from utils import whisper_models
+from utils.audio import WHISPER_SAMPLE_RATE, decode_pcm
+from utils.tracing import span
+from utils.word_timings import save_word_timings, words_from_segments
+
+# Whisper processes 30 second windows natively
+WINDOW_SECONDS = 30.0
+# Words ending in the last OVERLAP_SECONDS of a window are left for the next one
+OVERLAP_SECONDS = 3.0
+# Committed words passed to Whisper as context for the next window
+PROMPT_WORDS = 30
+
+
+def stitch_window(window_words, window_start, cut):
+    """Pick the words of one window that can be committed
+
+    window_words are (word, start, end) with times relative to the window.
+    Words that end after `cut` may be truncated at the window edge, so they
+    are dropped here and transcribed again by the next window, which starts
+    where the last committed word ended. Returns (committed, next_start).
+    """
+    committed = []
+    for word, start, end in window_words:
+        start, end = start + window_start, end + window_start
+        if end > cut:
+            break
+        committed.append((word, start, end))
+    next_start = committed[-1][2] if committed else cut
+    return committed, next_start
+
+
+class StreamingTranscriber:
+    """Transcribe narration window by window while its TTS chunks are still arriving
+
+    Pass on_chunk as generate_speech's callback. Chunks are decoded and
+    placed at their manifest offsets, and a background thread transcribes
+    every full window as soon as enough audio is buffered. finish() handles
+    the tail and returns the stitched word timings. With words_path the
+    sidecar always exists and holds the words committed so far.
+    """
+
+    def __init__(self, model_name=whisper_models.DEFAULT_MODEL, window=WINDOW_SECONDS,
+                 overlap=OVERLAP_SECONDS, words_path=None):
+        self.model_name = model_name
+        self.window = window
+        self.overlap = overlap
+        self.words_path = words_path
+        self.words = []
+        self.windows = 0
+        self._samples = np.zeros(0, dtype=np.float32)
+        self._start = 0.0
+        self._queue = queue.Queue()
+        self._error = None
+        self._closed = False
+        if words_path:
+            save_word_timings(self.words, words_path)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def on_chunk(self, info, audio):
+        """generate_speech callback: queue a finished chunk (never blocks the event loop)"""
+        self._queue.put((info, audio))
+
+    def _add_chunk(self, info, audio):
+        first = int(round(info["start"] * WHISPER_SAMPLE_RATE))
+        last = int(round(info["end"] * WHISPER_SAMPLE_RATE))
+        pcm = decode_pcm(audio)[:last - first]
+        if len(self._samples) < last:
+            self._samples = np.concatenate([self._samples, np.zeros(last - len(self._samples), dtype=np.float32)])
+        self._samples[first:first + len(pcm)] = pcm
+
+    def _transcribe_window(self, end, final=False):
+        first = int(self._start * WHISPER_SAMPLE_RATE)
+        last = int(end * WHISPER_SAMPLE_RATE)
+        prompt = " ".join(w for w, _, _ in self.words[-PROMPT_WORDS:]) or None
+        with span("whisper.window", start=round(self._start, 3), end=round(end, 3)):
+            result = whisper_models.transcribe(
+                self._samples[first:last],
+                name=self.model_name,
+                word_timestamps=True,
+                language="en",
+                initial_prompt=prompt,
+            )
+        cut = float("inf") if final else end - self.overlap
+        committed, next_start = stitch_window(words_from_segments(result["segments"]), self._start, cut)
+        self.words.extend(committed)
+        self._start = max(next_start, self._start + 1.0 / WHISPER_SAMPLE_RATE)
+        self.windows += 1
+        if self.words_path:
+            save_word_timings(self.words, self.words_path)
+
+    def _run(self):
+        done = False
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    done = True
+                    break
+                self._add_chunk(*item)
+                buffered = len(self._samples) / WHISPER_SAMPLE_RATE
+                while not self._closed and buffered - self._start >= self.window:
+                    self._transcribe_window(self._start + self.window)
+            if self._closed:
+                return
+            total = len(self._samples) / WHISPER_SAMPLE_RATE
+            while total - self._start > self.window:
+                self._transcribe_window(self._start + self.window)
+            if total - self._start > 0.05:
+                self._transcribe_window(total, final=True)
+        except Exception as e:
+            self._error = e
+            # Keep draining so producers never block on a dead consumer
+            while not done:
+                done = self._queue.get() is None
+
+    def finish(self):
+        """Transcribe the remaining audio and return all (word, start, end) tuples"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error:
+            raise self._error
+        print(f"Transcribed {len(self.words)} words in {self.windows} windows")
+        return self.words
+
+    def close(self):
+        """Stop the worker without transcribing the rest (e.g. after a TTS error)
+
+        Waits for the window being transcribed, so nothing writes to
+        words_path once this returns.
+        """
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
@@ -0,0 +1,248 @@
+import contextlib
+import os
+import socket
+import threading
+import time
+
+from scripts.cached_stages import (cached_aligned_subtitles, cached_audio, cached_paced_narration, cached_subtitles,
+                                   open_store)
+from scripts.render_engines import DEFAULT_ENGINE, get_renderer, get_variant_renderer
+from utils import whisper_models
+from utils.job_queue import DEFAULT_DB, JobQueue
+from utils.tracing import span
+
+STAGES = ('audio', 'subtitles', 'render')
+# Settings a submitted job may override; everything else is fixed per worker
+JOB_OPTIONS = ('engine', 'subtitle_mode', 'aligner', 'background_start', 'formats', 'whisper_model', 'max_pause',
+               'speed')
+# 'stream' needs the TTS chunks as they arrive, which a resumed job no longer has
+SUBTITLE_MODES = ('transcribe', 'align')
+
+DEFAULT_CONFIG = {
+    'engine': DEFAULT_ENGINE,
+    'subtitle_mode': 'transcribe',
+    'aligner': 'whisper',
+    'background_start': 'random',
+    'formats': None,
+    'whisper_model': whisper_models.DEFAULT_MODEL,
+    'max_pause': None,
+    'speed': 1.0,
+    'whisper_threads': None,
+    'render_threads': 4,
+    'store_root': None,
+}
+
+POLL_SECONDS = 2.0
+HEARTBEAT_SECONDS = 10.0
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def stage_audio(worker, job, outputs, config):
+    return cached_audio(worker.store, job['payload']['text'], label=job['title'])
+
+
+def stage_subtitles(worker, job, outputs, config):
+    if config['subtitle_mode'] == 'align':
+        return cached_aligned_subtitles(worker.store, job['payload']['text'], outputs['audio'],
+                                        config['aligner'], config['whisper_model'], label=job['title'])
+    return cached_subtitles(worker.store, outputs['audio'], config['whisper_model'], label=job['title'])
+
+
+def stage_render(worker, job, outputs, config):
+    output_path = job['payload']['output_path']
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    # Render next to the target and rename, so a killed render never looks finished
+    root, ext = os.path.splitext(output_path)
+    partial_path = f"{root}.partial{ext}"
+    # Cached, so a resumed render does not pace the narration again
+    audio_path, subtitle_path = cached_paced_narration(worker.store, outputs['audio'], outputs['subtitles'],
+                                                       config['max_pause'], config['speed'], label=job['title'])
+    if config['formats']:
+        # One decode of the background feeds every output profile; returns {profile: path}
+        partials = get_variant_renderer()(
+            video_path=job['payload']['video_path'],
+            audio_path=audio_path,
+            srt_path=subtitle_path,
+            output_path=partial_path,
+            profiles=config['formats'],
+            threads=config['render_threads'],
+            background_start=config['background_start'],
+        )
+        outputs = {}
+        for name, path in partials.items():
+            outputs[name] = f"{root}_{name}{ext}"
+            os.replace(path, outputs[name])
+        return outputs
+    render = get_renderer(config['engine'])
+    render(
+        video_path=job['payload']['video_path'],
+        audio_path=audio_path,
+        srt_path=subtitle_path,
+        output_path=partial_path,
+        threads=config['render_threads'],
+        background_start=config['background_start'],
+    )
+    os.replace(partial_path, output_path)
+    return output_path
+
+
+DEFAULT_STAGES = {'audio': stage_audio, 'subtitles': stage_subtitles, 'render': stage_render}
+
+
+def output_exists(output):
+    """Whether a checkpointed stage output is still on disk ({profile: path} for multi-format renders)"""
+    paths = output.values() if isinstance(output, dict) else [output]
+    return all(os.path.exists(path) for path in paths)
+
+
+class Worker:
+    """Long-running process that takes jobs from the queue and runs them stage by stage
+
+    The Whisper model, glyph cache and render engine stay loaded between
+    jobs. After each stage its output path is checkpointed on the job, so a
+    job picked up again (after a crash, kill or retry) skips every stage
+    whose output still exists. Cancellation is checked between stages.
+    """
+
+    def __init__(self, queue, config=None, stages=None, name=None, story_store=None,
+                 heartbeat=HEARTBEAT_SECONDS):
+        self.queue = queue
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self.stages = stages or DEFAULT_STAGES
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.story_store = story_store
+        self.heartbeat = heartbeat
+        self.store = None
+        self._stop = threading.Event()
+        self._cancelled = threading.Event()
+
+    def warm(self):
+        """Load everything that would otherwise be paid for on the first job"""
+        self.store = open_store(self.config['store_root'])
+        if self.stages is not DEFAULT_STAGES:
+            return
+        if self.config['whisper_threads']:
+            import torch
+            torch.set_num_threads(self.config['whisper_threads'])
+        print(f"[worker] Loading Whisper model '{self.config['whisper_model']}'")
+        whisper_models.warm(self.config['whisper_model'])
+        if self.config['engine'] != 'ffmpeg':
+            from utils.glyph_cache import get_glyph_cache
+            get_glyph_cache()
+        get_renderer(self.config['engine'])
+
+    def stop(self):
+        """Finish the current stage, put the job back in the queue and exit"""
+        self._stop.set()
+
+    def _heartbeat(self, job_id, done):
+        while not done.wait(self.heartbeat):
+            if not self.queue.heartbeat(job_id, self.name):
+                # Cancelled, or the lease expired and another worker took the job
+                self._cancelled.set()
+                return
+
+    def _check(self, job):
+        if self._cancelled.is_set() or self.queue.cancel_requested(job['id']):
+            raise JobCancelled()
+        if self._stop.is_set():
+            raise KeyboardInterrupt()
+
+    def run_job(self, job):
+        """Run the stages of a claimed job, resuming from its checkpoints"""
+        config = {**self.config, **{k: v for k, v in job['payload'].get('options', {}).items()
+                                    if k in JOB_OPTIONS}}
+        if config['subtitle_mode'] not in SUBTITLE_MODES:
+            # Jobs queued before 'stream' was rejected at submit time
+            print(f"[worker] Job {job['id']}: subtitle mode '{config['subtitle_mode']}' "
+                  f"is not available to workers, transcribing instead")
+            config['subtitle_mode'] = 'transcribe'
+        outputs = {}
+        self._cancelled.clear()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job['id'], done), daemon=True)
+        heartbeat.start()
+        started = time.perf_counter()
+        print(f"[worker] Job {job['id']}: {job['title']} (attempt {job['attempts']})")
+        try:
+            # The store lease pins the job's artifacts so other jobs' evictions leave them alone
+            with self.store.lease() if self.store else contextlib.nullcontext():
+                for stage in STAGES:
+                    checkpoint = job['checkpoints'].get(stage)
+                    if checkpoint and output_exists(checkpoint):
+                        print(f"[{stage}] Reusing {checkpoint}")
+                        if self.store:
+                            self.store.pin(checkpoint)
+                        outputs[stage] = checkpoint
+                        continue
+                    self._check(job)
+                    print(f"[{stage}] {job['title']}")
+                    with span(f"stage.{stage}", story=job['title'], job=job['id']):
+                        outputs[stage] = self.stages[stage](self, job, outputs, config)
+                    # The lease may have expired while the stage ran
+                    if self.queue.checkpoint(job['id'], self.name, stage, outputs[stage]) is None:
+                        raise JobCancelled()
+                    self._check(job)
+        except JobCancelled:
+            if not self.queue.cancel_requested(job['id']):
+                print(f"[worker] Job {job['id']} was taken over by another worker")
+                return 'lost'
+            print(f"[worker] Job {job['id']} cancelled")
+            self.queue.finish(job['id'], self.name, 'cancelled')
+            # jobs submit marked the story 'processing'; make it pickable again
+            self._set_story_status(job, 'new')
+            return 'cancelled'
+        except KeyboardInterrupt:
+            print(f"[worker] Returning job {job['id']} to the queue")
+            self.queue.release(job['id'], self.name)
+            raise
+        except Exception as e:
+            print(f"[worker] Job {job['id']} failed: {e}")
+            if self.queue.finish(job['id'], self.name, 'failed', error=str(e)):
+                self._set_story_status(job, 'failed')
+            return 'failed'
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if not self.queue.finish(job['id'], self.name, 'done'):
+            print(f"[worker] Job {job['id']} was taken over by another worker")
+            return 'lost'
+        self._set_story_status(job, 'done')
+        print(f"[worker] Job {job['id']} done in {time.perf_counter() - started:.1f}s -> {outputs['render']}")
+        return 'done'
+
+    def _set_story_status(self, job, status):
+        if self.story_store and job['story_id']:
+            self.story_store.set_status(job['story_id'], status)
+
+    def run(self, max_jobs=None, exit_when_idle=False, poll=POLL_SECONDS):
+        """Process jobs until stopped; returns the number of jobs handled"""
+        if self.store is None:
+            self.warm()
+        print(f"[worker] {self.name} waiting for jobs in {self.queue.path}")
+        handled = 0
+        try:
+            while not self._stop.is_set() and (max_jobs is None or handled < max_jobs):
+                job = self.queue.claim(self.name)
+                if job is None:
+                    if exit_when_idle:
+                        break
+                    self._stop.wait(poll)
+                    continue
+                self.run_job(job)
+                handled += 1
+        except KeyboardInterrupt:
+            print("[worker] Stopped")
+        return handled
+
+
+def run_worker(queue_path=DEFAULT_DB, config=None, max_jobs=None, exit_when_idle=False, poll=POLL_SECONDS,
+               story_store=None):
+    """Open the queue and run a worker in the current process"""
+    with JobQueue(queue_path) as queue:
+        worker = Worker(queue, config, story_store=story_store)
+        return worker.run(max_jobs=max_jobs, exit_when_idle=exit_when_idle, poll=poll)
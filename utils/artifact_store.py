@@ -0,0 +1,264 @@
+import contextvars
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+DEFAULT_ROOT = os.path.join("cache", "artifacts")
+DEFAULT_MAX_BYTES = int(os.environ.get("ARTIFACT_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+# last_access is only rewritten once it is this stale, so cache hits rarely write the index
+ACCESS_RESOLUTION_SECONDS = 60
+
+# (store root, lease token) of the lease the current job holds, see ArtifactStore.lease()
+_current_lease = contextvars.ContextVar("artifact_lease", default=None)
+
+
+def artifact_key(kind, **inputs):
+    """Hash the inputs of a stage into a stable content address"""
+    payload = json.dumps({"kind": kind, **inputs}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_hash(path, block_size=1 << 20):
+    """Return the SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) would send CTRL_C_EVENT there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Alive but owned by another user
+    return True
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+class ArtifactStore:
+    """Content-addressed store for generated files with an LRU size bound
+
+    Each artifact is a directory named after its key. Artifacts are built in
+    a temporary directory and renamed into place, so readers never see a
+    partial result. index.json records size and last access for eviction.
+    Keys looked up or created inside lease() are pinned in a lease file
+    under leases/ until the lease ends, so no process evicts them meanwhile.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self.lease_dir = os.path.join(root, "leases")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        os.makedirs(self.lease_dir, exist_ok=True)
+
+    def path(self, key):
+        """Return the directory an artifact lives in (whether or not it exists)"""
+        return os.path.join(self.root, key[:2], key)
+
+    @contextmanager
+    def _locked_index(self):
+        """Load the index under a lock, yield it, and write it back atomically if it changed"""
+        with self._lock:
+            lock_file = open(os.path.join(self.root, "index.lock"), "a")
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                index, text = self._read_index()
+                yield index
+                updated = json.dumps(index, indent=1)
+                if updated != text:
+                    tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write(updated)
+                    os.replace(tmp_path, self.index_path)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _read_index(self):
+        """Return (index, file text); the text tells _locked_index whether to write"""
+        if not os.path.exists(self.index_path):
+            return {}, None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                text = f.read()
+            return json.loads(text), text
+        except (OSError, ValueError):
+            print(f"Artifact index {self.index_path} is unreadable, rebuilding it")
+            return {}, None
+
+    @contextmanager
+    def lease(self, token=None):
+        """Pin every key this context looks up or creates until it exits
+
+        Yields the lease token. Passing it to another process (e.g. a pool
+        worker) that enters lease(token) pins that process's keys under the
+        same lease. The process that created the lease releases it; leases
+        of processes that died are dropped by the next gc().
+        """
+        owner = token is None
+        if owner:
+            token = uuid.uuid4().hex
+            with open(os.path.join(self.lease_dir, token), "w", encoding="utf-8") as f:
+                f.write(f"{os.getpid()}\n")
+        reset = _current_lease.set((os.path.abspath(self.root), token))
+        try:
+            yield token
+        finally:
+            _current_lease.reset(reset)
+            if owner:
+                try:
+                    os.remove(os.path.join(self.lease_dir, token))
+                except OSError:
+                    pass
+
+    def _pin(self, key):
+        """Add key to the current lease; called with the index locked so gc sees it atomically"""
+        lease = _current_lease.get()
+        if lease is None or lease[0] != os.path.abspath(self.root):
+            return
+        try:
+            # No O_CREAT: a lease that already ended must not be recreated
+            fd = os.open(os.path.join(self.lease_dir, lease[1]), os.O_WRONLY | os.O_APPEND)
+        except OSError:
+            return
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{key}\n")
+
+    def _leased_keys(self):
+        """Keys pinned by live leases; leases of dead processes are removed (index lock held)"""
+        keys = set()
+        for token in os.listdir(self.lease_dir):
+            path = os.path.join(self.lease_dir, token)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lines = f.read().split()
+                pid = int(lines[0])
+            except (OSError, ValueError, IndexError):
+                continue  # Being created right now
+            if not _pid_alive(pid):
+                os.remove(path)
+                continue
+            keys.update(lines[1:])
+        return keys
+
+    def lookup(self, key):
+        """Return the artifact directory for key if it exists, marking it as used"""
+        path = self.path(key)
+        with self._locked_index() as index:
+            if not os.path.isdir(path):
+                index.pop(key, None)
+                return None
+            now = time.time()
+            entry = index.get(key)
+            if entry is None:
+                # Present on disk but missing from the index (e.g. index was lost)
+                entry = index[key] = {"kind": None, "size": _dir_size(path), "created": now}
+            if now - entry.get("last_access", 0) >= ACCESS_RESOLUTION_SECONDS:
+                entry["last_access"] = now
+            self._pin(key)
+        return path
+
+    def pin(self, path):
+        """Pin the artifact a file path belongs to, as a lookup would; False if path is not in the store"""
+        parts = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root)).split(os.sep)
+        if len(parts) < 2 or parts[0] != parts[1][:2]:
+            return False
+        return self.lookup(parts[1]) is not None
+
+    @contextmanager
+    def create(self, key, kind, label=None, keep=()):
+        """Build an artifact in a temporary directory and publish it atomically
+
+        Yields the temporary directory to write files into. If the block
+        raises, the partial artifact is discarded. The eviction pass that
+        follows never removes key or the keys in keep.
+        """
+        tmp_dir = os.path.join(self.root, "tmp", f"{key}.{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            yield tmp_dir
+            final_path = self.path(key)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            try:
+                os.replace(tmp_dir, final_path)
+            except OSError:
+                # Another worker published the same artifact first, keep theirs
+                if not os.path.isdir(final_path):
+                    raise
+            now = time.time()
+            with self._locked_index() as index:
+                index[key] = {
+                    "kind": kind,
+                    "label": label,
+                    "size": _dir_size(final_path),
+                    "created": now,
+                    "last_access": now,
+                }
+                self._pin(key)
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.gc(keep={key, *keep})
+
+    def gc(self, max_bytes=None, keep=()):
+        """Evict least recently used artifacts until the store fits in max_bytes
+
+        Keys in keep and keys pinned by a live lease are never evicted.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        keep = {keep} if isinstance(keep, str) else set(keep)
+        evicted = []
+        with self._locked_index() as index:
+            keep |= self._leased_keys()
+            total = sum(entry.get("size", 0) for entry in index.values())
+            by_age = sorted(index.items(), key=lambda item: item[1].get("last_access", 0))
+            for key, entry in by_age:
+                if total <= max_bytes:
+                    break
+                if key in keep:
+                    continue
+                shutil.rmtree(self.path(key), ignore_errors=True)
+                total -= entry.get("size", 0)
+                del index[key]
+                evicted.append(key)
+        if evicted:
+            print(f"Evicted {len(evicted)} cached artifacts to stay under {max_bytes} bytes")
+        return evicted
+
+    def entries(self, kind=None):
+        """Return (key, index entry) pairs, most recently used first, optionally of one kind"""
+        with self._locked_index() as index:
+            items = [(key, dict(entry)) for key, entry in index.items() if kind is None or entry.get("kind") == kind]
+        return sorted(items, key=lambda item: item[1].get("last_access", 0), reverse=True)
+
+    def total_size(self):
+        """Return the combined size of all indexed artifacts"""
+        with self._locked_index() as index:
+            return sum(entry.get("size", 0) for entry in index.values())
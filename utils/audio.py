@@ -0,0 +1,154 @@
+import os
+import subprocess
+import wave
+
+import imageio_ffmpeg
+import numpy as np
+
+from utils.mp3 import mp3_duration, parse_frame_header, skip_id3
+
+# Whisper expects 16 kHz mono float32 input
+WHISPER_SAMPLE_RATE = 16000
+
+
+def decode_pcm(source, sample_rate=WHISPER_SAMPLE_RATE):
+    """Decode an audio file path or in-memory MP3 bytes to mono float32 samples"""
+    from_bytes = isinstance(source, (bytes, bytearray))
+    result = subprocess.run([
+        imageio_ffmpeg.get_ffmpeg_exe(), '-nostdin', '-loglevel', 'error',
+        '-i', 'pipe:0' if from_bytes else source,
+        '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1',
+    ], input=bytes(source) if from_bytes else None, capture_output=True, check=True)
+    # Copy so callers (and torch.from_numpy) get a writable array
+    return np.frombuffer(result.stdout, dtype=np.float32).copy()
+
+
+def resample(samples, source_rate, target_rate):
+    """Band-limited resampling of mono samples in the frequency domain (no ffmpeg run)
+
+    Cropping or zero-padding the spectrum at the new Nyquist frequency is an
+    ideal low-pass filter, so downsampling does not alias.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if source_rate == target_rate or len(samples) == 0:
+        return samples.copy()
+    length = int(round(len(samples) * target_rate / source_rate))
+    resampled = np.fft.irfft(np.fft.rfft(samples), length) * (length / len(samples))
+    return resampled.astype(np.float32)
+
+
+def pcm_path(audio_path):
+    """Return the path of the 16 kHz samples for Whisper stored next to a narration file"""
+    return f"{os.path.splitext(audio_path)[0]}.pcm.npy"
+
+
+def native_pcm_path(audio_path):
+    """Return the path of the samples at the narration's own rate stored next to it"""
+    return f"{os.path.splitext(audio_path)[0]}.native.npy"
+
+
+def _save_npy(path, samples):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, samples)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _is_current(path, audio_path):
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(audio_path)
+
+
+def save_pcm(audio_path, samples=None, sample_rate=None):
+    """Decode a narration once at its own rate and store those samples plus a 16 kHz copy as .npy
+
+    The renderer reads the native-rate samples and Whisper the 16 kHz copy,
+    which is resampled from them rather than decoded again. Pass samples
+    (at sample_rate, default the file's rate) to skip the decode. Returns
+    the 16 kHz path.
+    """
+    sample_rate = sample_rate or source_sample_rate(audio_path)
+    if samples is None:
+        samples = decode_pcm(audio_path, sample_rate)
+    _save_npy(native_pcm_path(audio_path), samples)
+    return _save_npy(pcm_path(audio_path), resample(samples, sample_rate, WHISPER_SAMPLE_RATE))
+
+
+def _decode(audio_path):
+    """Decode at the source rate and derive the 16 kHz copy, storing both when possible"""
+    sample_rate = source_sample_rate(audio_path)
+    samples = decode_pcm(audio_path, sample_rate)
+    whisper_samples = resample(samples, sample_rate, WHISPER_SAMPLE_RATE)
+    try:
+        _save_npy(native_pcm_path(audio_path), samples)
+        _save_npy(pcm_path(audio_path), whisper_samples)
+    except OSError as e:
+        print(f"Could not store decoded audio next to {audio_path}: {e}")
+    return samples, sample_rate, whisper_samples
+
+
+def load_pcm(audio_path, mmap=False):
+    """Return the 16 kHz float32 samples of a narration, decoding only if no current .npy exists
+
+    mmap=True returns a read-only memory map, for callers that stream the
+    samples; Whisper needs the default writable array.
+    """
+    path = pcm_path(audio_path)
+    if _is_current(path, audio_path):
+        return np.load(path, mmap_mode='r' if mmap else None)
+    return _decode(audio_path)[2]
+
+
+def load_native_pcm(audio_path, mmap=False):
+    """Return (samples, sample_rate) at the narration's own rate, decoding only if no current .npy exists"""
+    path = native_pcm_path(audio_path)
+    if _is_current(path, audio_path):
+        return np.load(path, mmap_mode='r' if mmap else None), source_sample_rate(audio_path)
+    samples, sample_rate, _ = _decode(audio_path)
+    return samples, sample_rate
+
+
+def source_sample_rate(audio_path):
+    """Return the sample rate a narration file was written at, read from its header"""
+    if not audio_path.lower().endswith('.mp3'):
+        with wave.open(audio_path, 'rb') as f:
+            return f.getframerate()
+    with open(audio_path, 'rb') as f:
+        data = f.read()
+    for i in range(skip_id3(data), len(data) - 3):
+        header = parse_frame_header(data, i)
+        if header is not None:
+            return header[2]
+    raise ValueError(f"No MP3 frames found in {audio_path}")
+
+
+def narration_audio_clip(audio_path):
+    """A moviepy clip of the narration for the published video, read from the stored native-rate samples
+
+    The 16 kHz samples for Whisper drop everything above 8 kHz, so they are
+    not used for the soundtrack; no ffmpeg reader process is started.
+    """
+    from moviepy.audio.AudioClip import AudioArrayClip
+
+    samples, sample_rate = load_native_pcm(audio_path, mmap=True)
+    # The array clip always produces two channels, so give it two (a view, no copy)
+    return AudioArrayClip(np.broadcast_to(samples[:, None], (len(samples), 2)), fps=sample_rate)
+
+
+def write_wav(path, samples, sample_rate=WHISPER_SAMPLE_RATE):
+    """Write mono float32 samples as a 16-bit WAV (e.g. cut or edited narration for muxing)"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
+
+
+def audio_duration(audio_path):
+    """Return the duration of a narration file (MP3 frames are counted without decoding)"""
+    if audio_path.lower().endswith('.mp3'):
+        with open(audio_path, 'rb') as f:
+            return mp3_duration(f.read())
+    return len(load_pcm(audio_path, mmap=True)) / WHISPER_SAMPLE_RATE
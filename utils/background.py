@@ -0,0 +1,98 @@
+import random
+
+from utils.video_library import VideoLibrary, nearest_keyframe, probe_keyframes, probe_video
+
+
+def source_metadata(video_path):
+    """Return ((width, height, fps, duration), keyframes) from the owning library's manifest
+
+    Proxies are looked up in the manifest of the library they were made
+    for; whatever is not indexed there is probed from the file.
+    """
+    entry = VideoLibrary.containing(video_path).metadata(video_path) or {}
+    if all(key in entry for key in ("width", "height", "fps", "duration")):
+        info = entry["width"], entry["height"], entry["fps"], entry["duration"]
+    else:
+        info = probe_video(video_path)
+    keyframes = entry.get("keyframes")
+    return info, keyframes if keyframes is not None else probe_keyframes(video_path)
+
+
+def choose_start(video_duration, needed, keyframes, start='random', seed=None):
+    """Resolve a background start offset in seconds, snapped to a keyframe
+
+    start is a number of seconds, 'random', or None for the beginning. A
+    random start prefers keyframes that leave enough video for the whole
+    story without looping.
+    """
+    if start is None:
+        return 0.0
+    keyframes = [k for k in keyframes or [0.0] if k < video_duration] or [0.0]
+    if start == 'random':
+        fitting = [k for k in keyframes if k + needed <= video_duration]
+        return random.Random(seed).choice(fitting or keyframes)
+    return nearest_keyframe(keyframes, float(start) % video_duration)
+
+
+class BackgroundSource:
+    """A background video that starts at an offset and loops to any length
+
+    Output frame n shows source frame (start_frame + n) mod total_frames, so
+    nothing is concatenated or buffered: the moviepy clip reads one frame at
+    a time through the normal decoder, which only seeks on the wrap-around.
+    """
+
+    def __init__(self, path, duration, start='random', seed=None, keyframes=None):
+        self.path = path
+        (self.width, self.height, self.fps, self.video_duration), indexed_keyframes = source_metadata(path)
+        self.duration = duration
+        self.total_frames = max(1, int(self.video_duration * self.fps))
+        self.keyframes = keyframes if keyframes is not None else indexed_keyframes
+        self.start = choose_start(self.video_duration, duration, self.keyframes, start, seed)
+        self.start_frame = int(round(self.start * self.fps))
+
+    @property
+    def loops(self):
+        return self.start + self.duration > self.video_duration
+
+    def source_time(self, t):
+        """Source timestamp shown at output time t"""
+        n = int(round(t * self.fps))
+        return ((self.start_frame + n) % self.total_frames) / self.fps
+
+    def output_keyframes(self):
+        """Source keyframes mapped onto the output timeline (for segment planning)"""
+        times = set()
+        offset = -self.start
+        while offset < self.duration:
+            times.update(k + offset for k in self.keyframes if 0 <= k + offset < self.duration)
+            offset += self.total_frames / self.fps
+        return sorted(times)
+
+    def clip(self):
+        """A lazily decoded moviepy clip of the full output duration"""
+        from moviepy.video.VideoClip import VideoClip
+        from moviepy.video.io.VideoFileClip import VideoFileClip
+
+        video = VideoFileClip(self.path, audio=False)
+        clip = VideoClip(lambda t: video.get_frame(self.source_time(t)), duration=self.duration)
+        clip.fps = video.fps
+        # Closing the looped clip must also stop the decoder process
+        close = clip.close
+
+        def close_all():
+            close()
+            video.close()
+        clip.close = close_all
+        return clip
+
+    def ffmpeg_input_args(self):
+        """ffmpeg input options that seek to the start keyframe and loop forever"""
+        args = ['-ss', f"{self.start:.6f}"]
+        if self.loops:
+            args = ['-stream_loop', '-1'] + args
+        return args + ['-i', self.path]
+
+    def describe(self):
+        loop = f", looping {self.start + self.duration - self.video_duration:.1f}s" if self.loops else ""
+        return f"Background from {self.start:.1f}s of {self.video_duration:.1f}s{loop}"
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from moviepy.video.VideoClip import TextClip
+
+# Default subtitle word style used by create_final_video
+DEFAULT_STYLE = {
+    'font': None,
+    'fontsize': 40,
+    'color': 'white',
+    'bg_color': 'rgba(0,0,0,0.6)',
+    'stroke_color': 'black',
+    'stroke_width': 2,
+    'method': 'label',
+}
+
+
+def glyph_key(word, width, style):
+    """Build the cache key for a word rendered with the given style and width"""
+    return (
+        word,
+        style.get('font'),
+        style.get('fontsize'),
+        style.get('color'),
+        style.get('bg_color'),
+        style.get('stroke_color'),
+        style.get('stroke_width'),
+        style.get('method'),
+        width,
+    )
+
+
+def rasterize_word(word, width, style):
+    """Render a word once with TextClip and return (rgb, mask) arrays"""
+    kwargs = {k: v for k, v in style.items() if v is not None}
+    clip = TextClip(word, size=(width, None), **kwargs)
+    try:
+        rgb = np.ascontiguousarray(clip.get_frame(0)[:, :, :3], dtype=np.uint8)
+        if clip.mask is not None:
+            mask = np.ascontiguousarray(clip.mask.get_frame(0), dtype=np.float32)
+        else:
+            mask = np.ones(rgb.shape[:2], dtype=np.float32)
+    finally:
+        clip.close()
+    return rgb, mask
+
+
+class GlyphCache:
+    """LRU cache of rasterized subtitle words with an optional on-disk store"""
+
+    def __init__(self, max_entries=2048, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.npz")
+
+    def _load_from_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return data['rgb'], data['mask']
+        except (OSError, ValueError, KeyError):
+            # Corrupt or partial entry, rasterize again
+            return None
+
+    def _save_to_disk(self, key, rgb, mask):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, rgb=rgb, mask=mask)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write glyph cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_arrays(self, word, width, style=None):
+        """Return the (rgb, mask) arrays for a word, rasterizing only on a miss"""
+        style = style or DEFAULT_STYLE
+        key = glyph_key(word, width, style)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load_from_disk(key)
+        from_disk = entry is not None
+        if not from_disk:
+            entry = rasterize_word(word, width, style)
+            self._save_to_disk(key, *entry)
+
+        with self._lock:
+            if from_disk:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide caches, one per (max_entries, cache_dir)
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_glyph_cache(max_entries=2048, cache_dir=None):
+    """Return the process-wide glyph cache for these settings, creating it on first use"""
+    key = (max_entries, os.path.abspath(cache_dir) if cache_dir else None)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = GlyphCache(max_entries=max_entries, cache_dir=cache_dir)
+    return cache
@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB = os.environ.get("JOB_DB", "jobs.db")
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+# A running job whose worker has not sent a heartbeat for this long is handed to another worker
+DEFAULT_LEASE_SECONDS = 120
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    story_id TEXT,
+    title TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    checkpoints TEXT NOT NULL DEFAULT '{}',
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    heartbeat REAL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+"""
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["checkpoints"] = json.loads(job["checkpoints"])
+    return job
+
+
+class JobQueue:
+    """Durable SQLite job queue shared by the CLI and any number of worker processes
+
+    Each job carries its inputs as a JSON payload and a checkpoints map of
+    finished stage -> output path, so a job picked up again after a crash
+    continues from the last finished stage.
+    """
+
+    def __init__(self, path=DEFAULT_DB, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def submit(self, title, payload, story_id=None):
+        """Queue a job and return its id"""
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO jobs (story_id, title, payload, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (story_id, title, json.dumps(payload, ensure_ascii=False), now, now))
+        return cursor.lastrowid
+
+    def claim(self, worker):
+        """Atomically take the oldest queued job (or one whose worker went silent)
+
+        Jobs whose worker went silent after being asked to cancel are marked
+        cancelled instead of being handed out again.
+        """
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A cancel asked of a worker that then went silent can only be completed here
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET status = 'cancelled', updated = ?
+                    WHERE status = 'running' AND cancel_requested = 1 AND heartbeat < ?
+                    """, (now, now - self.lease_seconds))
+                row = self._conn.execute(
+                    """
+                    SELECT * FROM jobs
+                    WHERE cancel_requested = 0
+                      AND (status = 'queued' OR (status = 'running' AND heartbeat < ?))
+                    ORDER BY id LIMIT 1
+                    """, (now - self.lease_seconds,)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        """
+                        UPDATE jobs SET status = 'running', worker = ?, heartbeat = ?, updated = ?,
+                                        attempts = attempts + 1, error = NULL
+                        WHERE id = ?
+                        """, (worker, now, now, row["id"]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = _job(row)
+        if job:
+            job.update(status="running", worker=worker, attempts=job["attempts"] + 1)
+        return job
+
+    def heartbeat(self, job_id, worker):
+        """Extend the lease; returns False if the job was cancelled or taken over"""
+        now = time.time()
+        cursor = self._execute(
+            "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running' "
+            "AND cancel_requested = 0", (now, job_id, worker))
+        return cursor.rowcount == 1
+
+    def checkpoint(self, job_id, worker, stage, output):
+        """Record a finished stage's output; returns None if worker no longer holds the job"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT checkpoints FROM jobs WHERE id = ? AND worker = ? "
+                                         "AND status = 'running'", (job_id, worker)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                checkpoints = json.loads(row["checkpoints"])
+                checkpoints[stage] = output
+                self._conn.execute("UPDATE jobs SET checkpoints = ?, updated = ? WHERE id = ?",
+                                   (json.dumps(checkpoints), time.time(), job_id))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return checkpoints
+
+    def finish(self, job_id, worker, status, error=None):
+        """End a running job; returns False if worker no longer holds it"""
+        if status not in JOB_STATUSES:
+            raise ValueError(f"Unknown job status: {status}")
+        cursor = self._execute("UPDATE jobs SET status = ?, error = ?, updated = ? "
+                               "WHERE id = ? AND worker = ? AND status = 'running'",
+                               (status, error, time.time(), job_id, worker))
+        return cursor.rowcount == 1
+
+    def release(self, job_id, worker):
+        """Put a running job back in the queue (e.g. when its worker shuts down mid-job)"""
+        self._execute("UPDATE jobs SET status = 'queued', worker = NULL, updated = ? "
+                      "WHERE id = ? AND worker = ? AND status = 'running'", (time.time(), job_id, worker))
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask the worker running it to stop after the current stage"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ? AND status = 'queued'",
+                (now, job_id))
+            if cursor.rowcount:
+                return "cancelled"
+            cursor = self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated = ? WHERE id = ? AND status = 'running'",
+                (now, job_id))
+        return "cancelling" if cursor.rowcount else None
+
+    def cancel_requested(self, job_id):
+        row = self._execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def retry(self, job_id):
+        """Queue a failed or cancelled job again, keeping its checkpoints"""
+        cursor = self._execute(
+            "UPDATE jobs SET status = 'queued', cancel_requested = 0, error = NULL, updated = ? "
+            "WHERE id = ? AND status IN ('failed', 'cancelled')", (time.time(), job_id))
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        return _job(self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status=None, limit=50):
+        """Return the most recent jobs, newest first"""
+        sql, params = "SELECT * FROM jobs", []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [_job(row) for row in self._execute(sql, params).fetchall()]
+
+    def active_story_ids(self):
+        """Return the story ids of queued and running jobs"""
+        rows = self._execute("SELECT DISTINCT story_id FROM jobs "
+                             "WHERE status IN ('queued', 'running') AND story_id IS NOT NULL").fetchall()
+        return {row[0] for row in rows}
+
+    def counts(self):
+        """Return the number of jobs per status"""
+        rows = self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
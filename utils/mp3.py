@@ -0,0 +1,146 @@
+# Bitrates in kbps indexed by [version_group][layer][bitrate_index]
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def parse_frame_header(data, i):
+    """Return (frame_length, samples, sample_rate) for a frame header at i, or None"""
+    if i + 4 > len(data) or data[i] != 0xFF or (data[i + 1] & 0xE0) != 0xE0:
+        return None
+    version = (data[i + 1] >> 3) & 0x03
+    layer_bits = (data[i + 1] >> 1) & 0x03
+    bitrate_index = (data[i + 2] >> 4) & 0x0F
+    rate_index = (data[i + 2] >> 2) & 0x03
+    padding = (data[i + 2] >> 1) & 0x01
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    layer = 4 - layer_bits
+    group = 1 if version == 3 else 2
+    bitrate = _BITRATES[(group, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or group == 1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    return length, samples, sample_rate
+
+
+def skip_id3(data):
+    """Return the offset of the first byte after a leading ID3v2 tag"""
+    if len(data) >= 10 and data[:3] == b'ID3':
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return 10 + size
+    return 0
+
+
+def strip_id3(data):
+    """Drop a leading ID3v2 tag so frames can be concatenated"""
+    return data[skip_id3(data):]
+
+
+def _side_info_size(data, i):
+    """Size of the Layer III side information that follows a frame header"""
+    mpeg1 = (data[i + 1] >> 3) & 0x03 == 3
+    mono = (data[i + 3] >> 6) & 0x03 == 3
+    if mpeg1:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def parse_info_frame(data, i, length):
+    """Return (delay, padding) if the frame at i is a Xing/Info/VBRI header frame, else None
+
+    These frames carry no audio. delay and padding are the encoder delay
+    and end padding in samples from a LAME tag (0, 0 without one).
+    """
+    if (data[i + 1] >> 1) & 0x03 != 1:
+        return None  # Only Layer III has info frames
+    frame = data[i:i + length]
+    if frame[36:40] == b'VBRI':
+        return 0, 0
+    offset = 4 + _side_info_size(data, i)
+    if frame[offset:offset + 4] not in (b'Xing', b'Info'):
+        return None
+    flags = int.from_bytes(frame[offset + 4:offset + 8], 'big')
+    # Optional frame count, byte count, TOC and quality fields come first
+    tag = offset + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    lame = frame[tag:tag + 24]
+    if len(lame) < 24 or not lame[:4].isalpha():
+        return 0, 0
+    delay = (lame[21] << 4) | (lame[22] >> 4)
+    padding = ((lame[22] & 0x0F) << 8) | lame[23]
+    return delay, padding
+
+
+def strip_info_frame(data):
+    """Drop a leading ID3v2 tag and Xing/Info header frame so chunks can be concatenated
+
+    Decoders only apply the encoder delay and padding of the first info frame
+    in a stream, so a joined file must not carry one per chunk. Without it
+    every frame is decoded and a chunk lasts exactly its frame count.
+    """
+    data = strip_id3(data)
+    header = parse_frame_header(data, 0)
+    if header is not None and header[0] <= len(data) and parse_info_frame(data, 0, header[0]) is not None:
+        return data[header[0]:]
+    return data
+
+
+def mp3_duration(data):
+    """Return the exact duration in seconds of raw MP3 data by counting frames
+
+    Xing/Info header frames are not counted as audio, and the encoder delay
+    and padding from a leading LAME tag are subtracted, matching what a
+    gapless decoder (ffmpeg) outputs.
+    """
+    i = skip_id3(data)
+    total_samples = 0
+    sample_rate = None
+    trim = 0
+    while i + 4 <= len(data):
+        header = parse_frame_header(data, i)
+        if header is None or i + header[0] > len(data):
+            # Not a frame start (or a truncated frame), resync byte by byte
+            i += 1
+            continue
+        length, samples, rate = header
+        info = parse_info_frame(data, i, length)
+        if info is not None:
+            if sample_rate is None:
+                trim = sum(info)
+        else:
+            sample_rate = sample_rate or rate
+            total_samples += samples
+        i += length
+    if not sample_rate:
+        return 0.0
+    return max(0, total_samples - trim) / sample_rate
+
+
+def silent_frames(duration, sample_rate=24000, bitrate=48000):
+    """Build silent MPEG-2 Layer III mono frames (all-zero side info decodes to silence)"""
+    rate_index = _SAMPLE_RATES[2].index(sample_rate)
+    bitrate_index = _BITRATES[(2, 3)].index(bitrate // 1000)
+    header = bytes([0xFF, 0xF3, (bitrate_index << 4) | (rate_index << 2), 0xC0])
+    frame = header + bytes(72 * bitrate // sample_rate - 4)
+    count = max(1, round(duration * sample_rate / 576))
+    return frame * count
@@ -0,0 +1,126 @@
+import numpy as np
+
+# Frames this far below the loudest frame count as silence
+SILENCE_DB = -40.0
+# Analysis frame for silence detection
+FRAME_SECONDS = 0.02
+# WSOLA frame length and how far a frame may move to line up with the previous one
+STRETCH_FRAME_SECONDS = 0.03
+STRETCH_TOLERANCE_SECONDS = 0.01
+
+
+def find_silences(samples, sample_rate, min_silence, threshold_db=SILENCE_DB, frame=FRAME_SECONDS):
+    """Return an (n, 2) array of [start, end) sample ranges that stay quiet for at least min_silence seconds
+
+    Loudness is the RMS of FRAME_SECONDS frames relative to the loudest
+    frame, so the threshold does not depend on the TTS output level.
+    """
+    hop = max(1, int(frame * sample_rate))
+    count = len(samples) // hop
+    if count == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    frames = np.asarray(samples[:count * hop], dtype=np.float32).reshape(count, hop)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    peak = rms.max()
+    quiet = rms <= peak * 10 ** (threshold_db / 20) if peak > 0 else np.ones(count, dtype=bool)
+
+    edges = np.diff(np.concatenate(([0], quiet.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1) * hop, np.flatnonzero(edges == -1) * hop
+    # A quiet run up to the last whole frame also covers the leftover samples
+    ends[ends == count * hop] = len(samples)
+    long_enough = ends - starts >= int(min_silence * sample_rate)
+    return np.stack((starts[long_enough], ends[long_enough]), axis=1)
+
+
+def compact_silences(samples, sample_rate, max_pause, threshold_db=SILENCE_DB):
+    """Shorten every pause longer than max_pause seconds to max_pause
+
+    Half of the kept pause stays on each side of the cut, so word onsets and
+    tails are never clipped. Returns (samples, source_times, target_times):
+    the compacted audio and a piecewise-linear table mapping times in the
+    input to times in the output (see WordTrack.remap).
+    """
+    keep = int(max_pause * sample_rate)
+    pieces, source, target = [], [0], [0]
+    position = length = 0
+    for start, end in find_silences(samples, sample_rate, max_pause, threshold_db).tolist():
+        cut_start, cut_end = start + keep // 2, end - (keep - keep // 2)
+        if cut_end <= cut_start:
+            continue
+        pieces.append(samples[position:cut_start])
+        length += cut_start - position
+        # Everything inside the cut lands on the join
+        source += [cut_start, cut_end]
+        target += [length, length]
+        position = cut_end
+    pieces.append(samples[position:])
+    length += len(samples) - position
+    source.append(len(samples))
+    target.append(length)
+    compacted = np.concatenate(pieces).astype(np.float32, copy=False)
+    return compacted, np.array(source) / sample_rate, np.array(target) / sample_rate
+
+
+def time_stretch(samples, sample_rate, speed, frame=STRETCH_FRAME_SECONDS, tolerance=STRETCH_TOLERANCE_SECONDS):
+    """Play samples speed times faster without changing the pitch (WSOLA)
+
+    Output frames are taken from about t * speed in the input, each shifted
+    by up to tolerance seconds to best continue the waveform of the previous
+    frame, and overlap-added with a Hann window. The output has exactly
+    round(len(samples) / speed) samples.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    out_length = int(round(len(samples) / speed))
+    if speed == 1.0 or len(samples) == 0:
+        return samples[:out_length].copy()
+    size = max(2, int(frame * sample_rate)) // 2 * 2
+    hop = size // 2
+    shift = int(tolerance * sample_rate)
+    # Periodic Hann windows at 50% overlap sum to one
+    window = np.hanning(size + 1)[:size].astype(np.float32)
+    # Output sample i is written at out[i + size]; its nominal source is x[i * speed + lead]
+    lead = int(np.ceil(size * speed)) + shift
+    x = np.concatenate((np.zeros(lead, np.float32), samples, np.zeros(size * 2 + shift * 2, np.float32)))
+    out = np.zeros(out_length + size * 2, dtype=np.float32)
+    norm = np.zeros_like(out)
+
+    previous = None
+    for position in range(0, out_length + size, hop):
+        nominal = int(round((position - size) * speed)) + lead
+        if previous is None:
+            best = nominal
+        else:
+            # Match the natural continuation of the previous frame
+            natural = x[previous + hop:previous + hop + size]
+            region = x[nominal - shift:nominal + shift + size]
+            best = nominal - shift + int(np.argmax(np.correlate(region, natural, mode='valid')))
+        out[position:position + size] += x[best:best + size] * window
+        norm[position:position + size] += window
+        previous = best
+
+    out, norm = out[size:size + out_length], norm[size:size + out_length]
+    return np.where(norm > 1e-3, out / np.maximum(norm, 1e-3), out)
+
+
+def pace_audio(samples, sample_rate, max_pause=None, speed=1.0, threshold_db=SILENCE_DB):
+    """Shorten long pauses and speed up speech; returns (samples, source_times, target_times)
+
+    max_pause=None keeps every pause, speed=1.0 keeps the tempo. The table
+    maps input times to output times exactly: cuts are sample accurate and
+    the stretch scales every time by the ratio of the output and input
+    lengths.
+    """
+    if max_pause is not None and max_pause < 0:
+        raise ValueError(f"max_pause must not be negative, got {max_pause}")
+    if speed <= 0:
+        raise ValueError(f"speed must be positive, got {speed}")
+    samples = np.asarray(samples, dtype=np.float32)
+    duration = len(samples) / sample_rate
+    source, target = np.array([0.0, duration]), np.array([0.0, duration])
+    if max_pause is not None:
+        samples, source, target = compact_silences(samples, sample_rate, max_pause, threshold_db)
+    if speed != 1.0 and len(samples):
+        stretched = time_stretch(samples, sample_rate, speed)
+        target = target * (len(stretched) / len(samples))
+        samples = stretched
+    return samples, source, target
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_DB = os.environ.get("STORY_DB", "stories.db")
+STATUSES = ("new", "processing", "done", "failed", "skipped")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id TEXT PRIMARY KEY,
+    subreddit TEXT,
+    title TEXT NOT NULL,
+    author TEXT,
+    score INTEGER NOT NULL DEFAULT 0,
+    length INTEGER NOT NULL DEFAULT 0,
+    created_utc REAL,
+    url TEXT,
+    content TEXT,
+    status TEXT NOT NULL DEFAULT 'new',
+    first_seen REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stories_status_score ON stories (status, score DESC);
+CREATE INDEX IF NOT EXISTS idx_stories_status_length ON stories (status, length);
+CREATE INDEX IF NOT EXISTS idx_stories_subreddit ON stories (subreddit, created_utc);
+"""
+
+# Columns returned by listing queries (content is left out unless asked for)
+SUMMARY_COLUMNS = "id, subreddit, title, author, score, length, created_utc, url, status"
+
+
+def _created_timestamp(value):
+    """Accept epoch seconds or the ISO strings written by older story files"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def legacy_story_id(story):
+    """Stable id for stories saved before Reddit post ids were recorded"""
+    source = story.get("url") or f"{story.get('author')}:{story.get('title')}"
+    return "legacy_" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+
+class StoryStore:
+    """SQLite-backed store of Reddit stories keyed by post id"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _row(self, story, now):
+        content = story.get("content") or ""
+        return {
+            "id": story.get("id") or legacy_story_id(story),
+            "subreddit": story.get("subreddit"),
+            "title": story["title"],
+            "author": story.get("author"),
+            "score": int(story.get("score") or 0),
+            "length": len(content),
+            "created_utc": _created_timestamp(story.get("created_utc")),
+            "url": story.get("url"),
+            "content": content,
+            "now": now,
+        }
+
+    def upsert_many(self, stories):
+        """Insert new stories and refresh the score of known ones
+
+        Processing status is never touched, so re-ingesting a story that was
+        already rendered does not queue it again. Returns (inserted, updated).
+        """
+        now = time.time()
+        rows = [self._row(story, now) for story in stories]
+        if not rows:
+            return 0, 0
+        with self._lock, self._conn:
+            known = self._seen(row["id"] for row in rows)
+            self._conn.executemany(
+                """
+                INSERT INTO stories (id, subreddit, title, author, score, length, created_utc,
+                                     url, content, status, first_seen, updated)
+                VALUES (:id, :subreddit, :title, :author, :score, :length, :created_utc,
+                        :url, :content, 'new', :now, :now)
+                ON CONFLICT(id) DO UPDATE SET
+                    score = excluded.score,
+                    updated = excluded.updated,
+                    subreddit = COALESCE(stories.subreddit, excluded.subreddit)
+                """,
+                rows,
+            )
+        updated = sum(1 for row in rows if row["id"] in known)
+        return len(rows) - updated, updated
+
+    def upsert(self, story):
+        """Insert or refresh one story; returns True if it was new"""
+        inserted, _ = self.upsert_many([story])
+        return inserted == 1
+
+    def _seen(self, ids):
+        ids = list(ids)
+        seen = set()
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(ids), 500):
+            batch = ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            seen.update(row[0] for row in self._conn.execute(
+                f"SELECT id FROM stories WHERE id IN ({placeholders})", batch))
+        return seen
+
+    def seen_ids(self, ids):
+        """Return which of the given post ids are already stored"""
+        with self._lock:
+            return self._seen(ids)
+
+    def query(self, status="new", max_length=None, min_length=1, subreddit=None,
+              limit=20, offset=0, include_content=False):
+        """Return the top-scoring stories matching the filters, best first"""
+        columns = f"{SUMMARY_COLUMNS}, content" if include_content else SUMMARY_COLUMNS
+        clauses, params = ["length >= ?"], [min_length]
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if max_length:
+            clauses.append("length <= ?")
+            params.append(max_length)
+        if subreddit:
+            clauses.append("subreddit = ?")
+            params.append(subreddit)
+        params += [limit, offset]
+        sql = (f"SELECT {columns} FROM stories WHERE {' AND '.join(clauses)} "
+               "ORDER BY score DESC, created_utc DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def get(self, story_id):
+        """Return one story including its content, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM stories WHERE id = ?", (story_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_status(self, story_id, status):
+        if status not in STATUSES:
+            raise ValueError(f"Unknown story status: {status}")
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE stories SET status = ?, updated = ? WHERE id = ?",
+                               (status, time.time(), story_id))
+
+    def reset_processing(self, keep=()):
+        """Set 'processing' stories back to 'new', except those in keep; returns how many changed"""
+        keep = set(keep)
+        with self._lock, self._conn:
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM stories WHERE status = 'processing'")
+                   if row[0] not in keep]
+            self._conn.executemany("UPDATE stories SET status = 'new', updated = ? WHERE id = ?",
+                                   [(time.time(), story_id) for story_id in ids])
+        return len(ids)
+
+    def count(self, status=None):
+        sql, params = "SELECT COUNT(*) FROM stories", ()
+        if status:
+            sql, params = sql + " WHERE status = ?", (status,)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def import_json(self, path, subreddit=None):
+        """Import a creepypasta_stories_*.json file written by older versions"""
+        with open(path, "r", encoding="utf-8") as f:
+            stories = json.load(f)
+        for story in stories:
+            story.setdefault("subreddit", subreddit)
+        return self.upsert_many(stories)
@@ -0,0 +1,104 @@
+import numpy as np
+
+from utils.glyph_cache import DEFAULT_STYLE, get_glyph_cache
+from utils.subtitles import WordTrack
+
+
+class SubtitleOverlay:
+    """Interval-indexed word overlay that blends only the active words onto a frame
+
+    Word times are kept in sorted NumPy arrays and each unique word is stored
+    once as a glyph, so the per-frame cost does not depend on story length.
+    """
+
+    def __init__(self, words, frame_width, glyph_cache=None, style=None, position='center'):
+        self.style = style or DEFAULT_STYLE
+        self.position = position
+        glyph_cache = glyph_cache or get_glyph_cache()
+
+        track = WordTrack.from_tuples(words)
+        visible = track.ends > track.starts
+
+        # One glyph per distinct word; words whose glyph fails are dropped
+        self.glyphs = []
+        glyph_of = np.full(len(track.vocab), -1, dtype=np.int32)
+        for vocab_id in np.unique(track.ids[visible]).tolist():
+            word = track.vocab[vocab_id]
+            try:
+                glyph = glyph_cache.get_arrays(word, frame_width, self.style)
+            except Exception as e:
+                print(f"Error creating subtitle glyph for word '{word}': {e}")
+                continue
+            glyph_of[vocab_id] = len(self.glyphs)
+            self.glyphs.append(glyph)
+
+        ids = glyph_of[track.ids]
+        keep = visible & (ids >= 0)
+        order = np.argsort(track.starts[keep], kind='stable')
+        self.starts = track.starts[keep][order]
+        self.ends = track.ends[keep][order]
+        self.glyph_ids = ids[keep][order]
+        # Running maximum of end times lets the backwards scan stop early
+        self._max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def active_indices(self, t):
+        """Return indices (in draw order) of the words visible at time t"""
+        i = int(np.searchsorted(self.starts, t, side='right'))
+        active = []
+        j = i - 1
+        while j >= 0 and self._max_end[j] > t:
+            if self.ends[j] > t:
+                active.append(j)
+            j -= 1
+        active.reverse()
+        return active
+
+    def _offset(self, frame_shape, glyph_shape):
+        frame_h, frame_w = frame_shape[:2]
+        glyph_h, glyph_w = glyph_shape[:2]
+        x = (frame_w - glyph_w) // 2
+        if self.position == 'bottom':
+            y = frame_h - glyph_h - frame_h // 10
+        elif self.position == 'center':
+            y = (frame_h - glyph_h) // 2
+        else:
+            # Centre at a fraction of the frame height, like write_ass's position
+            y = int(frame_h * self.position) - glyph_h // 2
+        return x, y
+
+    def blend(self, frame, glyph_id):
+        """Alpha-blend one glyph onto the frame in place"""
+        rgb, mask = self.glyphs[glyph_id]
+        x, y = self._offset(frame.shape, rgb.shape)
+
+        # Crop the glyph to the part that falls inside the frame
+        gx0, gy0 = max(0, -x), max(0, -y)
+        x0, y0 = max(0, x), max(0, y)
+        x1 = min(frame.shape[1], x + rgb.shape[1])
+        y1 = min(frame.shape[0], y + rgb.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return frame
+        src = rgb[gy0:gy0 + (y1 - y0), gx0:gx0 + (x1 - x0)]
+        alpha = mask[gy0:gy0 + (y1 - y0), gx0:gx0 + (x1 - x0), None]
+
+        region = frame[y0:y1, x0:x1].astype(np.float32)
+        region += (src - region) * alpha
+        frame[y0:y1, x0:x1] = region.astype(frame.dtype)
+        return frame
+
+    def apply(self, frame, t):
+        """Return the frame with the words active at time t drawn on top"""
+        active = self.active_indices(t)
+        if not active:
+            return frame
+        frame = np.array(frame, copy=True)
+        for idx in active:
+            self.blend(frame, self.glyph_ids[idx])
+        return frame
+
+    def apply_to(self, clip):
+        """Wrap a video clip so every frame gets the subtitle overlay"""
+        return clip.fl(lambda get_frame, t: self.apply(get_frame(t), t))
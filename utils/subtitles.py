@@ -0,0 +1,211 @@
+import re
+from array import array
+
+import numpy as np
+
+from utils.word_timings import clean_word
+
+# HH:MM:SS,mmm (SRT) or [HH:]MM:SS.mmm (VTT)
+_TIMESTAMP_RE = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def parse_timestamp(text):
+    """Convert an SRT or VTT timestamp to seconds"""
+    match = _TIMESTAMP_RE.search(text)
+    if not match:
+        raise ValueError(f"Invalid timestamp: {text!r}")
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, '0')) / 1000
+
+
+def format_timestamp(seconds, separator=','):
+    """Convert seconds to an SRT (or, with separator='.', VTT) timestamp"""
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _parse_timing_line(line):
+    start, _, rest = line.partition('-->')
+    # VTT cue settings may follow the end timestamp
+    return parse_timestamp(start), parse_timestamp(rest.split()[0])
+
+
+def iter_cues(path):
+    """Stream (start, end, text) cues from an SRT or VTT file
+
+    Reads line by line, so memory does not grow with the file. Multi-line
+    cue text is joined with spaces and VTT/HTML styling tags are removed.
+    Cue numbers, VTT identifiers, the WEBVTT header and NOTE/STYLE blocks
+    are skipped.
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        timing, lines, skip_block = None, [], False
+        for raw in f:
+            line = raw.strip()
+            if not line:
+                if timing is not None:
+                    yield timing[0], timing[1], _TAG_RE.sub('', ' '.join(lines))
+                timing, lines, skip_block = None, [], False
+                continue
+            if skip_block:
+                continue
+            if timing is None:
+                if '-->' in line:
+                    timing = _parse_timing_line(line)
+                elif line.startswith(('WEBVTT', 'NOTE', 'STYLE', 'REGION')):
+                    skip_block = True
+                # Anything else before the timing line is a cue number or identifier
+                continue
+            lines.append(line)
+        if timing is not None:
+            yield timing[0], timing[1], _TAG_RE.sub('', ' '.join(lines))
+
+
+class CueTrack:
+    """Subtitle cues as parallel arrays: float64 start/end plus the cue texts"""
+
+    def __init__(self, starts, ends, texts):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.texts = list(texts)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build from dicts with start, end and text (e.g. Whisper segments)"""
+        return cls([s["start"] for s in segments], [s["end"] for s in segments],
+                   [s["text"].strip() for s in segments])
+
+    @classmethod
+    def read(cls, path):
+        """Parse an SRT or VTT file"""
+        starts, ends, texts = array('d'), array('d'), []
+        for start, end, text in iter_cues(path):
+            starts.append(start)
+            ends.append(end)
+            texts.append(text)
+        return cls(np.frombuffer(starts, dtype=np.float64), np.frombuffer(ends, dtype=np.float64), texts)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+
+    def retime(self, scale=1.0, offset=0.0):
+        """Return a copy with every time mapped to time * scale + offset"""
+        return CueTrack(self.starts * scale + offset, self.ends * scale + offset, self.texts)
+
+    def write_srt(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, (start, end, text) in enumerate(self, 1):
+                f.write(f"{i}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n")
+        return path
+
+    def write_vtt(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("WEBVTT\n\n")
+            for start, end, text in self:
+                f.write(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n")
+        return path
+
+
+class WordTrack:
+    """Word timings as parallel arrays with interned words
+
+    ids index into vocab (each distinct word is stored once); starts and
+    ends are float64. Iterating yields (word, start, end) tuples, so a track
+    can be passed anywhere a list of word timings is expected.
+    """
+
+    def __init__(self, vocab, ids, starts, ends):
+        self.vocab = list(vocab)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+
+    @classmethod
+    def from_words(cls, words, starts, ends):
+        """Build from a list of word strings and their start/end times"""
+        index = {}
+        ids = np.fromiter((index.setdefault(w, len(index)) for w in words), dtype=np.int32, count=len(words))
+        return cls(list(index), ids, starts, ends)
+
+    @classmethod
+    def from_tuples(cls, words):
+        """Build from (word, start, end) tuples"""
+        if isinstance(words, WordTrack):
+            return words
+        words = list(words)
+        return cls.from_words([w for w, _, _ in words],
+                              [s for _, s, _ in words], [e for _, _, e in words])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        vocab = self.vocab
+        return ((vocab[i], s, e) for i, s, e in zip(self.ids.tolist(), self.starts.tolist(), self.ends.tolist()))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return WordTrack(self.vocab, self.ids[index], self.starts[index], self.ends[index])
+        return self.vocab[self.ids[index]], float(self.starts[index]), float(self.ends[index])
+
+    @property
+    def words(self):
+        return [self.vocab[i] for i in self.ids.tolist()]
+
+    def select(self, mask):
+        """Return the words where a boolean mask (or index array) is set"""
+        return WordTrack(self.vocab, self.ids[mask], self.starts[mask], self.ends[mask])
+
+    def overlapping(self, start, end):
+        """Words whose display interval overlaps [start, end)"""
+        return self.select((self.starts < end) & (self.ends > start))
+
+    def retime(self, scale=1.0, offset=0.0):
+        """Return a copy with every time mapped to time * scale + offset"""
+        return WordTrack(self.vocab, self.ids, self.starts * scale + offset, self.ends * scale + offset)
+
+    def remap(self, source_times, target_times):
+        """Map times through a piecewise-linear table (e.g. after cutting or stretching audio)"""
+        return WordTrack(self.vocab, self.ids,
+                         np.interp(self.starts, source_times, target_times),
+                         np.interp(self.ends, source_times, target_times))
+
+
+def estimate_word_track(cues, max_word=0.4, max_gap=0.1):
+    """Spread each cue's words from its start time (used when no word timings exist)
+
+    Each word lasts min(max_word, cue duration / words), shortened for words
+    under five characters, followed by a small gap. Computed for all cues at
+    once with segmented cumulative sums.
+    """
+    words, cue_index = [], array('i')
+    for i, text in enumerate(cues.texts):
+        for raw in text.split():
+            word = clean_word(raw)
+            if word:
+                words.append(word)
+                cue_index.append(i)
+    if not words:
+        return WordTrack([], [], [], [])
+
+    cue_index = np.frombuffer(cue_index, dtype=np.int32)
+    counts = np.bincount(cue_index, minlength=len(cues))
+    cue_duration = np.minimum(max_word, (cues.ends - cues.starts) / np.maximum(counts, 1))
+    word_duration = cue_duration[cue_index]
+    lengths = np.fromiter((len(w) for w in words), dtype=np.float64, count=len(words))
+    durations = np.minimum(word_duration * lengths / 5, word_duration)
+    steps = durations + np.minimum(max_gap, word_duration * 0.2)
+
+    # Offset of each word inside its cue = sum of the steps of the earlier words in that cue
+    totals = np.cumsum(steps)
+    first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    before_cue = np.concatenate([[0.0], totals])[first]
+    starts = cues.starts[cue_index] + (totals - steps) - before_cue[cue_index]
+    return WordTrack.from_words(words, starts, starts + durations)
@@ -0,0 +1,271 @@
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_ENV = "BRAINROT_TRACE"
+TRACE_FORMATS = ("jsonl", "chrome")
+# How often resident memory is sampled while spans are open
+RSS_SAMPLE_SECONDS = 0.05
+
+_tracer = None
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _read_thread_io():
+    """Return the calling thread's I/O counters (Linux only, empty elsewhere)
+
+    Per-thread counters keep spans running at the same time in other threads
+    from counting each other's I/O.
+    """
+    try:
+        with open("/proc/thread-self/io") as f:
+            return {key: int(value) for key, value in (line.split(":") for line in f)}
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_rss_mb():
+    """Return the process's current resident memory in MiB (Linux only, None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _process_peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class _NullSpan:
+    """Shared no-op span returned while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed region that records wall/CPU time, its thread's I/O bytes and peak memory
+
+    CPU time and I/O are the span's own thread's. Memory is the process's
+    resident size, sampled while the span is open, so it includes whatever
+    other threads allocate meanwhile.
+    """
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(tracer._ids)
+        self.parent = None
+        self.peak_rss = None
+
+    def set(self, **attrs):
+        """Attach extra attributes (e.g. counts known only at the end)"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent = parent.id if parent else None
+        self._token = _current_span.set(self)
+        self._io = _read_thread_io()
+        self.tracer._watch(self)
+        self._cpu = time.thread_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._start
+        cpu = time.thread_time() - self._cpu
+        io = _read_thread_io()
+        peak_rss = self.tracer._unwatch(self)
+        _current_span.reset(self._token)
+        record = {
+            "name": self.name,
+            "id": self.id,
+            "parent": self.parent,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "start": self._start - self.tracer.origin,
+            "wall": wall,
+            "cpu": cpu,
+            "read_bytes": io.get("read_bytes", 0) - self._io.get("read_bytes", 0),
+            "write_bytes": io.get("write_bytes", 0) - self._io.get("write_bytes", 0),
+            "rchar": io.get("rchar", 0) - self._io.get("rchar", 0),
+            "wchar": io.get("wchar", 0) - self._io.get("wchar", 0),
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            # High-water mark of the whole process so far, not of this span
+            "process_peak_rss_mb": _process_peak_rss_mb(),
+            "attrs": self.attrs,
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.emit(record)
+        return False
+
+
+class Tracer:
+    """Writes finished spans as JSON lines or Chrome trace events"""
+
+    def __init__(self, path, fmt="jsonl"):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.origin = time.perf_counter()
+        self._epoch_us = time.time() * 1e6
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._open_spans = set()
+        self._spans_lock = threading.Lock()
+        self._sampler = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        if fmt == "chrome":
+            # The trace viewer accepts an unterminated array, so events can be streamed
+            self._file.write("[\n")
+
+    def span(self, name, attrs):
+        return Span(self, name, attrs)
+
+    def _watch(self, span):
+        """Start tracking span's peak memory, sampling in a thread while any span is open"""
+        span.peak_rss = _read_rss_mb()
+        if span.peak_rss is None:
+            return
+        with self._spans_lock:
+            self._open_spans.add(span)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_rss, name="trace-rss", daemon=True)
+                self._sampler.start()
+
+    def _unwatch(self, span):
+        """Stop tracking span and return its peak resident memory in MiB"""
+        rss = _read_rss_mb()
+        with self._spans_lock:
+            self._open_spans.discard(span)
+            if rss is not None and span.peak_rss is not None:
+                span.peak_rss = max(span.peak_rss, rss)
+        return span.peak_rss
+
+    def _sample_rss(self):
+        while True:
+            time.sleep(RSS_SAMPLE_SECONDS)
+            rss = _read_rss_mb()
+            with self._spans_lock:
+                if not self._open_spans:
+                    # Exit while idle, the next span starts a new sampler
+                    self._sampler = None
+                    return
+                if rss is not None:
+                    for span in self._open_spans:
+                        span.peak_rss = max(span.peak_rss, rss)
+
+    def emit(self, record):
+        if self.fmt == "chrome":
+            event = {
+                "name": record["name"],
+                "ph": "X",
+                "ts": self._epoch_us + record["start"] * 1e6,
+                "dur": record["wall"] * 1e6,
+                "pid": record["pid"],
+                "tid": record["tid"],
+                "args": {k: v for k, v in record.items()
+                         if k not in ("name", "start", "wall", "pid", "tid")},
+            }
+            line = json.dumps(event, default=str) + ",\n"
+        else:
+            line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def enable(path, fmt="jsonl", propagate=True):
+    """Start tracing to path; spawned worker processes write to path.<pid>"""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(path, fmt)
+    atexit.register(_tracer.close)
+    if propagate:
+        os.environ[TRACE_ENV] = f"{fmt}:{path}"
+    return _tracer
+
+
+def disable():
+    """Stop tracing and close the trace file"""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+    os.environ.pop(TRACE_ENV, None)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **attrs):
+    """Context manager timing a named region (a shared no-op when tracing is off)"""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, attrs)
+
+
+def traced(name=None):
+    """Decorator form of span()"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _enable_from_env():
+    """Continue a parent's trace in worker processes started with spawn"""
+    value = os.environ.get(TRACE_ENV)
+    if not value or _tracer is not None:
+        return
+    fmt, _, path = value.partition(":")
+    if fmt in TRACE_FORMATS and path:
+        enable(f"{path}.{os.getpid()}", fmt, propagate=False)
+
+
+_enable_from_env()
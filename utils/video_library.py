@@ -0,0 +1,254 @@
+import json
+import os
+import re
+import subprocess
+
+import imageio_ffmpeg
+
+MANIFEST_NAME = ".library.json"
+PROXY_DIR = ".proxies"
+MANIFEST_VERSION = 1
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm")
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_VIDEO_STREAM_RE = re.compile(r"Stream #\S+.*?: Video: (\w+)[^,]*, (\w+)")
+_SIZE_RE = re.compile(r", (\d+)x(\d+)")
+_FPS_RE = re.compile(r"([\d.]+) (?:fps|tbr)")
+
+
+def probe_video(path):
+    """Return (width, height, fps, duration) of a video using the bundled ffmpeg"""
+    meta = probe_metadata(path)
+    return meta["width"], meta["height"], meta["fps"], meta["duration"]
+
+
+def probe_metadata(path):
+    """Read stream metadata from the container header without decoding frames
+
+    Parses the input summary that `ffmpeg -i` prints (the bundled ffmpeg
+    has no ffprobe); only the header is read.
+    """
+    result = subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", path],
+                            capture_output=True, text=True, errors="replace")
+    video = next((line for line in result.stderr.splitlines() if _VIDEO_STREAM_RE.search(line)), None)
+    size = _SIZE_RE.search(video) if video else None
+    if not size:
+        raise RuntimeError(f"No video stream found in {path}: {result.stderr[-500:]}")
+    fps = _FPS_RE.search(video)
+    duration = _DURATION_RE.search(result.stderr)
+    stream = _VIDEO_STREAM_RE.search(video)
+    return {
+        "width": int(size.group(1)),
+        "height": int(size.group(2)),
+        "fps": float(fps.group(1)) if fps else 0.0,
+        "duration": (int(duration.group(1)) * 3600 + int(duration.group(2)) * 60 + float(duration.group(3))
+                     if duration else 0.0),
+        "codec": stream.group(1),
+        "pix_fmt": stream.group(2),
+    }
+
+
+def probe_keyframes(path):
+    """Return keyframe timestamps from the packet flags, without decoding any frame"""
+    result = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostats", "-loglevel", "error",
+         "-i", path, "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True, text=True, errors="replace",
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not read keyframes of {path}: {result.stderr[-500:]}")
+    time_base = 1.0
+    keyframes = []
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            num, den = line.split(":", 1)[1].strip().split("/")
+            time_base = int(num) / int(den)
+        elif not line.startswith("#"):
+            # stream, dts, pts, duration, size, crc[, F=flags][, S=side data...]; flags
+            # are only printed when they differ from a plain keyframe, and side data
+            # fields can follow them, so look the flags up by name
+            fields = [f.strip() for f in line.split(",")]
+            flags = next((int(f[2:], 16) for f in fields[6:] if f.startswith("F=")), 1)
+            if flags & 1:
+                keyframes.append(round(int(fields[2]) * time_base, 6))
+    return sorted(keyframes)
+
+
+def nearest_keyframe(keyframes, t):
+    """Return the last keyframe at or before t (0.0 if none are known)"""
+    best = 0.0
+    for k in keyframes:
+        if k > t:
+            break
+        best = k
+    return best
+
+
+class VideoLibrary:
+    """Background video directory with a cached metadata manifest and render proxies
+
+    The manifest (videos/.library.json) keeps probed metadata and keyframe
+    positions per file; refresh() only re-probes files whose size or mtime
+    changed. Proxies are re-encoded copies at a target output size with a
+    keyframe every second, stored in videos/.proxies.
+    """
+
+    def __init__(self, directory="videos"):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.proxy_dir = os.path.join(directory, PROXY_DIR)
+        self.entries = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("videos", {})
+
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "videos": self.entries}, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _probe(self, name, stat):
+        path = os.path.join(self.directory, name)
+        print(f"Indexing background video: {name}")
+        entry = probe_metadata(path)
+        entry["keyframes"] = probe_keyframes(path)
+        entry["file_size"] = stat.st_size
+        entry["mtime"] = stat.st_mtime
+        entry["proxies"] = {}
+        return entry
+
+    def refresh(self):
+        """Update the manifest for added, changed and removed files"""
+        os.makedirs(self.directory, exist_ok=True)
+        seen = set()
+        changed = False
+        for name in sorted(os.listdir(self.directory)):
+            if not name.lower().endswith(VIDEO_EXTENSIONS):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            seen.add(name)
+            entry = self.entries.get(name)
+            if entry and entry["file_size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                continue
+            try:
+                self.entries[name] = self._probe(name, stat)
+            except Exception as e:
+                print(f"Skipping {name}: {e}")
+                self.entries.pop(name, None)
+            changed = True
+        for name in list(self.entries):
+            if name not in seen:
+                del self.entries[name]
+                changed = True
+        if changed:
+            self.save()
+        return self
+
+    def names(self):
+        """Return the indexed video file names"""
+        return sorted(self.entries)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def describe(self, name):
+        """One-line summary used in selection menus"""
+        e = self.entries[name]
+        return f"{name} ({e['width']}x{e['height']}, {e['fps']:g} fps, {e['duration']:.0f}s)"
+
+    def _proxy_key(self, width, height, fps):
+        return f"{width}x{height}@{fps:g}"
+
+    def _proxy_fresh(self, name, key):
+        entry = self.entries.get(name, {})
+        proxy = entry.get("proxies", {}).get(key)
+        return bool(proxy) and os.path.exists(proxy["path"]) and proxy["source_mtime"] == entry["mtime"]
+
+    def make_proxy(self, name, width, height, fps=30, preset="veryfast", crf=20):
+        """Transcode a render-ready proxy (scaled and center-cropped to width x height)"""
+        key = self._proxy_key(width, height, fps)
+        if self._proxy_fresh(name, key):
+            return self.entries[name]["proxies"][key]["path"]
+
+        os.makedirs(self.proxy_dir, exist_ok=True)
+        base = os.path.splitext(name)[0]
+        proxy_path = os.path.join(self.proxy_dir, f"{base}_{width}x{height}_{fps:g}.mp4")
+        tmp_path = f"{proxy_path}.tmp.mp4"
+        print(f"Creating {width}x{height} proxy for {name}...")
+        subprocess.run([
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-i", self.path(name),
+            "-vf", f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+                   f"crop={width}:{height},fps={fps}",
+            "-an", "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-g", str(int(fps)), "-movflags", "+faststart",
+            tmp_path,
+        ], check=True)
+        os.replace(tmp_path, proxy_path)
+
+        entry = self.entries[name]
+        meta = probe_metadata(proxy_path)
+        entry.setdefault("proxies", {})[key] = {
+            "path": proxy_path,
+            "source_mtime": entry["mtime"],
+            "width": meta["width"],
+            "height": meta["height"],
+            "fps": meta["fps"],
+            "duration": meta["duration"],
+            "keyframes": probe_keyframes(proxy_path),
+        }
+        self.save()
+        return proxy_path
+
+    def render_path(self, name, width=None, height=None, fps=30):
+        """Return the best file to render from: a fresh proxy if one exists, else the original"""
+        if width and height:
+            key = self._proxy_key(width, height, fps)
+            if self._proxy_fresh(name, key):
+                return self.entries[name]["proxies"][key]["path"]
+        return self.path(name)
+
+    @classmethod
+    def containing(cls, path):
+        """Open the library an original or proxy video belongs to"""
+        directory = os.path.dirname(os.path.abspath(path))
+        if os.path.basename(directory) == PROXY_DIR:
+            directory = os.path.dirname(directory)
+        return cls(directory)
+
+    def metadata(self, path):
+        """Return the manifest entry for an original or proxy path
+
+        Originals carry width, height, fps, duration and keyframes; proxies
+        made before their metadata was recorded only carry keyframes. None if
+        the path is not indexed or changed since it was probed.
+        """
+        path = os.path.abspath(path)
+        for name, entry in self.entries.items():
+            if os.path.abspath(self.path(name)) == path:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    return None
+                return entry if entry["file_size"] == stat.st_size and entry["mtime"] == stat.st_mtime else None
+            for key, proxy in entry.get("proxies", {}).items():
+                if os.path.abspath(proxy["path"]) == path:
+                    return proxy if self._proxy_fresh(name, key) else None
+        return None
+
+    def keyframes(self, path):
+        """Return known keyframe times for an original or proxy path"""
+        entry = self.metadata(path)
+        return entry["keyframes"] if entry else None
@@ -0,0 +1,123 @@
+import gc
+import os
+import threading
+
+from utils.tracing import span
+
+DEFAULT_MODEL = os.environ.get("WHISPER_MODEL", "base")
+
+# Models loaded in this process, keyed by (name, device). The dtype only
+# changes how decoding runs (see transcribe()), not the loaded weights
+_models = {}
+_lock = threading.Lock()
+# Per-thread models when thread-pool workers should not share one instance
+_thread_local = threading.local()
+
+
+def _resolve_device(device):
+    if device:
+        return device
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _load(name, device):
+    with span("whisper.model_load", model=name, device=device):
+        import whisper
+        print(f"Loading Whisper model '{name}' on {device}...")
+        return whisper.load_model(name, device=device)
+
+
+def model_key(name=DEFAULT_MODEL, device=None):
+    """Return the registry key for a model configuration"""
+    return (name, _resolve_device(device))
+
+
+def default_dtype(device):
+    """float16 on GPUs, float32 on the CPU (where Whisper has no half-precision kernels)"""
+    return "float16" if device != "cpu" else "float32"
+
+
+def get_model(name=DEFAULT_MODEL, device=None, per_thread=False):
+    """Return a warm Whisper model, loading it at most once per process (or thread)"""
+    key = model_key(name, device)
+
+    if per_thread:
+        models = getattr(_thread_local, "models", None)
+        if models is None:
+            models = _thread_local.models = {}
+        if key not in models:
+            models[key] = _load(*key)
+        return models[key]
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = _load(*key)
+    return model
+
+
+def transcribe(audio, name=DEFAULT_MODEL, device=None, dtype=None, per_thread=False, **options):
+    """Transcribe audio (path or 16 kHz float32 array) with a cached model
+
+    dtype defaults to float16 on GPUs and float32 on the CPU. Whisper's
+    layers cast weights to the input dtype, so one loaded model serves both.
+    """
+    key = model_key(name, device)
+    model = get_model(*key, per_thread=per_thread)
+    dtype = dtype or default_dtype(key[1])
+    options.setdefault("fp16", dtype == "float16")
+    return model.transcribe(audio, **options)
+
+
+def warm(name=DEFAULT_MODEL, device=None):
+    """Load a model ahead of time so the first job does not pay for it"""
+    get_model(name, device)
+
+
+def release(name=DEFAULT_MODEL, device=None):
+    """Drop a cached model and free its memory"""
+    key = model_key(name, device)
+    with _lock:
+        model = _models.pop(key, None)
+    models = getattr(_thread_local, "models", None)
+    if models:
+        models.pop(key, None)
+    if model is not None:
+        del model
+        _free_memory(key[1])
+
+
+def release_all():
+    """Drop every cached model in this process"""
+    with _lock:
+        devices = {key[1] for key in _models}
+        _models.clear()
+    if getattr(_thread_local, "models", None):
+        devices.update(key[1] for key in _thread_local.models)
+        _thread_local.models.clear()
+    for device in devices:
+        _free_memory(device)
+
+
+def _free_memory(device):
+    gc.collect()
+    if device.startswith("cuda"):
+        import torch
+        torch.cuda.empty_cache()
+
+
+def loaded_models():
+    """Return the keys of the models loaded in this process"""
+    with _lock:
+        return list(_models)
+
+
+def init_worker(name=DEFAULT_MODEL, device=None):
+    """Pool initializer: warm the model once per worker process
+
+    Use as ProcessPoolExecutor(initializer=init_worker, initargs=(name,)).
+    Each worker process has its own registry, so the model stays loaded
+    for every job that worker runs.
+    """
+    warm(name, device)
@@ -0,0 +1,58 @@
+import json
+import os
+import re
+
+SIDECAR_VERSION = 1
+
+_WORD_CLEAN_RE = re.compile(r"[^\w'-]")
+
+
+def clean_word(word):
+    """Strip punctuation the same way the on-screen subtitles do"""
+    return _WORD_CLEAN_RE.sub('', word.strip())
+
+
+def word_sidecar_path(srt_path):
+    """Return the word-timing sidecar path that sits next to an SRT file"""
+    base, _ = os.path.splitext(srt_path)
+    return f"{base}.words.json"
+
+
+def words_from_segments(segments):
+    """Extract (word, start, end) tuples from Whisper segments"""
+    words = []
+    for segment in segments:
+        for item in segment.get("words", []):
+            word = clean_word(item["word"])
+            if word:
+                words.append((word, float(item["start"]), float(item["end"])))
+    return words
+
+
+def save_word_timings(words, path):
+    """Write word timings as a compact column-oriented JSON sidecar"""
+    data = {
+        "version": SIDECAR_VERSION,
+        "words": [w for w, _, _ in words],
+        "start": [round(s, 3) for _, s, _ in words],
+        "end": [round(e, 3) for _, _, e in words],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_word_columns(path):
+    """Read a word-timing sidecar and return its (words, starts, ends) columns"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != SIDECAR_VERSION:
+        raise ValueError(f"Unsupported word timing version in {path}: {data.get('version')}")
+    return data["words"], data["start"], data["end"]
+
+
+def load_word_timings(path):
+    """Read a word-timing sidecar and return a list of (word, start, end)"""
+    return list(zip(*load_word_columns(path)))